@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Agent Handler Context
+Pieces shared by the runtimes that host agents outside the screen-session
+manager: the node a handler is running on, handlers referenced by import
+path, and a node that sends through a pluggable transport. Imports only
+the standard library and the core node, so it also loads inside isolated
+subinterpreters.
+"""
+
+import os
+import sys
+import importlib
+import threading
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from multi_agent_screen_network import AgentCommunicationNode, Message
+from loop_prevention_system import LoopPreventionManager, PathTrace
+
+_current = threading.local()
+
+def current_agent() -> Optional['TransportAgentNode']:
+    """The node whose handler is running on this thread, for replies from inside handlers"""
+    return getattr(_current, "node", None)
+
+class HandlerRef:
+    """Picklable reference to a handler by import path, e.g. "my_handlers:on_task"
+
+    Use it when the handler cannot be pickled by value, or its module should
+    only be imported inside the worker.
+    """
+
+    def __init__(self, path: str):
+        module, _, qualname = path.partition(":")
+        if not module or not qualname:
+            raise ValueError(f"Handler path must look like 'module:function', got {path!r}")
+        self.path = path
+        self._resolved = None
+
+    def resolve(self) -> Callable[[Message], None]:
+        if self._resolved is None:
+            module, _, qualname = self.path.partition(":")
+            target: Any = importlib.import_module(module)
+            for part in qualname.split("."):
+                target = getattr(target, part)
+            self._resolved = target
+        return self._resolved
+
+    def __call__(self, message: Message):
+        return self.resolve()(message)
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.path = state['path']
+        self._resolved = None
+
+    def __repr__(self) -> str:
+        return f"HandlerRef({self.path!r})"
+
+def handler_path(handler: Union[str, HandlerRef, Callable]) -> str:
+    """Import path of a handler, the form that crosses into a subinterpreter or another node
+
+    Functions defined in the running script resolve through the script's
+    module name, so the receiving side imports the script as a module.
+    """
+    if isinstance(handler, HandlerRef):
+        return handler.path
+    if isinstance(handler, str):
+        return HandlerRef(handler).path
+
+    module = getattr(handler, "__module__", None)
+    qualname = getattr(handler, "__qualname__", "")
+    if module == "__main__":
+        main = sys.modules["__main__"]
+        spec = getattr(main, "__spec__", None)
+        main_file = getattr(main, "__file__", None)
+        module = spec.name if spec else (os.path.splitext(os.path.basename(main_file))[0] if main_file else None)
+    if not module or not qualname or "<" in qualname:
+        raise TypeError(f"Handler {handler!r} cannot be imported by path; "
+                        f"use a module-level function or a 'module:function' string")
+    return f"{module}:{qualname}"
+
+class TransportAgentNode(AgentCommunicationNode):
+    """Agent node that sends through a runtime transport instead of screen sessions
+
+    ``transport.deliver(message)`` returns False when the recipient cannot
+    be reached. Handlers see the node through ``current_agent()``. With a
+    ``loop_prevention`` manager, inbound messages it rejects (duplicate
+    content, too many from one sender) never reach a handler; replies to
+    this node's own requests always get through.
+    """
+
+    def __init__(self, agent_id: str, network_manager, transport,
+                 loop_prevention: Optional[LoopPreventionManager] = None):
+        super().__init__(agent_id, network_manager)
+        self.transport = transport
+        self.loop_prevention = loop_prevention
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+        self._cancel_pending_requests()
+
+    def send_message(self, recipient: str, content: str, message_type: str = "text", metadata: Dict = None):
+        """Send a message to another agent, wherever it is hosted"""
+        message = self._new_message(recipient, content, message_type, metadata)
+        if self._loop_detected(message):
+            return False
+        return self.transport.deliver(message)
+
+    def _handle_message(self, message: Message):
+        if self.loop_prevention is not None and not self._admit(message):
+            return
+        super()._handle_message(message)
+
+    def _admit(self, message: Message) -> bool:
+        """Loop prevention's verdict on an inbound message, recorded if it passes"""
+        if (message.metadata or {}).get('in_reply_to') in self.pending_requests:
+            return True
+        if not self.loop_prevention.should_process_message(message.content, message.sender):
+            return False
+        self.loop_prevention.record_processed_message(message.content, message.sender, message.id)
+        return True
+
+    def _dispatch_message(self, message: Message):
+        # Wraps the handler itself, which may run on a handler lane rather than this thread
+        previous = current_agent()
+        _current.node = self
+        try:
+            super()._dispatch_message(message)
+        finally:
+            _current.node = previous
+
+class HostedNetwork:
+    """What a node hosted by a runtime worker sees of its network manager"""
+
+    def __init__(self, agent_ids: List[str], path_trace: Optional[Dict[str, Any]] = None):
+        self.agents = dict.fromkeys(agent_ids)
+        self.handler_executor = None
+        self.path_trace = PathTrace(**path_trace) if path_trace else None
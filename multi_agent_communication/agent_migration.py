@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Live Agent Migration
+Decides which agents of a multi-host network should move to another node,
+either from the traffic each node observed or from a communication-matrix
+partition, and moves them with TcpNetworkManager.migrate_agent while
+messages keep flowing
+"""
+
+import os
+import time
+import threading
+from dataclasses import dataclass
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from tcp_transport import TcpNetworkManager, echo_handler, start_broker_process
+
+@dataclass
+class Migration:
+    """Move ``agent`` from node ``source`` to node ``target``"""
+    agent: str
+    source: str
+    target: str
+    gain: float = 0.0           # Messages that stop crossing nodes, as far as the planner can tell
+
+def plan_by_traffic(network: TcpNetworkManager, min_gain: int = 100) -> List[Migration]:
+    """Moves for this node's agents toward the node they talk to most
+
+    Counts each agent's observed messages per node the peers live on. An
+    agent moves when some other node accounts for at least ``min_gain``
+    more of its messages than this one does.
+    """
+    routes = network.broker.request("table")['routes']
+    migrations = []
+    for agent_id, peers in network.traffic_snapshot().items():
+        per_node: Dict[str, int] = {}
+        for peer, count in peers.items():
+            node = routes.get(peer)
+            if node is not None and peer != agent_id:
+                per_node[node] = per_node.get(node, 0) + count
+        local = per_node.pop(network.node_id, 0)
+        if not per_node:
+            continue
+        target, remote = max(per_node.items(), key=lambda item: item[1])
+        if remote - local >= min_gain:
+            migrations.append(Migration(agent_id, network.node_id, target, remote - local))
+    return sorted(migrations, key=lambda migration: -migration.gain)
+
+def plan_from_partition(partition, shard_nodes: List[str], routes: Dict[str, str]) -> List[Migration]:
+    """Moves that make the network match a partition of its communication matrix
+
+    ``partition`` is an AgentPartition, e.g. from
+    ``dep_system.partition_agents(len(shard_nodes))``; shard k goes to node
+    ``shard_nodes[k]``. ``routes`` is the broker's agent -> node table.
+    Agents the broker does not know are skipped.
+    """
+    if partition.n_shards != len(shard_nodes):
+        raise ValueError(f"Partition has {partition.n_shards} shards but {len(shard_nodes)} nodes were given")
+    migrations = []
+    for shard, members in enumerate(partition.shards):
+        for agent in members:
+            source = routes.get(agent)
+            if source is not None and source != shard_nodes[shard]:
+                migrations.append(Migration(agent, source, shard_nodes[shard]))
+    return migrations
+
+def rebalance(network: TcpNetworkManager, migrations: List[Migration],
+              timeout: float = 10.0) -> Dict[str, Optional[Exception]]:
+    """Run the migrations whose source is this node; agent -> None, or the error that stopped it
+
+    Migrations away from other nodes have to be run by those nodes.
+    """
+    futures: Dict[str, Future] = {
+        migration.agent: network.migrate_agent(migration.agent, migration.target, timeout)
+        for migration in migrations if migration.source == network.node_id
+    }
+    return {agent: future.exception(timeout=timeout + 5) for agent, future in futures.items()}
+
+def demonstrate_agent_migration():
+    """A hot agent moves next to the agents that call it while a user keeps calling it"""
+
+    print("LIVE AGENT MIGRATION")
+    print("=" * 20)
+
+    authkey = os.urandom(16)
+    broker_process, broker_address = start_broker_process(authkey=authkey)
+    node0 = TcpNetworkManager("node0", broker_address, authkey=authkey)
+    node1 = TcpNetworkManager("node1", broker_address, authkey=authkey)
+
+    user = node0.add_user()
+    node0.add_agent("worker").register_message_handler("text", echo_handler)
+    clients = [node1.add_agent(f"client{i}") for i in range(4)]
+    node0.start_network()
+    node1.start_network()
+
+    # The clients on node1 keep the worker on node0 busy
+    futures = [client.send_request("worker", f"job{i}", timeout=30)
+               for i in range(500) for client in clients]
+    for future in futures:
+        future.result()
+
+    plan = plan_by_traffic(node0)
+    for migration in plan:
+        print(f"Plan: move {migration.agent} from {migration.source} to {migration.target} "
+              f"(saves {migration.gain:.0f} cross-node messages)")
+
+    # The user keeps calling the worker while it moves
+    calls: List[Future] = []
+    calling = threading.Event()
+    calling.set()
+
+    def keep_calling():
+        while calling.is_set():
+            calls.append(user.send_request("worker", f"call{len(calls)}", timeout=30))
+            time.sleep(0.001)
+
+    caller = threading.Thread(target=keep_calling)
+    caller.start()
+    time.sleep(0.2)
+    errors = rebalance(node0, plan)
+    time.sleep(0.2)
+    calling.clear()
+    caller.join()
+
+    answered_by: Dict[str, int] = {}
+    for future in calls:
+        node_id = future.result().content.split(":", 1)[0]
+        answered_by[node_id] = answered_by.get(node_id, 0) + 1
+    print(f"Migration errors: {[str(e) for e in errors.values() if e] or 'none'}")
+    print(f"{sum(answered_by.values())}/{len(calls)} calls answered during the move: " +
+          ", ".join(f"{count} by {node_id}" for node_id, count in sorted(answered_by.items())))
+    print(f"Broker now routes worker to {node0.broker.request('table')['routes']['worker']}")
+
+    status = node0.get_network_status()
+    print(f"node0 tombstones: {status['moved']}, duplicates dropped: "
+          f"{status['duplicates'] + node1.get_network_status()['duplicates']}")
+
+    node0.stop_network()
+    node1.stop_network()
+    broker_process.terminate()
+    broker_process.join()
+
+if __name__ == "__main__":
+    demonstrate_agent_migration()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Capability Inverted Index
+Maps task keywords to the agents whose capabilities match them, so a
+TASK_REQUEST only goes to agents that can accept it
+"""
+
+import string
+from typing import Dict, List, Optional, Set, Tuple
+
+from multi_agent_screen_network import AgentCommunicationNode
+from scatter_gather import GatherResult, ScatterGather
+
+class CapabilityIndex:
+    """Inverted index from keyword tokens to (agent, capability) pairs
+
+    Matching follows the agents' own rule: a task keyword, a whitespace
+    separated word of the task, matches a capability when it is a
+    substring of it ("model" matches "modeling", "ui" matches "ui", "c++"
+    matches "c++"). Every substring of each capability is indexed, so a
+    lookup is one dict access per keyword instead of a scan over every
+    agent and capability. Like the scan, this lets short words such as "a"
+    match almost anything; ``min_token_length=3`` ignores keywords shorter
+    than that, and ``strip_punctuation`` lets "analysis," match
+    "analysis". Both depart from the scan and are off by default.
+    """
+
+    def __init__(self, min_token_length: int = 1, strip_punctuation: bool = False):
+        self.min_token_length = max(1, min_token_length)
+        self.strip_punctuation = strip_punctuation
+        self.index: Dict[str, Set[Tuple[str, str]]] = {}
+        self.agent_capabilities: Dict[str, List[str]] = {}
+
+    @classmethod
+    def from_agent_configs(cls, agents_config: Dict[str, Dict], min_token_length: int = 1,
+                           strip_punctuation: bool = False) -> 'CapabilityIndex':
+        """Build from ``{agent_id: {"capabilities": [...], ...}}``"""
+        index = cls(min_token_length, strip_punctuation)
+        for agent_id, config in agents_config.items():
+            index.add_agent(agent_id, config.get("capabilities", []))
+        return index
+
+    def _tokens(self, capability: str) -> Set[str]:
+        """All substrings long enough to be matched by a keyword"""
+        tokens = set()
+        for start in range(len(capability)):
+            for end in range(start + self.min_token_length, len(capability) + 1):
+                tokens.add(capability[start:end])
+        return tokens
+
+    def add_agent(self, agent_id: str, capabilities: List[str]):
+        """Index (or re-index) an agent's capabilities"""
+        if agent_id in self.agent_capabilities:
+            self.remove_agent(agent_id)
+
+        self.agent_capabilities[agent_id] = list(capabilities)
+        for capability in capabilities:
+            capability_key = capability.lower()
+            for token in self._tokens(capability_key):
+                self.index.setdefault(token, set()).add((agent_id, capability))
+
+    def remove_agent(self, agent_id: str):
+        """Drop an agent from the index"""
+        for capability in self.agent_capabilities.pop(agent_id, []):
+            for token in self._tokens(capability.lower()):
+                entries = self.index.get(token)
+                if entries is not None:
+                    entries.discard((agent_id, capability))
+                    if not entries:
+                        del self.index[token]
+
+    def _keywords(self, task: str) -> Set[str]:
+        keywords = set()
+        for word in task.lower().split():
+            if self.strip_punctuation:
+                word = word.strip(string.punctuation)
+            if len(word) >= self.min_token_length:
+                keywords.add(word)
+        return keywords
+
+    def match(self, task: str) -> Dict[str, List[str]]:
+        """Agents whose capabilities match the task, with the matching capabilities"""
+        matches: Dict[str, Set[str]] = {}
+        for keyword in self._keywords(task):
+            for agent_id, capability in self.index.get(keyword, ()):
+                matches.setdefault(agent_id, set()).add(capability)
+
+        # Keep each agent's capabilities in their configured order
+        return {
+            agent_id: [cap for cap in self.agent_capabilities[agent_id] if cap in capabilities]
+            for agent_id, capabilities in matches.items()
+        }
+
+    def candidates(self, task: str) -> List[str]:
+        """Agent IDs that should receive the task"""
+        return list(self.match(task))
+
+    def matching_capabilities(self, agent_id: str, task: str) -> List[str]:
+        """Capabilities of one agent that match the task"""
+        return self.match(task).get(agent_id, [])
+
+class CapabilityRouter:
+    """Sends each TASK_REQUEST only to agents whose capabilities match it"""
+
+    def __init__(self, node: AgentCommunicationNode, index: CapabilityIndex,
+                 request_prefix: str = "TASK_REQUEST:"):
+        self.node = node
+        self.index = index
+        self.request_prefix = request_prefix
+
+    def dispatch(self, task: str, fallback: Optional[List[str]] = None) -> List[str]:
+        """Fire-and-forget the task to matching agents; returns the recipients
+
+        When nothing matches, the task goes to ``fallback`` agents (if any)
+        rather than being broadcast to everyone.
+        """
+        recipients = self.index.candidates(task) or list(fallback or [])
+        for agent_id in recipients:
+            self.node.send_message(agent_id, f"{self.request_prefix}{task}")
+        return recipients
+
+    def request(self, task: str, quorum: Optional[int] = None, deadline: float = 10.0,
+                fallback: Optional[List[str]] = None) -> GatherResult:
+        """Scatter the task to matching agents and gather their replies"""
+        recipients = self.index.candidates(task) or list(fallback or [])
+        if not recipients:
+            return GatherResult()
+
+        requests = {agent_id: f"{self.request_prefix}{task}" for agent_id in recipients}
+        if quorum is not None:
+            quorum = min(quorum, len(recipients))
+        return ScatterGather(self.node, requests, quorum=quorum, deadline=deadline).result()
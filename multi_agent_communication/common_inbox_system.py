@@ -21,6 +21,12 @@ class CommonInboxSystem:
         self.common_inbox_session = "common_inbox"
         self.temp_dir = tempfile.gettempdir()
         self.message_counter = 0
+        self._counter_lock = threading.Lock()
+    
+    def _next_message_number(self) -> int:
+        with self._counter_lock:
+            self.message_counter += 1
+            return self.message_counter
     
     def initialize_sessions(self):
         """Create all necessary sessions"""
@@ -72,13 +78,13 @@ class CommonInboxSystem:
     
     def log_to_common_inbox(self, sender: str, recipient: str, content: str, msg_type: str = "direct"):
         """Log every message to the common inbox"""
-        self.message_counter += 1
+        number = self._next_message_number()
         timestamp = datetime.now().strftime("%H:%M:%S")
         
         if msg_type == "broadcast":
-            log_entry = f"[{timestamp}] #{self.message_counter:03d} BROADCAST {sender} -> ALL: {content}"
+            log_entry = f"[{timestamp}] #{number:03d} BROADCAST {sender} -> ALL: {content}"
         else:
-            log_entry = f"[{timestamp}] #{self.message_counter:03d} {sender} -> {recipient}: {content}"
+            log_entry = f"[{timestamp}] #{number:03d} {sender} -> {recipient}: {content}"
         
         try:
             subprocess.run([
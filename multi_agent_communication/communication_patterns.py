@@ -5,6 +5,8 @@ Demonstrates various non-linear communication topologies
 """
 
 from multi_agent_screen_network import *
+from message_router import MessageRouter, RoutedMessage
+from task_scheduler import LoadAwareScheduler
 import random
 import asyncio
 
@@ -79,38 +81,63 @@ class AdvancedAgentBehaviors:
         """Create agents that negotiate and make deals"""
         
         def negotiator_handler(agent_id: str):
-            def handler(message: Message):
-                if "OFFER:" in message.content:
-                    # Simple negotiation logic
-                    offer_value = message.content.split("OFFER:")[1]
-                    response = f"COUNTER:{int(float(offer_value)) + 10}"
-                    network.agents[agent_id].send_message(message.sender, response)
-                elif "COUNTER:" in message.content:
-                    print(f"[{agent_id}] Received counter-offer: {message.content}")
-                    # Could accept or make another counter
-                    network.agents[agent_id].send_message(message.sender, "ACCEPT")
-            return handler
+            router = MessageRouter()
+            
+            def on_offer(routed: RoutedMessage):
+                # Simple negotiation logic
+                response = f"COUNTER:{int(float(routed.payload)) + 10}"
+                network.agents[agent_id].reply(routed.message, response)
+            
+            def on_counter(routed: RoutedMessage):
+                print(f"[{agent_id}] Received counter-offer: {routed.content}")
+                # Could accept or make another counter
+                network.agents[agent_id].reply(routed.message, "ACCEPT")
+            
+            router.on("OFFER", on_offer)
+            router.on("COUNTER", on_counter)
+            return router
         
         for agent_id in network.agents:
             network.agents[agent_id].register_message_handler("text", negotiator_handler(agent_id))
     
     @staticmethod
-    def create_collaborative_agents(network: MultiAgentNetworkManager):
-        """Create agents that collaborate on tasks"""
+    def create_collaborative_agents(network: MultiAgentNetworkManager,
+                                    scheduler: Optional[LoadAwareScheduler] = None):
+        """Create agents that collaborate on tasks
+        
+        Each agent accepts a TASK_REQUEST and answers with a RESULT, echoing
+        the request's ``task_id``. With a scheduler, tasks are handed out by
+        ``scheduler.submit()`` and the user node's replies feed its load
+        tracking, so each RESULT frees the agent for its next task.
+        """
         
         task_assignments = {}
         
+        if scheduler and network.user_node:
+            previous = network.user_node.message_handlers.get("text")
+            network.user_node.register_message_handler("text", scheduler.as_handler(previous))
+        
         def collaborator_handler(agent_id: str):
-            def handler(message: Message):
-                if "TASK_REQUEST:" in message.content:
-                    task = message.content.split("TASK_REQUEST:")[1]
-                    # Assign task part to this agent
-                    task_assignments[agent_id] = task
-                    network.agents[agent_id].send_message(message.sender, f"TASK_ACCEPTED:{task}")
-                elif "RESULT:" in message.content:
-                    print(f"[{agent_id}] Received result: {message.content}")
-                    # Could aggregate results here
-            return handler
+            router = MessageRouter()
+            
+            def on_task_request(routed: RoutedMessage):
+                task = routed.payload
+                # Assign task part to this agent
+                task_assignments[agent_id] = task
+                # Echo the scheduler's task ID so the accept and result can be matched
+                task_id = (routed.message.metadata or {}).get('task_id')
+                metadata = {'task_id': task_id} if task_id else None
+                network.agents[agent_id].reply(routed.message, f"TASK_ACCEPTED:{task}", metadata=metadata)
+                network.agents[agent_id].reply(routed.message, f"RESULT:{agent_id} finished {task}",
+                                               metadata=metadata)
+            
+            def on_result(routed: RoutedMessage):
+                print(f"[{agent_id}] Received result: {routed.content}")
+                # Could aggregate results here
+            
+            router.on("TASK_REQUEST", on_task_request)
+            router.on("RESULT", on_result)
+            return router
         
         for agent_id in network.agents:
             network.agents[agent_id].register_message_handler("text", collaborator_handler(agent_id))
@@ -122,19 +149,21 @@ class AdvancedAgentBehaviors:
         resources = {"resource1": 100, "resource2": 50, "resource3": 25}
         
         def competitor_handler(agent_id: str):
-            def handler(message: Message):
-                if "BID:" in message.content:
-                    # Simple auction logic
-                    bid_info = message.content.split("BID:")[1]
-                    resource, amount = bid_info.split(",")
-                    
-                    # Make a competitive bid
-                    counter_bid = int(amount) + random.randint(1, 10)
-                    network.agents[agent_id].send_message(
-                        message.sender, 
-                        f"COUNTER_BID:{resource},{counter_bid}"
-                    )
-            return handler
+            router = MessageRouter()
+            
+            def on_bid(routed: RoutedMessage):
+                # Simple auction logic
+                resource, amount = routed.payload.split(",")
+                
+                # Make a competitive bid
+                counter_bid = int(amount) + random.randint(1, 10)
+                network.agents[agent_id].reply(
+                    routed.message, 
+                    f"COUNTER_BID:{resource},{counter_bid}"
+                )
+            
+            router.on("BID", on_bid)
+            return router
         
         for agent_id in network.agents:
             network.agents[agent_id].register_message_handler("text", competitor_handler(agent_id))
@@ -233,15 +233,29 @@ class LoopPreventionConfig:
     max_responses_per_thread: int = 2          # Max responses in conversation thread
     max_total_responses: int = 10              # Max total responses per agent
     
+    # Tracked State (evicted oldest first)
+    message_ttl_minutes: int = 30              # Forget messages and threads idle this long
+    max_tracked_messages: int = 10_000         # Cap on remembered messages and content hashes
+    max_tracked_threads: int = 1_000           # Cap on conversation thread counters
+    
     # Deduplication
     enable_content_hashing: bool = True        # Use content hashes for dedup
-    hash_algorithm: str = "md5"                # Hash algorithm to use
+    hash_algorithm: str = "xxh64"              # 64-bit digest: xxh64, blake2b, md5, sha1 or sha256
     ignore_case_in_hash: bool = True           # Case-insensitive hashing
+    collapse_whitespace_in_hash: bool = True   # Treat runs of whitespace as one space
+    probabilistic_dedup: bool = False          # Bloom filters instead of exact digests
+    dedup_error_rate: float = 0.001            # False duplicate rate of the Bloom filters
     
     # Echo Prevention
     prevent_self_echo: bool = True             # Agents can't respond to themselves
     prevent_immediate_echo: bool = True        # Prevent A->B->A immediate loops
     
+    # Network-Wide Loops (hop count and visited-agent filter in message metadata)
+    max_hops: int = 16                         # Drop messages forwarded more often than this
+    drop_path_revisits: bool = True            # Drop messages returning to an agent on their path
+    path_filter_bits: int = 256                # Size of the visited-agent Bloom filter
+    path_filter_hashes: int = 3                # Bits set per visited agent
+    
     # Auto-Response Filtering
     auto_response_keywords: List[str] = None   # Keywords that don't trigger responses
     enable_ack_filtering: bool = True          # Filter acknowledgment messages
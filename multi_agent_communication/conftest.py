@@ -0,0 +1,73 @@
+"""Shared fixtures: an in-process network whose nodes pass messages through a queue instead of screen"""
+
+import queue
+import threading
+
+import pytest
+
+from agent_context import TransportAgentNode
+from multi_agent_screen_network import MultiAgentNetworkManager
+
+class QueueTransport:
+    """Hands every message to its recipient's node on one delivery thread"""
+
+    def __init__(self, network: MultiAgentNetworkManager):
+        self.network = network
+        self.messages = queue.Queue()
+        self.delivered = []
+        self.thread = threading.Thread(target=self._deliver_loop, daemon=True)
+
+    def _node(self, agent_id):
+        user = self.network.user_node
+        return user if user is not None and user.agent_id == agent_id else self.network.agents.get(agent_id)
+
+    def deliver(self, message) -> bool:
+        if self._node(message.recipient) is None:
+            return False
+        self.messages.put(message)
+        return True
+
+    def _deliver_loop(self):
+        while True:
+            message = self.messages.get()
+            try:
+                if message is None:
+                    return
+                self.delivered.append(message)
+                self._node(message.recipient)._handle_message(message)
+            finally:
+                self.messages.task_done()
+
+    def drain(self):
+        """Wait until every message sent so far, and every message those caused, is handled"""
+        self.messages.join()
+
+@pytest.fixture
+def local_network():
+    """Build a started MultiAgentNetworkManager of TransportAgentNodes (plus a "user" node)"""
+    built = []
+
+    def build(agent_ids, **manager_options):
+        network = MultiAgentNetworkManager(**manager_options)
+        transport = QueueTransport(network)
+        network.user_node = TransportAgentNode("user", network, transport)
+        for agent_id in agent_ids:
+            network.agents[agent_id] = TransportAgentNode(agent_id, network, transport)
+        network.transport = transport
+
+        if network.handler_executor:
+            network.handler_executor.start()
+        for node in [network.user_node, *network.agents.values()]:
+            node.start()
+        transport.thread.start()
+        built.append(network)
+        return network
+
+    yield build
+    for network in built:
+        for node in [network.user_node, *network.agents.values()]:
+            node.stop()
+        network.transport.messages.put(None)
+        network.transport.thread.join(timeout=5)
+        if network.handler_executor:
+            network.handler_executor.stop()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Content Digests for Deduplication
+64-bit integer digests of message content, with optional case and
+whitespace normalization, and a scalable Bloom filter that remembers
+digests in a few bits each when exact sets grow too large
+"""
+
+import re
+import math
+import base64
+import hashlib
+from typing import Callable, Dict, List
+
+try:
+    import xxhash
+except ImportError:  # xxh64 falls back to blake2b without the xxhash package
+    xxhash = None
+
+_WHITESPACE = re.compile(r"\s+")
+
+def _blake2b64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+def _truncated(name: str) -> Callable[[bytes], int]:
+    """First 64 bits of a hashlib digest, for configs that still name md5 or sha*"""
+    def digest(data: bytes) -> int:
+        return int.from_bytes(hashlib.new(name, data).digest()[:8], "little")
+    return digest
+
+DIGEST_FUNCTIONS: Dict[str, Callable[[bytes], int]] = {
+    'blake2b': _blake2b64,
+    'md5': _truncated("md5"),
+    'sha1': _truncated("sha1"),
+    'sha256': _truncated("sha256"),
+}
+if xxhash:
+    DIGEST_FUNCTIONS['xxh64'] = xxhash.xxh64_intdigest
+
+class ContentDigest:
+    """Normalizes message content and hashes it to a 64-bit integer
+
+    An int takes a fraction of the memory of a hex string in a set, and
+    Bloom filter positions come straight from its two halves. xxh64 needs
+    the xxhash package; without it ``algorithm`` becomes blake2b, so
+    digests exported from here say what actually produced them.
+    """
+
+    def __init__(self, algorithm: str = "xxh64", ignore_case: bool = False, collapse_whitespace: bool = False):
+        if algorithm == "xxh64" and xxhash is None:
+            algorithm = "blake2b"
+        if algorithm not in DIGEST_FUNCTIONS:
+            raise ValueError(f"Unknown hash algorithm {algorithm!r}; choose from {sorted(DIGEST_FUNCTIONS)}")
+        self.algorithm = algorithm
+        self.ignore_case = ignore_case
+        self.collapse_whitespace = collapse_whitespace
+        self._hash = DIGEST_FUNCTIONS[algorithm]
+
+    @classmethod
+    def from_config(cls, config) -> 'ContentDigest':
+        """Build from a LoopPreventionConfig"""
+        return cls(config.hash_algorithm, config.ignore_case_in_hash, config.collapse_whitespace_in_hash)
+
+    def normalize(self, content: str) -> str:
+        if self.collapse_whitespace:
+            content = _WHITESPACE.sub(" ", content).strip()
+        if self.ignore_case:
+            content = content.casefold()
+        return content
+
+    def __call__(self, content: str) -> int:
+        return self._hash(self.normalize(content).encode())
+
+class ScalableBloomFilter:
+    """Set of 64-bit digests with a bounded false-positive rate and no false negatives
+
+    Starts with one slice sized for ``initial_capacity`` digests. When a
+    slice is full, a larger one with a tighter error rate is added, so the
+    overall rate stays below ``error_rate`` however many digests arrive.
+    Digests cannot be removed; drop the filter to forget them.
+    """
+
+    def __init__(self, initial_capacity: int = 10_000, error_rate: float = 0.001, growth: int = 2,
+                 tightening: float = 0.5):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.slices: List[Dict] = []
+        self.count = 0
+
+    def _add_slice(self):
+        n = len(self.slices)
+        capacity = self.initial_capacity * self.growth ** n
+        slice_error = self.error_rate * (1 - self.tightening) * self.tightening ** n
+        n_hashes = max(1, math.ceil(-math.log2(slice_error)))
+        n_bits = max(8, math.ceil(capacity * abs(math.log(slice_error)) / math.log(2) ** 2))
+        self.slices.append({'bits': bytearray((n_bits + 7) // 8), 'n_bits': n_bits, 'n_hashes': n_hashes,
+                            'capacity': capacity, 'count': 0})
+
+    @staticmethod
+    def _positions(digest: int, n_bits: int, n_hashes: int):
+        first, step = digest & 0xFFFFFFFF, (digest >> 32) | 1
+        return ((first + i * step) % n_bits for i in range(n_hashes))
+
+    def _in_slice(self, filter_slice: Dict, digest: int) -> bool:
+        bits = filter_slice['bits']
+        return all(bits[p >> 3] & (1 << (p & 7))
+                   for p in self._positions(digest, filter_slice['n_bits'], filter_slice['n_hashes']))
+
+    def __contains__(self, digest: int) -> bool:
+        return any(self._in_slice(filter_slice, digest) for filter_slice in self.slices)
+
+    def add(self, digest: int) -> bool:
+        """Add a digest; False if it (probably) was already there"""
+        if digest in self:
+            return False
+        if not self.slices or self.slices[-1]['count'] >= self.slices[-1]['capacity']:
+            self._add_slice()
+        filter_slice = self.slices[-1]
+        bits = filter_slice['bits']
+        for p in self._positions(digest, filter_slice['n_bits'], filter_slice['n_hashes']):
+            bits[p >> 3] |= 1 << (p & 7)
+        filter_slice['count'] += 1
+        self.count += 1
+        return True
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(len(filter_slice['bits']) for filter_slice in self.slices)
+
+    def to_state(self) -> Dict:
+        """JSON-safe snapshot"""
+        return {
+            'initial_capacity': self.initial_capacity, 'error_rate': self.error_rate,
+            'growth': self.growth, 'tightening': self.tightening,
+            'slices': [{**filter_slice, 'bits': base64.b64encode(filter_slice['bits']).decode()}
+                       for filter_slice in self.slices],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'ScalableBloomFilter':
+        bloom = cls(state['initial_capacity'], state['error_rate'], state['growth'], state['tightening'])
+        bloom.slices = [{**filter_slice, 'bits': bytearray(base64.b64decode(filter_slice['bits']))}
+                        for filter_slice in state['slices']]
+        bloom.count = sum(filter_slice['count'] for filter_slice in bloom.slices)
+        return bloom
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Conversation-Ordered Executor
+Runs handler work in parallel across conversations while keeping every
+sender→recipient thread strictly ordered
+"""
+
+import queue
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+# Sentinel placed on a lane queue to stop its worker
+_STOP = object()
+
+
+def conversation_id(sender: str, recipient: str) -> str:
+    """Conversation key for a sender→recipient thread (same format as LoopPreventionManager)"""
+    return f"{sender}-{recipient}"
+
+
+class ConversationOrderedExecutor:
+    """Executor that pins each conversation to one worker lane
+
+    Conversation IDs are hashed to a fixed lane, so work submitted for one
+    conversation runs in submission order on a single worker thread, while
+    different conversations run in parallel on other lanes. There is no
+    global lock on the dispatch path: each lane owns its own queue.
+    """
+
+    def __init__(self, num_lanes: int = 4, name: str = "conversation"):
+        if num_lanes < 1:
+            raise ValueError("num_lanes must be at least 1")
+
+        self.num_lanes = num_lanes
+        self.name = name
+        self.lanes: List[queue.Queue] = [queue.Queue() for _ in range(num_lanes)]
+        self.workers: List[threading.Thread] = []
+        self.running = False
+
+        # Per-lane counters, only ever written by the owning worker
+        self.completed_per_lane = [0] * num_lanes
+        self.errors_per_lane = [0] * num_lanes
+
+    def start(self):
+        """Start one worker thread per lane"""
+        if self.running:
+            return
+
+        self.running = True
+        self.workers = []
+        for lane_index in range(self.num_lanes):
+            worker = threading.Thread(
+                target=self._lane_worker,
+                args=(lane_index,),
+                name=f"{self.name}-lane-{lane_index}",
+                daemon=True
+            )
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self, wait: bool = True, timeout: float = 2.0):
+        """Stop all lanes after the work already queued has drained"""
+        if not self.running:
+            return
+
+        self.running = False
+        for lane in self.lanes:
+            lane.put(_STOP)
+
+        if wait:
+            for worker in self.workers:
+                worker.join(timeout=timeout)
+
+    def lane_for(self, conversation: str) -> int:
+        """Stable lane index for a conversation ID"""
+        # crc32 is stable across processes, unlike the builtin str hash
+        return zlib.crc32(conversation.encode()) % self.num_lanes
+
+    def submit(self, conversation: str, fn: Callable, *args, **kwargs) -> int:
+        """Queue work for a conversation and return the lane it was assigned to"""
+        if not self.running:
+            raise RuntimeError(f"Executor {self.name} is not running")
+
+        lane_index = self.lane_for(conversation)
+        self.lanes[lane_index].put((fn, args, kwargs))
+        return lane_index
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Block until every lane queue is empty and its work finished"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        for lane in self.lanes:
+            with lane.all_tasks_done:
+                while lane.unfinished_tasks:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    lane.all_tasks_done.wait(remaining)
+
+        return True
+
+    def _lane_worker(self, lane_index: int):
+        """Run queued work for one lane in FIFO order"""
+        lane = self.lanes[lane_index]
+
+        while True:
+            item = lane.get()
+            try:
+                if item is _STOP:
+                    return
+
+                fn, args, kwargs = item
+                try:
+                    fn(*args, **kwargs)
+                    self.completed_per_lane[lane_index] += 1
+                except Exception as e:
+                    self.errors_per_lane[lane_index] += 1
+                    print(f"Error in {self.name} lane {lane_index}: {e}")
+            finally:
+                lane.task_done()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and throughput per lane"""
+        return {
+            'lanes': self.num_lanes,
+            'running': self.running,
+            'queued': [lane.qsize() for lane in self.lanes],
+            'completed': list(self.completed_per_lane),
+            'errors': list(self.errors_per_lane)
+        }
+
+
+def demonstrate_ordered_executor():
+    """Show ordering within conversations and parallelism across them"""
+
+    print("CONVERSATION-ORDERED EXECUTOR")
+    print("=" * 35)
+
+    executor = ConversationOrderedExecutor(num_lanes=4)
+    executor.start()
+
+    observed: Dict[str, List[int]] = {}
+    observed_lock = threading.Lock()
+
+    def handle(conversation: str, sequence: int):
+        time.sleep(0.01)  # Simulated handler work
+        with observed_lock:
+            observed.setdefault(conversation, []).append(sequence)
+
+    conversations = [conversation_id(f"agent{i}", "coordinator") for i in range(1, 9)]
+
+    start = time.time()
+    for sequence in range(10):
+        for conversation in conversations:
+            executor.submit(conversation, handle, conversation, sequence)
+
+    executor.drain()
+    elapsed = time.time() - start
+    executor.stop()
+
+    print(f"Processed {len(conversations) * 10} messages in {elapsed:.2f}s "
+          f"(serial would take ~{len(conversations) * 10 * 0.01:.2f}s)")
+
+    for conversation in conversations:
+        in_order = observed[conversation] == sorted(observed[conversation])
+        print(f"  {conversation}: lane {executor.lane_for(conversation)}, "
+              f"{'in order' if in_order else 'OUT OF ORDER'}")
+
+    print(f"\nLane stats: {executor.get_stats()}")
+
+
+if __name__ == "__main__":
+    demonstrate_ordered_executor()
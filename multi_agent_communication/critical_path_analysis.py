@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Critical Path Analysis for Blocking Dependencies
+Tarjan SCC condensation to find dependency cycles, then a topological
+dynamic-programming pass for longest weighted chains, per-agent slack and
+the critical path, all in O(n + m)
+"""
+
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+try:
+    from scipy.sparse import issparse
+except ImportError:  # Dense weight matrices work without scipy
+    def issparse(matrix) -> bool:
+        return False
+
+# Slack at or below this counts as zero (floating point sums along chains)
+SLACK_TOLERANCE = 1e-9
+
+def weighted_csr(weights) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(indptr, indices, data) of the positive entries of a dense or sparse matrix"""
+    if issparse(weights):
+        csr = weights.tocsr()
+        csr.sort_indices()
+        coo = csr.tocoo()
+        keep = coo.data > 0
+        rows, cols, values = coo.row[keep], coo.col[keep], coo.data[keep]
+        n = csr.shape[0]
+    else:
+        weights = np.asarray(weights)
+        rows, cols = np.nonzero(weights > 0)
+        values = weights[rows, cols]
+        n = weights.shape[0]
+
+    indptr = np.zeros(n + 1, dtype=np.intp)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, cols.astype(np.intp), values.astype(float)
+
+def strongly_connected_components(indptr: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """Tarjan's algorithm, iterative so deep chains cannot hit the recursion limit
+
+    Returns each node's component number. Components are numbered in the
+    order Tarjan completes them: a component only completes after every
+    component it has an edge to, so edge targets always have lower numbers.
+    """
+    n = indptr.size - 1
+    starts, targets = indptr.tolist(), indices.tolist()
+
+    order = [-1] * n         # DFS discovery index
+    low = [0] * n
+    component = [-1] * n
+    on_stack = [False] * n
+    stack = []
+    counter = 0
+    n_components = 0
+
+    for root in range(n):
+        if order[root] != -1:
+            continue
+
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, starts[root])]    # (node, next edge position) call stack
+
+        while work:
+            node, position = work[-1]
+            end = starts[node + 1]
+
+            # Advance to the first unvisited target, folding in visited ones
+            while position < end:
+                target = targets[position]
+                position += 1
+                if order[target] == -1:
+                    break
+                if on_stack[target] and order[target] < low[node]:
+                    low[node] = order[target]
+            else:
+                target = -1
+
+            if target != -1:
+                work[-1] = (node, position)
+                order[target] = low[target] = counter
+                counter += 1
+                stack.append(target)
+                on_stack[target] = True
+                work.append((target, starts[target]))
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[node] < low[parent]:
+                    low[parent] = low[node]
+
+            if low[node] == order[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component[member] = n_components
+                    if member == node:
+                        break
+                n_components += 1
+
+    return np.asarray(component, dtype=np.intp)
+
+@dataclass
+class CriticalPathAnalysis:
+    """Longest-chain schedule over a dependency graph
+
+    Times follow the dependency direction: an agent starts once everything
+    it depends on has finished, plus the strength of that dependency. Agents
+    on a cycle are scheduled together as one unit whose duration is the
+    longest of theirs.
+    """
+    agents: List[str]
+    component: np.ndarray           # Component number per agent
+    cycles: List[List[str]]         # Components with more than one agent, or a self-dependency
+    earliest_start: np.ndarray
+    earliest_finish: np.ndarray
+    latest_start: np.ndarray
+    latest_finish: np.ndarray
+    slack: np.ndarray
+    critical_path: List[str]        # First prerequisite first
+    length: float
+
+    @property
+    def has_cycles(self) -> bool:
+        return bool(self.cycles)
+
+    @property
+    def critical_agents(self) -> List[str]:
+        """Every agent with zero slack, not only those on the reported path"""
+        return [self.agents[i] for i in np.flatnonzero(self.slack <= SLACK_TOLERANCE)]
+
+    def slack_of(self, agent: str) -> float:
+        return float(self.slack[self.agents.index(agent)])
+
+def analyze_critical_paths(weights, agents: List[str],
+                           durations: Optional[np.ndarray] = None) -> CriticalPathAnalysis:
+    """Cycles, longest weighted chains and slack for ``weights[i][j] > 0`` meaning i depends on j
+
+    ``durations`` gives each agent's own work time (default zero, so chain
+    length is the sum of dependency strengths). Parallel edges between two
+    cycles collapse to the strongest one.
+    """
+    n = len(agents)
+    durations = np.zeros(n) if durations is None else np.asarray(durations, dtype=float)
+    indptr, indices, data = weighted_csr(weights)
+    component = strongly_connected_components(indptr, indices)
+    n_components = int(component.max()) + 1 if n else 0
+
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    from_comp, to_comp = component[rows], component[indices]
+
+    # Cycles: multi-agent components plus agents that depend on themselves
+    sizes = np.bincount(component, minlength=n_components)
+    cyclic = sizes > 1
+    cyclic[from_comp[(from_comp == to_comp)]] = True
+    members = [[] for _ in range(n_components)]
+    for i, c in enumerate(component.tolist()):
+        members[c].append(i)
+    cycles = [[agents[i] for i in members[c]] for c in np.flatnonzero(cyclic)]
+
+    # Condensed DAG edges with the strongest weight per component pair
+    between = from_comp != to_comp
+    keys = from_comp[between] * n_components + to_comp[between]
+    edge_weights = data[between]
+    order = np.lexsort((-edge_weights, keys))
+    keys, edge_weights = keys[order], edge_weights[order]
+    first = np.ones(keys.size, dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    keys, edge_weights = keys[first], edge_weights[first]
+    dag_from, dag_to = keys // max(n_components, 1), keys % max(n_components, 1)
+
+    unit_duration = np.zeros(n_components)
+    np.maximum.at(unit_duration, component, durations)
+
+    # Forward pass in component-number order: every dependency is finished first
+    prereq_ptr = np.zeros(n_components + 1, dtype=np.intp)
+    np.cumsum(np.bincount(dag_from, minlength=n_components), out=prereq_ptr[1:])
+    ptr, prereq, prereq_weight = prereq_ptr.tolist(), dag_to.tolist(), edge_weights.tolist()
+    unit = unit_duration.tolist()
+
+    start = [0.0] * n_components
+    finish = [0.0] * n_components
+    via = [-1] * n_components          # Prerequisite that fixes the start time
+    for c in range(n_components):
+        for e in range(ptr[c], ptr[c + 1]):
+            candidate = finish[prereq[e]] + prereq_weight[e]
+            if candidate > start[c]:
+                start[c], via[c] = candidate, prereq[e]
+        finish[c] = start[c] + unit[c]
+
+    length = max(finish, default=0.0)
+
+    # Backward pass: the latest an agent may finish without delaying its dependents
+    latest_finish = [length] * n_components
+    for c in range(n_components - 1, -1, -1):
+        latest_start = latest_finish[c] - unit[c]
+        for e in range(ptr[c], ptr[c + 1]):
+            bound = latest_start - prereq_weight[e]
+            if bound < latest_finish[prereq[e]]:
+                latest_finish[prereq[e]] = bound
+
+    # Trace the chain back from the unit that finishes last
+    path = []
+    if n_components:
+        c = int(np.argmax(finish))
+        while c != -1:
+            path.append(c)
+            c = via[c]
+    critical_path = [agents[i] for c in reversed(path) for i in members[c]]
+
+    start_by_agent = np.asarray(start)[component]
+    finish_by_agent = np.asarray(finish)[component]
+    latest_by_agent = np.asarray(latest_finish)[component]
+    unit_by_agent = unit_duration[component]
+
+    return CriticalPathAnalysis(
+        agents=list(agents),
+        component=component,
+        cycles=cycles,
+        earliest_start=start_by_agent,
+        earliest_finish=finish_by_agent,
+        latest_start=latest_by_agent - unit_by_agent,
+        latest_finish=latest_by_agent,
+        slack=latest_by_agent - finish_by_agent,
+        critical_path=critical_path,
+        length=float(length),
+    )
@@ -14,6 +14,11 @@ import sys
 import os
 sys.path.append(os.path.dirname(__file__))
 
+from reachability_engine import transitive_closure
+from critical_path_analysis import analyze_critical_paths
+from failure_analysis import FailureAnalyzer
+from matrix_analysis import axis_totals, centrality_table, dependencies_above, scored, top_k
+
 class DependencyType(Enum):
     INFORMATIONAL = "informational"     # A needs to know what B is doing
     BLOCKING = "blocking"               # A cannot proceed without B
@@ -68,16 +73,28 @@ class DependencyMatrixSystem:
         self.type_matrices = {}               # Separate matrix per dependency type
         self.communication_matrix = None      # Final communication requirements
         
-        # Analysis results
-        self.centrality_scores = {}
-        self.communication_hubs = []
-        self.bottlenecks = []
+        # Analysis results (structured arrays, see matrix_analysis)
+        self.centrality = None                # CENTRALITY_DTYPE, one row per agent
+        self.communication_hubs = []          # SCORE_DTYPE, highest load first
+        self.bottlenecks = []                 # SCORE_DTYPE, score = agents dominated
+        self.critical_dependencies = []       # DEPENDENCY_DTYPE
+        self.critical_path_analysis = None    # CriticalPathAnalysis over blocking/sequential
+    
+    @property
+    def centrality_scores(self) -> Dict[str, Dict]:
+        """Per-agent centrality as dicts, built from the structured array"""
+        if self.centrality is None:
+            return {}
+        return {
+            row['agent']: {field: row[field] for field in ('in_degree', 'out_degree', 'total_degree', 'comm_load')}
+            for row in self.centrality
+        }
         
     def add_dependency(self, from_agent: str, to_agent: str, dep_type: DependencyType, 
                       strength: float = 1.0, bidirectional: bool = False):
         """Add a dependency between agents"""
         
-        if from_agent not in self.agents or to_agent not in self.agents:
+        if from_agent not in self.agent_to_index or to_agent not in self.agent_to_index:
             raise ValueError(f"Agents must be in system: {from_agent}, {to_agent}")
         
         dependency = Dependency(
@@ -252,18 +269,9 @@ class DependencyMatrixSystem:
         print(f"✓ Communication Matrix (combined)")
     
     def _build_reachability_matrix(self):
-        """Build transitive closure using Floyd-Warshall"""
+        """Build transitive closure (vectorized; engine chosen by size and density)"""
         
-        self.reachability_matrix = self.adjacency_matrix.copy().astype(bool)
-        
-        # Floyd-Warshall for transitive closure
-        for k in range(self.n_agents):
-            for i in range(self.n_agents):
-                for j in range(self.n_agents):
-                    self.reachability_matrix[i][j] = (
-                        self.reachability_matrix[i][j] or 
-                        (self.reachability_matrix[i][k] and self.reachability_matrix[k][j])
-                    )
+        self.reachability_matrix = transitive_closure(self.adjacency_matrix)
     
     def _build_communication_matrix(self):
         """Build final communication requirements matrix"""
@@ -310,112 +318,83 @@ class DependencyMatrixSystem:
     def _calculate_centrality(self):
         """Calculate centrality scores for each agent"""
         
-        self.centrality_scores = {}
-        
-        for i, agent in enumerate(self.agents):
-            # In-degree centrality (how many depend on this agent)
-            in_degree = np.sum(self.adjacency_matrix[:, i])
-            
-            # Out-degree centrality (how many this agent depends on)
-            out_degree = np.sum(self.adjacency_matrix[i, :])
-            
-            # Communication centrality (total communication load)
-            comm_in = np.sum(self.communication_matrix[:, i])
-            comm_out = np.sum(self.communication_matrix[i, :])
-            
-            self.centrality_scores[agent] = {
-                'in_degree': in_degree,
-                'out_degree': out_degree,
-                'total_degree': in_degree + out_degree,
-                'comm_load': comm_in + comm_out
-            }
+        # In/out degree and communication load from whole-matrix axis reductions
+        self.centrality = centrality_table(self.adjacency_matrix, self.communication_matrix, self.agents)
         
         print("Centrality Scores:")
-        for agent, scores in self.centrality_scores.items():
-            print(f"  {agent}: in={scores['in_degree']}, out={scores['out_degree']}, "
-                  f"comm={scores['comm_load']:.2f}")
+        for agent, in_degree, out_degree, _, comm_load in self.centrality:
+            print(f"  {agent}: in={in_degree}, out={out_degree}, comm={comm_load:.2f}")
     
     def _find_communication_hubs(self):
         """Identify agents with high communication requirements"""
         
-        comm_scores = {agent: scores['comm_load'] 
-                      for agent, scores in self.centrality_scores.items()}
+        comm_load = self.centrality['comm_load']
         
-        # Sort by communication load
-        sorted_agents = sorted(comm_scores.items(), key=lambda x: x[1], reverse=True)
-        
-        # Top 30% are hubs
-        hub_count = max(1, len(sorted_agents) // 3)
-        self.communication_hubs = sorted_agents[:hub_count]
+        # Top 30% are hubs; argpartition avoids sorting every agent
+        hub_count = max(1, self.n_agents // 3)
+        self.communication_hubs = scored(self.agents, comm_load, top_k(comm_load, hub_count))
         
         print(f"\nCommunication Hubs (top {hub_count}):")
         for agent, score in self.communication_hubs:
             print(f"  {agent}: {score:.2f}")
     
     def _identify_bottlenecks(self):
-        """Identify potential bottlenecks"""
-        
-        # Agents with high in-degree (many depend on them)
-        in_degrees = {agent: scores['in_degree'] 
-                     for agent, scores in self.centrality_scores.items()}
-        
-        mean_in_degree = np.mean(list(in_degrees.values()))
-        std_in_degree = np.std(list(in_degrees.values()))
-        threshold = mean_in_degree + std_in_degree
+        """Identify agents that are single points of failure"""
         
-        self.bottlenecks = [(agent, degree) for agent, degree in in_degrees.items() 
-                           if degree > threshold]
+        # Every dependency chain to the agents they dominate runs through them
+        failures = FailureAnalyzer(self.adjacency_matrix, self.agents)
+        self.bottlenecks = failures.bottlenecks()
         
-        print(f"\nBottlenecks (in-degree > {threshold:.1f}):")
-        for agent, degree in self.bottlenecks:
-            print(f"  {agent}: {degree} dependencies")
+        print(f"\nBottlenecks (single points of failure):")
+        for agent, dominated in self.bottlenecks:
+            print(f"  {agent}: cuts off {int(dominated)} agents")
+        if failures.articulation_points:
+            print(f"  Articulation points: {', '.join(failures.articulation_points)}")
     
     def _analyze_critical_paths(self):
         """Analyze critical paths in the network"""
         
-        # Find longest paths using adjacency matrix
-        critical_deps = []
-        
-        # Look for chains of blocking dependencies
+        # High-strength blocking dependencies, found in one vectorized scan
         blocking_matrix = self.type_matrices[DependencyType.BLOCKING]
-        for i in range(self.n_agents):
-            for j in range(self.n_agents):
-                if blocking_matrix[i][j] > 0.7:  # High-strength blocking
-                    critical_deps.append((self.agents[i], self.agents[j], blocking_matrix[i][j]))
+        self.critical_dependencies = dependencies_above(blocking_matrix, self.agents, 0.7)
         
         print(f"\nCritical Dependencies (blocking > 0.7):")
-        for from_agent, to_agent, strength in critical_deps:
+        for from_agent, to_agent, strength in self.critical_dependencies:
             print(f"  {from_agent} blocks {to_agent} (strength: {strength:.2f})")
+        
+        # Longest chain of blocking/sequential dependencies, with cycles and slack
+        ordering = np.maximum(blocking_matrix, self.type_matrices[DependencyType.SEQUENTIAL])
+        analysis = analyze_critical_paths(ordering, self.agents)
+        self.critical_path_analysis = analysis
+        
+        print(f"\nCritical Path (length {analysis.length:.2f}):")
+        print(f"  {' → '.join(analysis.critical_path) or 'none'}")
+        for cycle in analysis.cycles:
+            print(f"  ⚠ Dependency cycle: {' ↔ '.join(cycle)}")
+        for agent, slack in zip(self.agents, analysis.slack):
+            if slack > 0:
+                print(f"  {agent}: slack {slack:.2f}")
     
     def generate_polling_recommendations(self, base_interval: float = 5.0) -> Dict[str, Dict]:
         """Generate polling recommendations based on communication matrix"""
         
-        recommendations = {}
+        # Calculate communication intensity for every agent at once
+        intensities = (axis_totals(self.communication_matrix, 1) +
+                       axis_totals(self.communication_matrix, 0))
         
-        for i, agent in enumerate(self.agents):
-            # Calculate communication intensity
-            comm_intensity = (np.sum(self.communication_matrix[i, :]) + 
-                            np.sum(self.communication_matrix[:, i]))
-            
-            # Adjust polling based on intensity
-            if comm_intensity > 1.5:
-                factor = 0.3  # Very fast
-                reason = "High communication hub"
-            elif comm_intensity > 1.0:
-                factor = 0.5  # Fast
-                reason = "Moderate communication load"
-            elif comm_intensity > 0.5:
-                factor = 0.7  # Slightly faster
-                reason = "Some communication needs"
-            else:
-                factor = 1.0  # Normal
-                reason = "Low communication needs"
-            
+        # Adjust polling based on intensity
+        levels = [intensities > 1.5, intensities > 1.0, intensities > 0.5]
+        factors = np.select(levels, [0.3, 0.5, 0.7], default=1.0)   # Very fast, fast, slightly faster, normal
+        reasons = np.select(levels, ["High communication hub", "Moderate communication load",
+                                     "Some communication needs"], default="Low communication needs")
+        
+        recommendations = {}
+        for agent, intensity, factor, reason in zip(self.agents, intensities, factors, reasons):
             recommendations[agent] = {
                 'normal_interval': base_interval * factor,
                 'urgent_interval': base_interval * factor * 0.2,
-                'communication_intensity': comm_intensity,
-                'reasoning': reason
+                'communication_intensity': intensity,
+                'reasoning': str(reason)
             }
         
         return recommendations
@@ -4,13 +4,27 @@ Dependency Matrix System for Agent Communication
 Works with Prolog-style rules to model complex communication dependencies
 """
 
+import warnings
 import numpy as np
-import networkx as nx
 from typing import Dict, List, Set, Tuple, Any, Optional
 from dataclasses import dataclass
 from enum import Enum
-import matplotlib.pyplot as plt
 from rule_based_agent_config import RuleBasedConfigSystem, AgentFact, ProjectFact
+from matrix_cache import MatrixCache
+from reachability_engine import ReachabilityIndex, transitive_closure
+from graph_metrics import compute_graph_metrics
+from critical_path_analysis import CriticalPathAnalysis, analyze_critical_paths
+from agent_partitioner import AgentPartition, partition_agents
+from failure_analysis import FailureAnalyzer
+from matrix_analysis import axis_totals, dependencies_above, scored, top_k
+
+try:
+    import scipy.sparse as sp
+except ImportError:  # Sparse backend is optional; dense matrices are used without it
+    sp = None
+
+# Bump whenever a dependency generation rule changes, so cached matrices are rebuilt
+DEPENDENCY_RULES_VERSION = 1
 
 class DependencyType(Enum):
     INFORMATIONAL = "informational"     # A needs to know what B is doing
@@ -31,17 +45,162 @@ class Dependency:
     bidirectional: bool = False
     condition: str = None  # When this dependency applies
 
+def _max_per_key(keys: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Unique keys with the largest value for each"""
+    order = np.lexsort((values, keys))
+    is_last = np.ones(keys.size, dtype=bool)
+    is_last[:-1] = keys[order][1:] != keys[order][:-1]
+    chosen = order[is_last]
+    return keys[chosen], values[chosen]
+
+class DependencyEdgeStore:
+    """Keyed edge store: (from_idx, to_idx, type) → strength with merge-on-insert
+    
+    Edges live in one dict per dependency type keyed by from_idx * n + to_idx,
+    so membership and insertion are O(1). Inserting an existing edge keeps
+    the larger strength; the bidirectional flag and condition of the first
+    insertion are kept.
+    """
+    
+    def __init__(self, n_agents: int):
+        self.n_agents = n_agents
+        self._edges: Dict[DependencyType, Dict[int, float]] = {dep_type: {} for dep_type in DependencyType}
+        self.details: Dict[Tuple[DependencyType, int], Tuple[bool, Optional[str]]] = {}
+        self._pending: Optional[Dict[DependencyType, Tuple[np.ndarray, np.ndarray]]] = None
+    
+    @classmethod
+    def from_arrays(cls, n_agents: int, arrays: Dict[DependencyType, Tuple[np.ndarray, np.ndarray]],
+                    details: Optional[Dict[Tuple[DependencyType, int], Tuple[bool, Optional[str]]]] = None
+                    ) -> 'DependencyEdgeStore':
+        """Store backed by (keys, strengths) arrays; the dicts are only built on first use"""
+        store = cls(n_agents)
+        store._pending = arrays
+        store.details = dict(details or {})
+        return store
+    
+    @property
+    def edges(self) -> Dict[DependencyType, Dict[int, float]]:
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            for dep_type, (keys, strengths) in pending.items():
+                self._edges[dep_type] = dict(zip(np.asarray(keys).tolist(), np.asarray(strengths).tolist()))
+        return self._edges
+    
+    def key(self, from_idx: int, to_idx: int) -> int:
+        return from_idx * self.n_agents + to_idx
+    
+    def __len__(self) -> int:
+        if self._pending is not None:
+            return sum(len(keys) for keys, _ in self._pending.values())
+        return sum(len(edges) for edges in self.edges.values())
+    
+    def __contains__(self, edge: Tuple[int, int, DependencyType]) -> bool:
+        from_idx, to_idx, dep_type = edge
+        return self.key(from_idx, to_idx) in self.edges[dep_type]
+    
+    def add(self, from_idx: int, to_idx: int, dep_type: DependencyType, strength: float,
+            bidirectional: bool = False, condition: Optional[str] = None) -> bool:
+        """Insert or merge one edge; returns True when the stored strength changed"""
+        key = self.key(from_idx, to_idx)
+        edges = self.edges[dep_type]
+        
+        if key in edges:
+            if strength <= edges[key]:
+                return False
+        elif bidirectional or condition is not None:
+            self.details[(dep_type, key)] = (bidirectional, condition)
+        
+        edges[key] = strength
+        return True
+    
+    def add_many(self, rows: np.ndarray, cols: np.ndarray, dep_type: DependencyType,
+                 strengths: np.ndarray) -> np.ndarray:
+        """Insert or merge a batch of edges of one type; returns the keys whose strength changed"""
+        if rows.size == 0:
+            return np.empty(0, dtype=np.int64)
+        
+        keys, strengths = _max_per_key(rows.astype(np.int64) * self.n_agents + cols, strengths)
+        edges = self.edges[dep_type]
+        current = np.fromiter((edges.get(key, -np.inf) for key in keys.tolist()), float, keys.size)
+        
+        changed = strengths > current
+        edges.update(zip(keys[changed].tolist(), strengths[changed].tolist()))
+        return keys[changed]
+    
+    def remove(self, from_idx: int, to_idx: int, dep_type: Optional[DependencyType] = None) -> int:
+        """Delete the edge of one type, or of every type; returns how many were removed"""
+        key = self.key(from_idx, to_idx)
+        removed = 0
+        for edge_type in ([dep_type] if dep_type else DependencyType):
+            if self.edges[edge_type].pop(key, None) is not None:
+                self.details.pop((edge_type, key), None)
+                removed += 1
+        return removed
+    
+    def pair(self, from_idx: int, to_idx: int) -> Dict[DependencyType, float]:
+        """Strength of every dependency type between two agents"""
+        key = self.key(from_idx, to_idx)
+        return {dep_type: edges[key] for dep_type, edges in self.edges.items() if key in edges}
+    
+    def arrays(self, dep_type: DependencyType) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(from_idx, to_idx, strength) arrays for one type"""
+        keys, strengths = self.key_arrays(dep_type)
+        return keys // self.n_agents, keys % self.n_agents, strengths
+    
+    def key_arrays(self, dep_type: DependencyType) -> Tuple[np.ndarray, np.ndarray]:
+        """(key, strength) arrays for one type, without building dicts for a lazy store"""
+        if self._pending is not None:
+            keys, strengths = self._pending[dep_type]
+            return np.asarray(keys, dtype=np.int64), np.asarray(strengths, dtype=float)
+        edges = self.edges[dep_type]
+        return np.fromiter(edges.keys(), np.int64, len(edges)), np.fromiter(edges.values(), float, len(edges))
+    
+    def dependency(self, agents: List[str], key: int, dep_type: DependencyType) -> 'Dependency':
+        bidirectional, condition = self.details.get((dep_type, key), (False, None))
+        return Dependency(
+            from_agent=agents[key // self.n_agents],
+            to_agent=agents[key % self.n_agents],
+            dependency_type=dep_type,
+            strength=self.edges[dep_type][key],
+            bidirectional=bidirectional,
+            condition=condition
+        )
+
+# Weight of each dependency type in the communication requirements matrix
+COMMUNICATION_TYPE_WEIGHTS = {
+    DependencyType.BLOCKING: 1.0,        # Highest priority
+    DependencyType.SUPERVISORY: 0.9,     # Management needs
+    DependencyType.COLLABORATIVE: 0.8,   # Team coordination
+    DependencyType.SEQUENTIAL: 0.7,      # Workflow dependencies
+    DependencyType.INFORMATIONAL: 0.6,   # Awareness needs
+    DependencyType.SUPPORTIVE: 0.5,      # Help relationships
+    DependencyType.PARALLEL: 0.3         # Independent work
+}
+
+# backend="auto" switches to sparse matrices for large, sparse dependency graphs
+SPARSE_MIN_AGENTS = 500
+SPARSE_MAX_DENSITY = 0.01
+
+def _is_sparse(matrix) -> bool:
+    return sp is not None and sp.issparse(matrix)
+
 class DependencyMatrixSystem:
     """System for managing communication dependencies with multiple matrix representations"""
     
-    def __init__(self, rule_system: RuleBasedConfigSystem):
+    def __init__(self, rule_system: RuleBasedConfigSystem, dynamic: bool = False,
+                 backend: str = "auto"):
+        if backend not in ("auto", "dense", "sparse"):
+            raise ValueError(f"Unknown matrix backend: {backend}")
+        if backend == "sparse" and sp is None:
+            raise ImportError("The sparse matrix backend requires scipy")
+        
         self.rule_system = rule_system
         self.agents = [agent.agent_id for agent in rule_system.agents]
         self.n_agents = len(self.agents)
         self.agent_to_index = {agent: i for i, agent in enumerate(self.agents)}
         
-        # Dependency storage
-        self.dependencies: List[Dependency] = []
+        # Dependency storage, keyed by (from, to, type)
+        self.edge_store = DependencyEdgeStore(self.n_agents)
         
         # Matrix representations
         self.adjacency_matrix = None          # Direct dependencies
@@ -50,37 +209,224 @@ class DependencyMatrixSystem:
         self.type_matrices = {}               # Separate matrix per dependency type
         self.communication_matrix = None      # Final communication requirements
         
+        # "dense" keeps NumPy arrays; "sparse" keeps scipy CSR matrices, except
+        # reachability, which is a dense boolean array in both backends
+        self.backend = backend
+        self.active_backend = None            # Backend used by the last build_matrices()
+        
         # Graph representation
         self.dependency_graph = None
         
+        # Dynamic mode: once matrices are built, add/remove_dependency update them in place
+        self.dynamic = dynamic
+        self.reachability_index: Optional[ReachabilityIndex] = None
+        self._raw_communication = None       # Communication matrix before normalization
+        self._communication_scale = 0.0      # Its current maximum
+        
+    @property
+    def dependencies(self) -> List[Dependency]:
+        """Every stored dependency, one per (from, to, type)"""
+        return [self.edge_store.dependency(self.agents, key, dep_type)
+                for dep_type, edges in self.edge_store.edges.items() for key in edges]
+    
+    @dependencies.setter
+    def dependencies(self, dependencies: List[Dependency]):
+        self.edge_store = DependencyEdgeStore(self.n_agents)
+        for dep in dependencies:
+            self.edge_store.add(self.agent_to_index[dep.from_agent], self.agent_to_index[dep.to_agent],
+                                dep.dependency_type, dep.strength, dep.bidirectional, dep.condition)
+    
+    def has_dependency(self, from_agent: str, to_agent: str,
+                       dep_type: Optional[DependencyType] = None) -> bool:
+        """O(1) check for a dependency of one type, or of any type"""
+        from_idx, to_idx = self.agent_to_index[from_agent], self.agent_to_index[to_agent]
+        if dep_type is not None:
+            return (from_idx, to_idx, dep_type) in self.edge_store
+        return bool(self.edge_store.pair(from_idx, to_idx))
+    
     def add_dependency(self, from_agent: str, to_agent: str, dep_type: DependencyType, 
                       strength: float = 1.0, bidirectional: bool = False, condition: str = None):
-        """Add a dependency between agents"""
+        """Add a dependency between agents; repeated edges keep the highest strength"""
         
-        if from_agent not in self.agents or to_agent not in self.agents:
+        if from_agent not in self.agent_to_index or to_agent not in self.agent_to_index:
             raise ValueError(f"Agents must be in system: {from_agent}, {to_agent}")
         
-        dependency = Dependency(
-            from_agent=from_agent,
-            to_agent=to_agent,
-            dependency_type=dep_type,
-            strength=strength,
-            bidirectional=bidirectional,
-            condition=condition
-        )
+        from_idx = self.agent_to_index[from_agent]
+        to_idx = self.agent_to_index[to_agent]
+        changed = []
+        
+        if self.edge_store.add(from_idx, to_idx, dep_type, strength, bidirectional, condition):
+            changed.append((from_idx, to_idx))
         
-        self.dependencies.append(dependency)
+        # Reverse edge is stored as a plain dependency to avoid infinite recursion
+        if bidirectional and self.edge_store.add(to_idx, from_idx, dep_type, strength, False, condition):
+            changed.append((to_idx, from_idx))
+        
+        if self._is_dynamic():
+            for i, j in changed:
+                self._apply_edge(i, j, dep_type)
+    
+    def add_dependencies(self, from_agents, to_agents, dep_type, strengths=1.0,
+                         bidirectional: bool = False) -> int:
+        """Bulk insert from parallel edge arrays; returns how many new edges were stored
+        
+        ``from_agents``/``to_agents`` hold agent IDs or agent indices,
+        ``dep_type`` is one DependencyType or one per edge, and ``strengths``
+        a scalar or one value per edge. Duplicates are merged with max.
+        """
+        
+        rows = self._agent_indices(from_agents)
+        cols = self._agent_indices(to_agents)
+        if rows.shape != cols.shape:
+            raise ValueError("from_agents and to_agents must have the same length")
+        
+        strengths = np.broadcast_to(np.asarray(strengths, dtype=float), rows.shape)
+        if isinstance(dep_type, DependencyType):
+            types = np.full(rows.shape, dep_type.value, dtype=object)
+        else:
+            types = np.array([t.value for t in dep_type], dtype=object)
         
         if bidirectional:
-            reverse_dep = Dependency(
-                from_agent=to_agent,
-                to_agent=from_agent,
-                dependency_type=dep_type,
-                strength=strength,
-                bidirectional=False,  # Avoid infinite recursion
-                condition=condition
-            )
-            self.dependencies.append(reverse_dep)
+            rows, cols = np.concatenate([rows, cols]), np.concatenate([cols, rows])
+            strengths = np.concatenate([strengths, strengths])
+            types = np.concatenate([types, types])
+        
+        size_before = len(self.edge_store)
+        for edge_type in DependencyType:
+            mask = types == edge_type.value
+            if not mask.any():
+                continue
+            changed = self.edge_store.add_many(rows[mask], cols[mask], edge_type, strengths[mask])
+            if self._is_dynamic():
+                for key in changed.tolist():
+                    self._apply_edge(key // self.n_agents, key % self.n_agents, edge_type)
+        
+        return len(self.edge_store) - size_before
+    
+    def _agent_indices(self, agents) -> np.ndarray:
+        """Agent IDs or indices as an index array"""
+        values = np.asarray(agents)
+        if values.dtype.kind in "iu":
+            if values.size and (values.min() < 0 or values.max() >= self.n_agents):
+                raise ValueError("Agent index out of range")
+            return values.astype(np.intp)
+        
+        try:
+            return np.fromiter((self.agent_to_index[a] for a in values.tolist()), np.intp, values.size)
+        except KeyError as e:
+            raise ValueError(f"Agents must be in system: {e.args[0]}") from None
+    
+    def remove_dependency(self, from_agent: str, to_agent: str,
+                          dep_type: Optional[DependencyType] = None) -> int:
+        """Remove dependencies from_agent → to_agent (of one type, or all); returns how many"""
+        
+        from_idx, to_idx = self.agent_to_index[from_agent], self.agent_to_index[to_agent]
+        removed = self.edge_store.remove(from_idx, to_idx, dep_type)
+        
+        if removed and self._is_dynamic():
+            self._refresh_pair(from_idx, to_idx)
+        
+        return removed
+    
+    def enable_dynamic_mode(self):
+        """Keep matrices current on every add/remove_dependency instead of rebuilding"""
+        
+        self.dynamic = True
+        if self.adjacency_matrix is None:
+            self.build_matrices()
+        else:
+            self._build_reachability_matrix()
+    
+    def _is_dynamic(self) -> bool:
+        return self.dynamic and self.reachability_index is not None
+    
+    def _apply_edge(self, from_idx: int, to_idx: int, dep_type: DependencyType):
+        """Fold one new or strengthened edge into the built matrices"""
+        
+        strength = self.edge_store.edges[dep_type][self.edge_store.key(from_idx, to_idx)]
+        
+        self._set_cell(self.adjacency_matrix, from_idx, to_idx, 1)
+        self._set_cell(self.strength_matrix, from_idx, to_idx,
+                       max(self.strength_matrix[from_idx, to_idx], strength))
+        self._set_cell(self.type_matrices[dep_type], from_idx, to_idx, strength)
+        self._update_communication_cell(from_idx, to_idx)
+        
+        self._sync_reachability_rows(self.reachability_index.add_edge(from_idx, to_idx))
+        self._sync_graph_edge(from_idx, to_idx)
+    
+    def _refresh_pair(self, from_idx: int, to_idx: int):
+        """Recompute every matrix cell for one agent pair from the remaining dependencies"""
+        
+        remaining = self.edge_store.pair(from_idx, to_idx)
+        
+        self._set_cell(self.strength_matrix, from_idx, to_idx, max(remaining.values(), default=0.0))
+        for dep_type in DependencyType:
+            self._set_cell(self.type_matrices[dep_type], from_idx, to_idx, remaining.get(dep_type, 0.0))
+        self._update_communication_cell(from_idx, to_idx)
+        
+        if not remaining:
+            self._set_cell(self.adjacency_matrix, from_idx, to_idx, 0)
+            self._sync_reachability_rows(self.reachability_index.remove_edge(from_idx, to_idx))
+        self._sync_graph_edge(from_idx, to_idx)
+    
+    def _sync_graph_edge(self, from_idx: int, to_idx: int):
+        """Mirror one agent pair into the networkx graph, if one was built"""
+        
+        if self.dependency_graph is None:
+            return
+        
+        from_agent, to_agent = self.agents[from_idx], self.agents[to_idx]
+        remaining = self.edge_store.pair(from_idx, to_idx)
+        if not remaining:
+            if self.dependency_graph.has_edge(from_agent, to_agent):
+                self.dependency_graph.remove_edge(from_agent, to_agent)
+            return
+        
+        # Like build_dependency_graph, the last stored type supplies the attributes
+        dep = self.edge_store.dependency(self.agents, self.edge_store.key(from_idx, to_idx), list(remaining)[-1])
+        self.dependency_graph.add_edge(
+            from_agent, to_agent,
+            dependency_type=dep.dependency_type.value,
+            strength=dep.strength,
+            bidirectional=dep.bidirectional
+        )
+    
+    def _set_cell(self, matrix, i: int, j: int, value: float):
+        """Write one matrix cell in either backend"""
+        
+        if not _is_sparse(matrix):
+            matrix[i, j] = value
+            return
+        
+        if value == 0 and matrix[i, j] == 0:
+            return
+        with warnings.catch_warnings():
+            # Inserting into CSR is O(nnz), still far cheaper than a full rebuild
+            warnings.simplefilter("ignore", sp.SparseEfficiencyWarning)
+            matrix[i, j] = value
+        if value == 0:
+            matrix.eliminate_zeros()
+    
+    def _sync_reachability_rows(self, rows: np.ndarray):
+        """Copy changed closure rows from the reachability index"""
+        
+        if len(rows):
+            self.reachability_matrix[rows] = self.reachability_index.rows(rows)
+    
+    def _update_communication_cell(self, from_idx: int, to_idx: int):
+        """Update one communication cell, rescaling only when the maximum changes"""
+        
+        old_value = self._raw_communication[from_idx, to_idx]
+        new_value = sum(self.type_matrices[dep_type][from_idx, to_idx] * weight
+                        for dep_type, weight in COMMUNICATION_TYPE_WEIGHTS.items())
+        self._set_cell(self._raw_communication, from_idx, to_idx, new_value)
+        
+        if new_value > self._communication_scale or (
+                old_value == self._communication_scale and new_value < old_value):
+            self._communication_scale = self._raw_communication.max()
+            self._normalize_communication_matrix()
+        elif self._communication_scale > 0:
+            self._set_cell(self.communication_matrix, from_idx, to_idx, new_value / self._communication_scale)
     
     def generate_dependencies_from_rules(self):
         """Generate dependencies based on project context and agent roles"""
@@ -256,35 +602,99 @@ class DependencyMatrixSystem:
             # Apply hierarchical dependencies (already done in hierarchy section)
             print("  ✓ Hierarchical dependencies applied via hierarchy rules")
     
+    def cache_key(self) -> str:
+        """Fingerprint of agent facts, project context, rule versions and backend"""
+        return self.rule_system.fingerprint(
+            versions={'dependency_rules': DEPENDENCY_RULES_VERSION},
+            extra={'backend': self.backend}
+        )
+    
+    def load_or_build(self, cache: MatrixCache) -> bool:
+        """Memory-map matrices from the cache, or generate, build and store them
+        
+        Covers rule-generated dependencies only: call it before adding
+        dependencies by hand. Returns True on a cache hit.
+        """
+        
+        key = self.cache_key()
+        entry = cache.load(key)
+        if entry is not None:
+            self._restore_from_cache(*entry)
+            print(f"✓ Loaded dependency matrices from cache ({key[:12]}, {self.active_backend})")
+            return True
+        
+        self.generate_dependencies_from_rules()
+        self.build_matrices()
+        self.save_to_cache(cache, key)
+        return False
+    
+    def save_to_cache(self, cache: MatrixCache, key: Optional[str] = None):
+        """Persist built matrices, the edge store and the derived config"""
+        
+        if self.adjacency_matrix is None:
+            self.build_matrices()
+        
+        arrays = {
+            'adjacency': self.adjacency_matrix,
+            'strength': self.strength_matrix,
+            'reachability': self.reachability_matrix,
+            'communication': self.communication_matrix,
+            'raw_communication': self._raw_communication,
+        }
+        for dep_type in DependencyType:
+            keys, strengths = self.edge_store.key_arrays(dep_type)
+            arrays[f'type.{dep_type.value}'] = self.type_matrices[dep_type]
+            arrays[f'edges.{dep_type.value}.keys'] = keys
+            arrays[f'edges.{dep_type.value}.strengths'] = strengths
+        
+        metadata = {
+            'backend': self.active_backend,
+            'communication_scale': float(self._communication_scale),
+            'details': [[dep_type.value, key, bidirectional, condition]
+                        for (dep_type, key), (bidirectional, condition) in self.edge_store.details.items()]
+        }
+        cache.save(key or self.cache_key(), self.rule_system.derived_config, arrays, metadata)
+    
+    def _restore_from_cache(self, config: Dict[str, Any], arrays: Dict[str, Any], metadata: Dict[str, Any]):
+        """Adopt memory-mapped matrices from a cache entry"""
+        
+        self.active_backend = metadata['backend']
+        self.adjacency_matrix = arrays['adjacency']
+        self.strength_matrix = arrays['strength']
+        self.reachability_matrix = arrays['reachability']
+        self.communication_matrix = arrays['communication']
+        self._raw_communication = arrays['raw_communication']
+        self._communication_scale = metadata['communication_scale']
+        self.type_matrices = {dep_type: arrays[f'type.{dep_type.value}'] for dep_type in DependencyType}
+        
+        self.edge_store = DependencyEdgeStore.from_arrays(
+            self.n_agents,
+            {dep_type: (arrays[f'edges.{dep_type.value}.keys'], arrays[f'edges.{dep_type.value}.strengths'])
+             for dep_type in DependencyType},
+            {(DependencyType(value), key): (bidirectional, condition)
+             for value, key, bidirectional, condition in metadata['details']}
+        )
+        
+        if not self.rule_system.derived_config:
+            self.rule_system.derived_config = config
+        
+        if self.dynamic:
+            adjacency = self.adjacency_matrix
+            if _is_sparse(adjacency):
+                adjacency = adjacency.toarray()
+            self.reachability_index = ReachabilityIndex.from_closure(adjacency, self.reachability_matrix)
+    
     def build_matrices(self):
         """Build all matrix representations"""
         
         print(f"\nBUILDING DEPENDENCY MATRICES")
         print("=" * 32)
         
-        # Initialize matrices
-        self.adjacency_matrix = np.zeros((self.n_agents, self.n_agents))
-        self.strength_matrix = np.zeros((self.n_agents, self.n_agents))
-        
-        # Initialize type-specific matrices
-        for dep_type in DependencyType:
-            self.type_matrices[dep_type] = np.zeros((self.n_agents, self.n_agents))
-        
-        # Populate matrices from dependencies
-        for dep in self.dependencies:
-            from_idx = self.agent_to_index[dep.from_agent]
-            to_idx = self.agent_to_index[dep.to_agent]
-            
-            # Adjacency matrix (binary)
-            self.adjacency_matrix[from_idx][to_idx] = 1
-            
-            # Strength matrix (weighted)
-            self.strength_matrix[from_idx][to_idx] = max(
-                self.strength_matrix[from_idx][to_idx], dep.strength
-            )
-            
-            # Type-specific matrix
-            self.type_matrices[dep.dependency_type][from_idx][to_idx] = dep.strength
+        self.active_backend = self._select_backend()
+        if self.active_backend == "sparse":
+            self._populate_sparse_matrices()
+        else:
+            self._populate_dense_matrices()
         
         # Build reachability matrix (transitive closure)
         self._build_reachability_matrix()
@@ -292,52 +702,114 @@ class DependencyMatrixSystem:
         # Build communication requirements matrix
         self._build_communication_matrix()
         
-        print(f"✓ Built adjacency matrix ({self.n_agents}×{self.n_agents})")
+        print(f"✓ Built adjacency matrix ({self.n_agents}×{self.n_agents}, {self.active_backend})")
         print(f"✓ Built reachability matrix (transitive closure)")
         print(f"✓ Built strength matrix (weighted dependencies)")
         print(f"✓ Built {len(DependencyType)} type-specific matrices")
         print(f"✓ Built communication requirements matrix")
     
+    def _select_backend(self) -> str:
+        """Resolve backend="auto" from agent count and dependency density"""
+        
+        if self.backend != "auto":
+            return self.backend
+        if sp is None or self.n_agents < SPARSE_MIN_AGENTS:
+            return "dense"
+        
+        density = len(self.edge_store) / float(self.n_agents * self.n_agents)
+        return "sparse" if density <= SPARSE_MAX_DENSITY else "dense"
+    
+    def _populate_dense_matrices(self):
+        """Fill dense matrices with one fancy-indexed write per dependency type"""
+        
+        self.adjacency_matrix = np.zeros((self.n_agents, self.n_agents))
+        self.strength_matrix = np.zeros((self.n_agents, self.n_agents))
+        
+        for dep_type in DependencyType:
+            rows, cols, strengths = self.edge_store.arrays(dep_type)
+            
+            # Type-specific matrix (edges are unique per type)
+            self.type_matrices[dep_type] = np.zeros((self.n_agents, self.n_agents))
+            self.type_matrices[dep_type][rows, cols] = strengths
+            
+            # Adjacency matrix (binary)
+            self.adjacency_matrix[rows, cols] = 1
+            
+            # Strength matrix (strongest type per pair)
+            self.strength_matrix[rows, cols] = np.maximum(self.strength_matrix[rows, cols], strengths)
+    
+    def _populate_sparse_matrices(self):
+        """Build CSR matrices from the edge store's arrays"""
+        
+        n = self.n_agents
+        
+        def csr(values, r, c):
+            matrix = sp.csr_matrix((values, (r, c)), shape=(n, n))
+            matrix.eliminate_zeros()
+            return matrix
+        
+        all_rows, all_cols, all_strengths = [], [], []
+        for dep_type in DependencyType:
+            rows, cols, strengths = self.edge_store.arrays(dep_type)
+            self.type_matrices[dep_type] = csr(strengths, rows, cols)
+            all_rows.append(rows)
+            all_cols.append(cols)
+            all_strengths.append(strengths)
+        
+        # Strength keeps the maximum over types per agent pair
+        keys, strengths = _max_per_key(np.concatenate(all_rows) * n + np.concatenate(all_cols),
+                                       np.concatenate(all_strengths))
+        rows, cols = keys // n, keys % n
+        
+        self.adjacency_matrix = csr(np.ones(keys.size), rows, cols)
+        self.strength_matrix = csr(strengths, rows, cols)
+    
     def _build_reachability_matrix(self):
         """Build transitive closure matrix (all possible paths)"""
         
-        # Use Floyd-Warshall algorithm for transitive closure
-        self.reachability_matrix = self.adjacency_matrix.copy()
-        
-        for k in range(self.n_agents):
-            for i in range(self.n_agents):
-                for j in range(self.n_agents):
-                    self.reachability_matrix[i][j] = (
-                        self.reachability_matrix[i][j] or 
-                        (self.reachability_matrix[i][k] and self.reachability_matrix[k][j])
-                    )
+        # Vectorized closure; engine chosen by graph size and density
+        if self.dynamic:
+            adjacency = self.adjacency_matrix
+            if _is_sparse(adjacency):
+                adjacency = adjacency.toarray()
+            self.reachability_index = ReachabilityIndex.from_adjacency(adjacency)
+            closure = self.reachability_index.as_matrix()
+        else:
+            closure = transitive_closure(self.adjacency_matrix)
+        
+        # Sparse backend keeps the closure as booleans: 1 byte per cell instead of 8
+        if self.active_backend == "sparse":
+            self.reachability_matrix = closure
+        else:
+            self.reachability_matrix = closure.astype(self.adjacency_matrix.dtype)
     
     def _build_communication_matrix(self):
         """Build final communication requirements matrix"""
         
         # Combine different dependency types with weights
-        type_weights = {
-            DependencyType.BLOCKING: 1.0,        # Highest priority
-            DependencyType.SUPERVISORY: 0.9,     # Management needs
-            DependencyType.COLLABORATIVE: 0.8,   # Team coordination
-            DependencyType.SEQUENTIAL: 0.7,      # Workflow dependencies
-            DependencyType.INFORMATIONAL: 0.6,   # Awareness needs
-            DependencyType.SUPPORTIVE: 0.5,      # Help relationships
-            DependencyType.PARALLEL: 0.3         # Independent work
-        }
+        if self.active_backend == "sparse":
+            self._raw_communication = sp.csr_matrix((self.n_agents, self.n_agents))
+        else:
+            self._raw_communication = np.zeros((self.n_agents, self.n_agents))
         
-        self.communication_matrix = np.zeros((self.n_agents, self.n_agents))
+        for dep_type, weight in COMMUNICATION_TYPE_WEIGHTS.items():
+            self._raw_communication += self.type_matrices[dep_type] * weight
         
-        for dep_type, weight in type_weights.items():
-            self.communication_matrix += self.type_matrices[dep_type] * weight
+        self._communication_scale = self._raw_communication.max()
+        self._normalize_communication_matrix()
+    
+    def _normalize_communication_matrix(self):
+        """Normalize to 0-1 range"""
         
-        # Normalize to 0-1 range
-        max_val = np.max(self.communication_matrix)
-        if max_val > 0:
-            self.communication_matrix /= max_val
+        if self._communication_scale > 0:
+            self.communication_matrix = self._raw_communication / self._communication_scale
+        else:
+            self.communication_matrix = self._raw_communication.copy()
     
-    def build_dependency_graph(self):
-        """Build NetworkX graph representation"""
+    def build_dependency_graph(self, betweenness_samples: Optional[int] = None):
+        """Build NetworkX graph representation (requires networkx)"""
+        
+        import networkx as nx  # Only needed for the graph object; metrics are computed natively
         
         print("\nBUILDING DEPENDENCY GRAPH")
         print("=" * 25)
@@ -361,34 +833,21 @@ class DependencyMatrixSystem:
         print(f"✓ Graph: {len(self.dependency_graph.nodes)} nodes, {len(self.dependency_graph.edges)} edges")
         
         # Calculate graph metrics
-        metrics = self._calculate_graph_metrics()
+        metrics = self.calculate_graph_metrics(betweenness_samples)
         return metrics
     
-    def _calculate_graph_metrics(self) -> Dict[str, Any]:
-        """Calculate important graph metrics"""
-        
-        metrics = {}
-        
-        # Basic metrics
-        metrics['nodes'] = len(self.dependency_graph.nodes)
-        metrics['edges'] = len(self.dependency_graph.edges)
-        metrics['density'] = nx.density(self.dependency_graph)
-        
-        # Centrality measures
-        metrics['in_degree_centrality'] = nx.in_degree_centrality(self.dependency_graph)
-        metrics['out_degree_centrality'] = nx.out_degree_centrality(self.dependency_graph)
-        metrics['betweenness_centrality'] = nx.betweenness_centrality(self.dependency_graph)
+    def calculate_graph_metrics(self, betweenness_samples: Optional[int] = None) -> Dict[str, Any]:
+        """Calculate important graph metrics directly from the adjacency matrix
         
-        # Most central agents
-        in_central = max(metrics['in_degree_centrality'], key=metrics['in_degree_centrality'].get)
-        out_central = max(metrics['out_degree_centrality'], key=metrics['out_degree_centrality'].get)
-        between_central = max(metrics['betweenness_centrality'], key=metrics['betweenness_centrality'].get)
+        Density, degree and betweenness centrality match networkx. Pass
+        ``betweenness_samples`` to estimate betweenness from that many random
+        source agents; the result then includes 'betweenness_error_bound'.
+        """
         
-        metrics['most_depended_on'] = in_central  # Highest in-degree
-        metrics['most_dependent'] = out_central   # Highest out-degree  
-        metrics['most_central'] = between_central # Highest betweenness
+        if self.adjacency_matrix is None:
+            self.build_matrices()
         
-        return metrics
+        return compute_graph_metrics(self.adjacency_matrix, self.agents, betweenness_samples)
     
     def analyze_communication_patterns(self) -> Dict[str, Any]:
         """Analyze communication patterns from matrices"""
@@ -397,49 +856,109 @@ class DependencyMatrixSystem:
         
         # Critical dependencies (blocking)
         blocking_matrix = self.type_matrices[DependencyType.BLOCKING]
-        critical_deps = []
-        for i in range(self.n_agents):
-            for j in range(self.n_agents):
-                if blocking_matrix[i][j] > 0.7:  # High strength blocking
-                    critical_deps.append((self.agents[i], self.agents[j], blocking_matrix[i][j]))
-        analysis['critical_dependencies'] = critical_deps
+        # Structured (from_agent, to_agent, strength) array of high strength blocking
+        analysis['critical_dependencies'] = dependencies_above(blocking_matrix, self.agents, 0.7)
+        
+        # Longest blocking/sequential chain and any dependency cycles
+        critical = self.analyze_critical_paths()
+        analysis['critical_path'] = critical.critical_path
+        analysis['critical_path_length'] = critical.length
+        analysis['dependency_cycles'] = critical.cycles
         
         # Communication hubs (high total communication requirements)
-        comm_totals = np.sum(self.communication_matrix, axis=1) + np.sum(self.communication_matrix, axis=0)
-        hub_idx = np.argmax(comm_totals)
-        analysis['communication_hub'] = self.agents[hub_idx]
-        analysis['hub_score'] = comm_totals[hub_idx]
+        comm_totals = axis_totals(self.communication_matrix, 1) + axis_totals(self.communication_matrix, 0)
+        hub_indices = top_k(comm_totals, max(1, self.n_agents // 3))   # Top 30%, highest first
+        analysis['communication_hubs'] = scored(self.agents, comm_totals, hub_indices)
+        analysis['communication_hub'] = self.agents[hub_indices[0]]
+        analysis['hub_score'] = comm_totals[hub_indices[0]]
         
         # Isolated agents (low communication requirements)
-        isolated_agents = []
-        for i, total in enumerate(comm_totals):
-            if total < 0.5:  # Low communication
-                isolated_agents.append(self.agents[i])
-        analysis['isolated_agents'] = isolated_agents
-        
-        # Bottlenecks (agents many others depend on)
-        in_degrees = np.sum(self.adjacency_matrix, axis=0)
-        bottleneck_threshold = np.mean(in_degrees) + np.std(in_degrees)
-        bottlenecks = []
-        for i, in_degree in enumerate(in_degrees):
-            if in_degree > bottleneck_threshold:
-                bottlenecks.append((self.agents[i], int(in_degree)))
-        analysis['bottlenecks'] = bottlenecks
+        analysis['isolated_agents'] = [self.agents[i] for i in np.flatnonzero(comm_totals < 0.5)]
+        
+        # Bottlenecks: agents every dependency chain to someone else runs through,
+        # with how many agents each one cuts off
+        failures = self.failure_analysis()
+        analysis['bottlenecks'] = [(agent, int(count)) for agent, count in failures.bottlenecks()]
+        analysis['articulation_points'] = failures.articulation_points
+        analysis['bridges'] = failures.bridges
         
         return analysis
     
+    def failure_analysis(self) -> FailureAnalyzer:
+        """Articulation points, bridges, dominators and removal what-ifs for the current graph
+        
+        Reuses the reachability closure already built (the live index in
+        dynamic mode), so removal queries recompute only the rows that can
+        reach the removed agent or link.
+        """
+        
+        if self.adjacency_matrix is None:
+            self.build_matrices()
+        
+        index = self.reachability_index
+        if index is None:
+            adjacency = self.adjacency_matrix
+            if _is_sparse(adjacency):
+                adjacency = adjacency.toarray()
+            index = ReachabilityIndex.from_closure(adjacency, self.reachability_matrix)
+        
+        return FailureAnalyzer(self.adjacency_matrix, self.agents, index)
+    
+    def partition_agents(self, n_shards: int, imbalance: float = 0.1) -> AgentPartition:
+        """Assign agents to shards (e.g. processes) so most communication stays inside one
+        
+        Shards are balanced by communication load within ``imbalance``.
+        """
+        
+        if self.communication_matrix is None:
+            self.build_matrices()
+        
+        return partition_agents(self.communication_matrix, self.agents, n_shards, imbalance=imbalance)
+    
+    def analyze_critical_paths(self, durations: Optional[Dict[str, float]] = None,
+                               dependency_types=(DependencyType.BLOCKING, DependencyType.SEQUENTIAL)
+                               ) -> CriticalPathAnalysis:
+        """Cycles, longest chain and per-agent slack over the ordering dependencies
+        
+        Linear in agents plus dependencies, so it can be rerun after every
+        change in dynamic mode. ``durations`` maps agents to their own work
+        time; unlisted agents take zero.
+        """
+        
+        if self.adjacency_matrix is None:
+            self.build_matrices()
+        
+        weights = None
+        for dep_type in dependency_types:
+            matrix = self.type_matrices[dep_type]
+            if weights is None:
+                weights = matrix
+            elif _is_sparse(weights):
+                weights = weights.maximum(matrix)
+            else:
+                weights = np.maximum(weights, matrix)
+        
+        agent_durations = None
+        if durations:
+            agent_durations = np.array([durations.get(agent, 0.0) for agent in self.agents])
+        
+        return analyze_critical_paths(weights, self.agents, agent_durations)
+    
     def generate_polling_recommendations(self) -> Dict[str, float]:
         """Generate agent-specific polling recommendations based on dependencies"""
         
         recommendations = {}
         
+        # Base polling from rule system
+        base_normal = self.rule_system.derived_config.get('normal_poll_interval', 5.0)
+        base_urgent = self.rule_system.derived_config.get('urgent_poll_interval', 1.0)
+        
+        # Communication requirements per agent: outgoing plus incoming
+        comm_scores = axis_totals(self.communication_matrix, 1) + axis_totals(self.communication_matrix, 0)
+        
         for i, agent in enumerate(self.agents):
-            # Base polling from rule system
-            base_normal = self.rule_system.derived_config.get('normal_poll_interval', 5.0)
-            base_urgent = self.rule_system.derived_config.get('urgent_poll_interval', 1.0)
-            
             # Adjust based on communication requirements
-            comm_score = np.sum(self.communication_matrix[i]) + np.sum(self.communication_matrix[:, i])
+            comm_score = comm_scores[i]
             
             # Higher communication needs = faster polling
             if comm_score > 0.8:
@@ -466,6 +985,8 @@ class DependencyMatrixSystem:
         
         # Helper function to print matrix
         def print_matrix(matrix, title):
+            if _is_sparse(matrix):
+                matrix = matrix.toarray()
             print(f"\n{title}:")
             print("    ", end="")
             for agent in self.agents:
@@ -518,7 +1039,7 @@ def demonstrate_dependency_system():
     # Generate dependencies and build matrices
     dep_system.generate_dependencies_from_rules()
     dep_system.build_matrices()
-    graph_metrics = dep_system.build_dependency_graph()
+    graph_metrics = dep_system.calculate_graph_metrics()
     
     # Analyze patterns
     patterns = dep_system.analyze_communication_patterns()
@@ -541,7 +1062,19 @@ def demonstrate_dependency_system():
     print(f"Critical dependencies: {len(patterns['critical_dependencies'])}")
     for dep in patterns['critical_dependencies'][:3]:  # Show top 3
         print(f"  • {dep[0]} → {dep[1]} (strength: {dep[2]:.2f})")
+    print(f"Critical path: {' → '.join(patterns['critical_path'])} "
+          f"(length: {patterns['critical_path_length']:.2f})")
+    print(f"Dependency cycles: {patterns['dependency_cycles']}")
     print(f"Bottlenecks: {patterns['bottlenecks']}")
+    print(f"Articulation points: {patterns['articulation_points']}")
+    print(f"Bridges: {patterns['bridges']}")
+    
+    failures = dep_system.failure_analysis()
+    at_risk = [agent for agent, _ in patterns['bottlenecks'][:2]] + patterns['articulation_points']
+    for agent in dict.fromkeys(at_risk):
+        impact = failures.remove_agent(agent)
+        print(f"If {agent} fails: {len(impact.dependents)} dependents stranded, "
+              f"{impact.lost_pairs} other dependency paths lost")
     print(f"Isolated agents: {patterns['isolated_agents']}")
     
     print(f"\nPOLLING RECOMMENDATIONS")
@@ -560,7 +1093,7 @@ if __name__ == "__main__":
     print("✓ Strength Matrix - Weighted by dependency strength") 
     print("✓ Type-specific Matrices - Per dependency type")
     print("✓ Communication Matrix - Final requirements synthesis")
-    print("✓ NetworkX Graph - Advanced graph analysis")
+    print("✓ Graph Metrics - Native degree and betweenness centrality")
     print("✓ Centrality Analysis - Key agents identification")
     print("✓ Bottleneck Detection - Communication chokepoints")
     print("✓ Polling Optimization - Dependency-based frequencies")
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Failure Impact Analysis for Dependency Graphs
+Articulation points, bridges and dominator trees of the agent dependency
+graph, plus "what if this agent or link dies" queries answered from the
+cached transitive closure instead of a rebuild
+"""
+
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from graph_metrics import adjacency_to_csr
+from critical_path_analysis import strongly_connected_components
+from matrix_analysis import scored
+from reachability_engine import ReachabilityIndex, unpack_rows
+
+def undirected_csr(indptr: np.ndarray, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric pattern without self-loops or duplicate edges"""
+    n = indptr.size - 1
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    keep = rows != indices
+    rows, cols = rows[keep], indices[keep]
+
+    keys = np.unique(np.concatenate([rows * n + cols, cols * n + rows]))
+    rows, cols = keys // max(n, 1), keys % max(n, 1)
+    sym_indptr = np.zeros(n + 1, dtype=np.intp)
+    np.cumsum(np.bincount(rows, minlength=n), out=sym_indptr[1:])
+    return sym_indptr, cols.astype(np.intp)
+
+def articulation_points_and_bridges(indptr: np.ndarray,
+                                    indices: np.ndarray) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+    """Cut vertices and cut edges of an undirected graph (Hopcroft-Tarjan lowpoints)
+
+    Iterative DFS, O(n + m). ``indptr``/``indices`` must be symmetric, as
+    from ``undirected_csr``; bridges are returned as (smaller, larger) pairs.
+    """
+    n = indptr.size - 1
+    starts, neighbours = indptr.tolist(), indices.tolist()
+
+    order = [-1] * n
+    low = [0] * n
+    parent = [-1] * n
+    children = [0] * n
+    is_cut = [False] * n
+    bridges = []
+    counter = 0
+
+    for root in range(n):
+        if order[root] != -1:
+            continue
+
+        order[root] = low[root] = counter
+        counter += 1
+        work = [(root, starts[root])]
+
+        while work:
+            node, position = work[-1]
+            end = starts[node + 1]
+
+            child = -1
+            while position < end:
+                target = neighbours[position]
+                position += 1
+                if order[target] == -1:
+                    child = target
+                    break
+                if target != parent[node] and order[target] < low[node]:
+                    low[node] = order[target]
+
+            if child != -1:
+                work[-1] = (node, position)
+                parent[child] = node
+                children[node] += 1
+                order[child] = low[child] = counter
+                counter += 1
+                work.append((child, starts[child]))
+                continue
+
+            work.pop()
+            up = parent[node]
+            if up == -1:
+                continue
+            if low[node] < low[up]:
+                low[up] = low[node]
+            if low[node] > order[up]:
+                bridges.append((min(up, node), max(up, node)))
+            if parent[up] != -1 and low[node] >= order[up]:
+                is_cut[up] = True
+
+        if children[root] > 1:
+            is_cut[root] = True
+
+    return np.flatnonzero(is_cut), sorted(bridges)
+
+def transpose_csr(indptr: np.ndarray, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Pattern with every edge reversed"""
+    n = indptr.size - 1
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    order = np.lexsort((rows, indices))
+    reversed_indptr = np.zeros(n + 1, dtype=np.intp)
+    np.cumsum(np.bincount(indices, minlength=n), out=reversed_indptr[1:])
+    return reversed_indptr, rows[order].astype(np.intp)
+
+def dominator_tree(indptr: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """Immediate dominator of every node of a directed graph
+
+    A virtual root feeds every strongly connected component with no
+    incoming edges, so every node is covered. d dominates v when every path
+    from the roots to v passes through d. ``idom[v]`` is -1 for nodes only
+    the virtual root dominates. Uses the Cooper-Harvey-Kennedy iteration
+    over reverse postorder, which converges in a couple of passes on real
+    graphs.
+    """
+    n = indptr.size - 1
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+
+    component = strongly_connected_components(indptr, indices)
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    entered = np.zeros(int(component.max()) + 1, dtype=bool)
+    entered[component[indices[component[rows] != component[indices]]]] = True
+
+    # Predecessor lists over nodes 0..n-1 plus the virtual root n
+    root = n
+    predecessors = [[] for _ in range(n + 1)]
+    for u, v in zip(rows.tolist(), indices.tolist()):
+        if u != v:
+            predecessors[v].append(u)
+    successors = [indices[indptr[u]:indptr[u + 1]].tolist() for u in range(n)]
+    successors.append(np.flatnonzero(~entered[component]).tolist())
+    for v in successors[root]:
+        predecessors[v].append(root)
+
+    # Reverse postorder from the virtual root
+    postorder = []
+    visited = [False] * (n + 1)
+    visited[root] = True
+    work = [(root, 0)]
+    while work:
+        node, position = work[-1]
+        if position < len(successors[node]):
+            work[-1] = (node, position + 1)
+            target = successors[node][position]
+            if not visited[target]:
+                visited[target] = True
+                work.append((target, 0))
+        else:
+            work.pop()
+            postorder.append(node)
+
+    rank = [0] * (n + 1)
+    for i, node in enumerate(postorder):
+        rank[node] = i
+    reverse_postorder = postorder[::-1]
+
+    idom = [-1] * (n + 1)
+    idom[root] = root
+
+    def intersect(a: int, b: int) -> int:
+        while a != b:
+            while rank[a] < rank[b]:
+                a = idom[a]
+            while rank[b] < rank[a]:
+                b = idom[b]
+        return a
+
+    changed = True
+    while changed:
+        changed = False
+        for node in reverse_postorder[1:]:
+            new_idom = -1
+            for p in predecessors[node]:
+                if idom[p] == -1:
+                    continue
+                new_idom = p if new_idom == -1 else intersect(p, new_idom)
+            if new_idom != idom[node]:
+                idom[node] = new_idom
+                changed = True
+
+    result = np.asarray(idom[:n], dtype=np.intp)
+    result[result == root] = -1
+    return result
+
+def dominated_counts(idom: np.ndarray) -> np.ndarray:
+    """How many agents each agent dominates (its dominator subtree minus itself)"""
+    n = idom.size
+    parents = idom.tolist()
+    children = [[] for _ in range(n)]
+    for v, d in enumerate(parents):
+        if d != -1:
+            children[d].append(v)
+
+    # Breadth-first from the roots, then fold subtree sizes up in reverse
+    order = np.flatnonzero(idom == -1).tolist()
+    for v in order:
+        order.extend(children[v])
+
+    sizes = [1] * n
+    for v in reversed(order):
+        if parents[v] != -1:
+            sizes[parents[v]] += sizes[v]
+    return np.asarray(sizes, dtype=np.int64) - 1
+
+@dataclass
+class RemovalImpact:
+    """Reachability lost when an agent or one dependency link disappears"""
+    removed: str
+    dependents: List[str]                                   # Agents that relied on the removed agent
+    lost_reachability: Dict[str, List[str]] = field(default_factory=dict)
+    lost_pairs: int = 0                                     # Dependency paths that no longer exist
+
+    @property
+    def is_disruptive(self) -> bool:
+        return self.lost_pairs > 0 or bool(self.dependents)
+
+class FailureAnalyzer:
+    """Structural failure analysis over one built dependency graph
+
+    Structural results are computed on first use and cached. Removal
+    queries reuse the reachability index: only agents that can reach the
+    removed agent or link have their rows recomputed. Without a
+    ``reachability_index`` one is built from the adjacency on the first
+    removal query.
+    """
+
+    def __init__(self, adjacency, agents: List[str], reachability_index: Optional[ReachabilityIndex] = None):
+        self.agents = list(agents)
+        self.agent_to_index = {agent: i for i, agent in enumerate(self.agents)}
+        self.indptr, self.indices = adjacency_to_csr(adjacency)
+        self._reachability_index = reachability_index
+
+        self._cuts = None
+        self._idom = None
+
+    @property
+    def reachability_index(self) -> ReachabilityIndex:
+        if self._reachability_index is None:
+            n = len(self.indptr) - 1
+            adjacency = np.zeros((n, n), dtype=bool)
+            adjacency[np.repeat(np.arange(n), np.diff(self.indptr)), self.indices] = True
+            self._reachability_index = ReachabilityIndex.from_adjacency(adjacency)
+        return self._reachability_index
+
+    def _structure(self):
+        if self._cuts is None:
+            self._cuts = articulation_points_and_bridges(*undirected_csr(self.indptr, self.indices))
+        return self._cuts
+
+    @property
+    def articulation_points(self) -> List[str]:
+        """Agents whose loss splits the communication network into pieces"""
+        points, _ = self._structure()
+        return [self.agents[i] for i in points]
+
+    @property
+    def bridges(self) -> List[Tuple[str, str]]:
+        """Links whose loss splits the communication network into pieces"""
+        _, bridges = self._structure()
+        return [(self.agents[u], self.agents[v]) for u, v in bridges]
+
+    @property
+    def immediate_dominators(self) -> Dict[str, Optional[str]]:
+        """For each agent, the nearest agent all of its dependency chains run through"""
+        return {agent: (self.agents[d] if d != -1 else None) for agent, d in zip(self.agents, self._dominators())}
+
+    def _dominators(self) -> np.ndarray:
+        # Walk from the foundations (agents that depend on nobody) up to their dependents
+        if self._idom is None:
+            self._idom = dominator_tree(*transpose_csr(self.indptr, self.indices))
+        return self._idom
+
+    def bottlenecks(self) -> np.ndarray:
+        """Single points of failure: agents every dependency chain of someone else runs through
+
+        If one dies, each agent it dominates loses everything it depends on.
+        SCORE_DTYPE array, score = number of agents dominated, largest first.
+        """
+        counts = dominated_counts(self._dominators()).astype(float)
+        indices = np.flatnonzero(counts > 0)
+        indices = indices[np.lexsort((indices, -counts[indices]))]
+        return scored(self.agents, counts, indices)
+
+    def remove_agent(self, agent: str) -> RemovalImpact:
+        """What reachability disappears if ``agent`` dies"""
+        node = self.agent_to_index[agent]
+        affected, words = self.reachability_index.rows_without_node(node)
+        impact = self._impact(agent, affected, words, excluded=node)
+        impact.dependents = [self.agents[i] for i in affected]
+        return impact
+
+    def remove_link(self, from_agent: str, to_agent: str) -> RemovalImpact:
+        """What reachability disappears if the from_agent → to_agent dependency link dies"""
+        u, v = self.agent_to_index[from_agent], self.agent_to_index[to_agent]
+        affected, words = self.reachability_index.rows_without_edge(u, v)
+        return self._impact(f"{from_agent} → {to_agent}", affected, words)
+
+    def _impact(self, removed: str, affected: np.ndarray, words: np.ndarray,
+                excluded: Optional[int] = None) -> RemovalImpact:
+        index = self.reachability_index
+        lost = index.rows(affected) & ~unpack_rows(words, index.n_agents)
+        if excluded is not None:
+            lost[:, excluded] = False
+
+        impact = RemovalImpact(removed=removed, dependents=[], lost_pairs=int(lost.sum()))
+        for r in np.flatnonzero(lost.any(axis=1)):
+            impact.lost_reachability[self.agents[affected[r]]] = [self.agents[j] for j in np.flatnonzero(lost[r])]
+        return impact
@@ -35,9 +35,10 @@ class GlobalMessageBus:
         self.global_log_session = "global_log"
         self.temp_dir = tempfile.gettempdir()
         
-        # Message tracking
+        # Message tracking; numbering and the append share one lock so ids follow list order
         self.message_counter = 0
         self.all_messages: List[GlobalMessage] = []
+        self._messages_lock = threading.Lock()
         
     def initialize_global_sessions(self):
         """Create the global communication sessions"""
@@ -72,24 +73,31 @@ class GlobalMessageBus:
             except subprocess.CalledProcessError:
                 pass
     
+    def record_message(self, sender: str, recipient: str, content: str,
+                       message_type: str = "direct") -> GlobalMessage:
+        """Number and store a message; safe to call from any number of threads"""
+        timestamp = datetime.now().isoformat()
+        
+        with self._messages_lock:
+            self.message_counter += 1
+            global_msg = GlobalMessage(
+                id=f"msg_{self.message_counter:06d}",
+                sender=sender,
+                recipient=recipient,
+                content=content,
+                timestamp=timestamp,
+                message_type=message_type
+            )
+            self.all_messages.append(global_msg)
+        
+        return global_msg
+    
     def log_message_to_global_bus(self, sender: str, recipient: str, content: str, 
                                  message_type: str = "direct"):
         """Log every message to the global message bus"""
         
-        self.message_counter += 1
-        timestamp = datetime.now().isoformat()
-        
-        # Create global message record
-        global_msg = GlobalMessage(
-            id=f"msg_{self.message_counter:06d}",
-            sender=sender,
-            recipient=recipient,
-            content=content,
-            timestamp=timestamp,
-            message_type=message_type
-        )
-        
-        self.all_messages.append(global_msg)
+        global_msg = self.record_message(sender, recipient, content, message_type)
+        timestamp = global_msg.timestamp
         
         # Format message for global sessions
         if message_type == "broadcast":
@@ -36,6 +36,7 @@ class HierarchicalBroadcastSystem:
         self.common_inbox_session = "common_inbox"
         self.temp_dir = tempfile.gettempdir()
         self.message_counter = 0
+        self._counter_lock = threading.Lock()
         
         # Broadcast visibility rules
         self.visibility_rules = {
@@ -130,6 +131,11 @@ class HierarchicalBroadcastSystem:
         """Get priority level for broadcast (lower = higher priority)"""
         return self.priority_order.get(broadcaster_rank, 999)
     
+    def _next_message_number(self) -> int:
+        with self._counter_lock:
+            self.message_counter += 1
+            return self.message_counter
+    
     def log_hierarchical_broadcast(self, sender: str, content: str, broadcast_type: str = "broadcast"):
         """Log broadcast to common inbox with hierarchy information"""
         
@@ -138,7 +144,7 @@ class HierarchicalBroadcastSystem:
             return
         
         sender_agent = self.agents[sender]
-        self.message_counter += 1
+        number = self._next_message_number()
         timestamp = datetime.now().strftime("%H:%M:%S")
         priority = self.get_broadcast_priority(sender_agent.rank)
         
@@ -150,7 +156,7 @@ class HierarchicalBroadcastSystem:
             Rank.WORKER: "🔸"     # Small diamond for worker
         }.get(sender_agent.rank, "•")
         
-        log_entry = (f"[{timestamp}] #{self.message_counter:03d} "
+        log_entry = (f"[{timestamp}] #{number:03d} "
                     f"P{priority} {rank_symbol} {sender_agent.rank.name} "
                     f"{sender} BROADCAST: {content}")
         
@@ -183,10 +189,10 @@ class HierarchicalBroadcastSystem:
             return
         
         # Log to common inbox
-        self.message_counter += 1
+        number = self._next_message_number()
         timestamp = datetime.now().strftime("%H:%M:%S")
         
-        log_entry = (f"[{timestamp}] #{self.message_counter:03d} "
+        log_entry = (f"[{timestamp}] #{number:03d} "
                     f"{sender_agent.rank.name} {sender} -> {recipient_agent.rank.name} {recipient}: {content}")
         
         try:
@@ -4,9 +4,18 @@ Hybrid Topology System
 Shows how complex topologies are combinations of basic patterns
 """
 
+import numpy as np
 from typing import Dict, List, Set, Tuple
 from dataclasses import dataclass
 from enum import Enum
+from agent_partitioner import partition_agents
+from matrix_analysis import axis_totals
+
+try:
+    from scipy.sparse import issparse
+except ImportError:  # Dense communication matrices work without scipy
+    def issparse(matrix) -> bool:
+        return False
 
 class BasicTopology(Enum):
     LINEAR = "linear"
@@ -133,18 +142,35 @@ class HybridTopologyBuilder:
             "description": "Agents belong to multiple overlapping hierarchies"
         }
     
-    def federated_mesh(self) -> Dict[str, any]:
-        """Federated Mesh = Multiple mesh clusters with star-connected leaders"""
+    def federated_mesh(self, communication_matrix=None) -> Dict[str, any]:
+        """Federated Mesh = Multiple mesh clusters with star-connected leaders
+        
+        With a ``communication_matrix`` (indexed like ``all_agents``; a NumPy
+        array, scipy sparse matrix or nested lists), cluster
+        boundaries come from a communication-aware partition, so agents that
+        talk most share a cluster and each cluster's busiest agent leads it.
+        Without one, agents are sliced by position.
+        """
         
         # Divide agents into clusters
         cluster_size = max(2, len(self.all_agents) // 3)
-        clusters = []
+        n_clusters = (len(self.all_agents) + cluster_size - 1) // cluster_size
+        partition = None
         
-        for i in range(0, len(self.all_agents), cluster_size):
-            cluster_agents = self.all_agents[i:i + cluster_size]
+        if communication_matrix is not None:
+            if not issparse(communication_matrix):
+                communication_matrix = np.asarray(communication_matrix, dtype=float)
+            partition = partition_agents(communication_matrix, self.all_agents, n_clusters)
+            groups = [self._by_internal_traffic(members, communication_matrix)
+                      for members in partition.shards if members]
+        else:
+            groups = [self.all_agents[i:i + cluster_size] for i in range(0, len(self.all_agents), cluster_size)]
+        
+        clusters = []
+        for number, cluster_agents in enumerate(groups, start=1):
             if cluster_agents:
                 clusters.append(TopologyLayer(
-                    name=f"cluster_{i//cluster_size + 1}",
+                    name=f"cluster_{number}",
                     agents=cluster_agents,
                     internal_topology=BasicTopology.MESH
                 ))
@@ -157,12 +183,27 @@ class HybridTopologyBuilder:
             internal_topology=BasicTopology.STAR
         )
         
-        return {
+        result = {
             "topology_type": "Federated Mesh",
             "clusters": clusters,
             "leader_network": leader_network,
             "description": "Mesh clusters connected via star leader network"
         }
+        if partition is not None:
+            result["partition"] = partition
+        return result
+    
+    def _by_internal_traffic(self, members: List[str], communication_matrix) -> List[str]:
+        """Cluster members, busiest inside the cluster first"""
+        
+        index = {agent: i for i, agent in enumerate(self.all_agents)}
+        positions = np.array([index[agent] for agent in members])
+        
+        block = communication_matrix[np.ix_(positions, positions)]
+        traffic = axis_totals(block, 0) + axis_totals(block, 1) - 2 * np.asarray(block.diagonal()).ravel()
+        
+        order = np.lexsort((positions, -traffic))
+        return [members[i] for i in order]
     
     def pipeline_with_supervisors(self) -> Dict[str, any]:
         """Pipeline with Supervisors = Linear pipeline + Star supervision"""
@@ -251,6 +292,20 @@ def demonstrate_hybrid_topologies():
     leader_net = federated['leader_network']
     print(f"  {leader_net.name}: {', '.join(leader_net.agents)} ({leader_net.internal_topology.value})")
     
+    # Two tight-knit teams whose members are interleaved in the agent list
+    communication = [[0.0] * len(agents) for _ in agents]
+    for i in range(len(agents)):
+        for j in range(len(agents)):
+            if i != j and i % 2 == j % 2:
+                communication[i][j] = 1.0
+        communication[i][(i + 1) % len(agents)] = 0.1
+    
+    aware = builder.federated_mesh(np.array(communication))
+    print("\nCommunication-aware clusters:")
+    for cluster in aware['clusters']:
+        print(f"  {cluster.name}: {', '.join(cluster.agents)} (leader: {cluster.agents[0]})")
+    print(f"  Traffic kept inside clusters: {aware['partition'].internal_fraction:.0%}")
+    
     # 4. Supervised Pipeline
     print("\n\n4. SUPERVISED PIPELINE")
     print("-" * 22)
@@ -7,15 +7,23 @@ Shows how to prevent infinite ping-pong loops between agents
 import json
 import time
 import hashlib
+import threading
+from functools import lru_cache
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
-from typing import Set, Dict, Optional
-from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+from dataclasses import dataclass, asdict
+
+from content_digest import DIGEST_FUNCTIONS, ContentDigest, ScalableBloomFilter
+
+# Acknowledgments that never warrant a response of their own
+AUTO_RESPONSES = ["ACK", "OK", "RECEIVED", "CONFIRMED"]
 
 @dataclass
 class MessageState:
     """Track message processing state to prevent loops"""
     message_id: str
-    content_hash: str
+    content_hash: int
     sender: str
     recipient: str
     timestamp: datetime
@@ -24,27 +32,87 @@ class MessageState:
     response_count: int = 0
     
 class LoopPreventionManager:
-    """Prevents infinite loops and ping-pong conversations"""
+    """Prevents infinite loops and ping-pong conversations
+
+    Processed messages, content hashes and conversation thread counts are
+    kept in ordered dicts, oldest activity first. Every check evicts the
+    entries whose TTL ran out from the front, so expiry costs amortized
+    O(1) per message and needs no full scan. Each structure is also capped,
+    and the least recently active entries go first when a cap is reached.
+    
+    Content is deduplicated by 64-bit digests from ``digest``. With
+    ``probabilistic_dedup`` the digests go into generations of scalable
+    Bloom filters instead of an exact dict: a few bits per message and no
+    cap, at the price of rare false duplicates. A generation is dropped as
+    a whole once everything in it is past the TTL.
+    """
     
     def __init__(self, agent_id: str, max_responses: int = 1, 
-                 message_ttl_minutes: int = 30):
+                 message_ttl_minutes: int = 30, max_tracked_messages: int = 10_000,
+                 max_tracked_threads: int = 1_000, clock: Callable[[], float] = time.time,
+                 digest: Optional[ContentDigest] = None, probabilistic_dedup: bool = False,
+                 dedup_error_rate: float = 0.001):
         self.agent_id = agent_id
         self.max_responses = max_responses
         self.message_ttl = timedelta(minutes=message_ttl_minutes)
-        
-        # Track processed messages
-        self.processed_messages: Dict[str, MessageState] = {}
-        self.content_hashes: Set[str] = set()
+        self.max_tracked_messages = max_tracked_messages
+        self.max_tracked_threads = max_tracked_threads
+        self.clock = clock
+        self.digest = digest or ContentDigest()
+        self.probabilistic_dedup = probabilistic_dedup
+        self.dedup_error_rate = dedup_error_rate
+        
+        # Track processed messages, oldest first; hashes and threads map to their last activity time
+        self.processed_messages: OrderedDict[str, MessageState] = OrderedDict()
+        self.content_hashes: OrderedDict[int, float] = OrderedDict()
+        self.content_filters: deque = deque()           # (generation start, ScalableBloomFilter), oldest first
         self.conversation_threads: Dict[str, int] = {}  # thread_id -> message_count
+        self._thread_activity: OrderedDict[str, float] = OrderedDict()
+        self.evicted = {'expired': 0, 'capacity': 0}
+        
+        # The check and the record that follows it hash the same content once
+        self._last_content: Optional[str] = None
+        self._last_digest = 0
+        self._auto_response_digests = {self.digest(keyword) for keyword in AUTO_RESPONSES}
+    
+    @classmethod
+    def from_config(cls, agent_id: str, config) -> 'LoopPreventionManager':
+        """Build from a LoopPreventionConfig"""
+        return cls(agent_id, config.max_responses_per_thread, config.message_ttl_minutes,
+                   config.max_tracked_messages, config.max_tracked_threads,
+                   digest=ContentDigest.from_config(config), probabilistic_dedup=config.probabilistic_dedup,
+                   dedup_error_rate=config.dedup_error_rate)
+    
+    def _content_digest(self, message_content: str) -> int:
+        if message_content is not self._last_content:
+            self._last_digest = self.digest(message_content)
+            self._last_content = message_content
+        return self._last_digest
+    
+    def _seen_content(self, content_hash: int) -> bool:
+        if self.probabilistic_dedup:
+            return any(content_hash in bloom for _, bloom in self.content_filters)
+        return content_hash in self.content_hashes
+    
+    def _remember_content(self, content_hash: int, now: float):
+        if not self.probabilistic_dedup:
+            self.content_hashes.pop(content_hash, None)
+            self.content_hashes[content_hash] = now
+            return
+        # A new generation every half TTL, so one can be dropped whole once its contents expire
+        if not self.content_filters or self.content_filters[-1][0] <= now - self.message_ttl.total_seconds() / 2:
+            self.content_filters.append((now, ScalableBloomFilter(error_rate=self.dedup_error_rate)))
+        self.content_filters[-1][1].add(content_hash)
         
     def should_process_message(self, message_content: str, sender: str) -> bool:
         """Determine if a message should be processed or ignored"""
+        self._evict()
         
         # Create content hash to detect duplicates
-        content_hash = hashlib.md5(message_content.encode()).hexdigest()
+        content_hash = self._content_digest(message_content)
         
         # Check for exact duplicate content
-        if content_hash in self.content_hashes:
+        if self._seen_content(content_hash):
             print(f"[{self.agent_id}] IGNORED: Duplicate content from {sender}")
             return False
         
@@ -67,27 +135,32 @@ class LoopPreventionManager:
                                 message_id: str = None) -> MessageState:
         """Record that a message has been processed"""
         
+        now = self.clock()
         if not message_id:
-            message_id = f"{sender}-{int(time.time())}"
+            message_id = f"{sender}-{int(now)}"
         
-        content_hash = hashlib.md5(message_content.encode()).hexdigest()
+        content_hash = self._content_digest(message_content)
         
         message_state = MessageState(
             message_id=message_id,
             content_hash=content_hash,
             sender=sender,
             recipient=self.agent_id,
-            timestamp=datetime.now(),
+            timestamp=datetime.fromtimestamp(now),
             processed=True
         )
         
+        self.processed_messages.pop(message_id, None)
         self.processed_messages[message_id] = message_state
-        self.content_hashes.add(content_hash)
+        self._remember_content(content_hash, now)
         
         # Update conversation thread count
         thread_id = f"{sender}-{self.agent_id}"
         self.conversation_threads[thread_id] = self.conversation_threads.get(thread_id, 0) + 1
+        self._thread_activity.pop(thread_id, None)
+        self._thread_activity[thread_id] = now
         
+        self._evict(now)
         return message_state
     
     def should_respond(self, message_state: MessageState) -> bool:
@@ -103,8 +176,7 @@ class LoopPreventionManager:
             return False
         
         # Check for automatic response triggers that should be ignored
-        auto_responses = ["ACK", "OK", "RECEIVED", "CONFIRMED"]
-        if any(trigger in message_state.content_hash for trigger in auto_responses):
+        if message_state.content_hash in self._auto_response_digests:
             return False
         
         return True
@@ -116,21 +188,169 @@ class LoopPreventionManager:
             self.processed_messages[original_message_id].responded = True
             self.processed_messages[original_message_id].response_count += 1
     
+    def _evict(self, now: Optional[float] = None) -> int:
+        """Drop expired entries, then the least recently active ones over the caps"""
+        now = self.clock() if now is None else now
+        ttl = self.message_ttl.total_seconds()
+        cutoff = datetime.fromtimestamp(now - ttl)
+        expired = 0
+        
+        while self.processed_messages:
+            message_id, message_state = next(iter(self.processed_messages.items()))
+            if message_state.timestamp > cutoff:
+                break
+            del self.processed_messages[message_id]
+            expired += 1
+        while self.content_hashes and next(iter(self.content_hashes.values())) <= now - ttl:
+            self.content_hashes.popitem(last=False)
+        while self.content_filters and self.content_filters[0][0] <= now - 1.5 * ttl:
+            self.content_filters.popleft()
+        while self._thread_activity and next(iter(self._thread_activity.values())) <= now - ttl:
+            thread_id, _ = self._thread_activity.popitem(last=False)
+            self.conversation_threads.pop(thread_id, None)
+        
+        over_capacity = 0
+        while len(self.processed_messages) > self.max_tracked_messages:
+            self.processed_messages.popitem(last=False)
+            over_capacity += 1
+        while len(self.content_hashes) > self.max_tracked_messages:
+            self.content_hashes.popitem(last=False)
+        while len(self._thread_activity) > self.max_tracked_threads:
+            thread_id, _ = self._thread_activity.popitem(last=False)
+            self.conversation_threads.pop(thread_id, None)
+        
+        self.evicted['expired'] += expired
+        self.evicted['capacity'] += over_capacity
+        return expired
+    
     def cleanup_old_messages(self):
-        """Remove old message states to prevent memory bloat"""
-        
-        current_time = datetime.now()
-        expired_messages = []
-        
-        for msg_id, msg_state in self.processed_messages.items():
-            if current_time - msg_state.timestamp > self.message_ttl:
-                expired_messages.append(msg_id)
-        
-        for msg_id in expired_messages:
-            msg_state = self.processed_messages.pop(msg_id)
-            self.content_hashes.discard(msg_state.content_hash)
-        
-        print(f"[{self.agent_id}] Cleaned up {len(expired_messages)} expired messages")
+        """Remove old message states to prevent memory bloat
+
+        Expiry already happens on every check; this only forces it, e.g.
+        for an idle agent.
+        """
+        expired = self._evict()
+        print(f"[{self.agent_id}] Cleaned up {expired} expired messages")
+
+    def export_state(self) -> Dict:
+        """JSON-safe snapshot of the loop-prevention state, e.g. to move the agent to another node"""
+        return {
+            'agent_id': self.agent_id,
+            'max_responses': self.max_responses,
+            'message_ttl_seconds': self.message_ttl.total_seconds(),
+            'max_tracked_messages': self.max_tracked_messages,
+            'max_tracked_threads': self.max_tracked_threads,
+            'digest': {'algorithm': self.digest.algorithm, 'ignore_case': self.digest.ignore_case,
+                       'collapse_whitespace': self.digest.collapse_whitespace},
+            'probabilistic_dedup': self.probabilistic_dedup,
+            'dedup_error_rate': self.dedup_error_rate,
+            'processed_messages': [{**asdict(state), 'timestamp': state.timestamp.isoformat()}
+                                   for state in self.processed_messages.values()],
+            'content_hashes': list(self.content_hashes.items()),
+            'content_filters': [[started, bloom.to_state()] for started, bloom in self.content_filters],
+            'conversation_threads': [[thread_id, self.conversation_threads[thread_id], seen]
+                                     for thread_id, seen in self._thread_activity.items()],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'LoopPreventionManager':
+        """Rebuild a manager from ``export_state()``
+
+        Raises ValueError when the exported digest algorithm is not available
+        here (xxh64 without the xxhash package): digests from another
+        algorithm would never match the restored ones.
+        """
+        algorithm = state['digest']['algorithm']
+        if algorithm not in DIGEST_FUNCTIONS:
+            raise ValueError(f"State was exported with {algorithm} digests, which are not available here; "
+                             f"install xxhash or restore on a node that has it")
+        manager = cls(state['agent_id'], state['max_responses'],
+                      max_tracked_messages=state['max_tracked_messages'],
+                      max_tracked_threads=state['max_tracked_threads'],
+                      digest=ContentDigest(**state['digest']), probabilistic_dedup=state['probabilistic_dedup'],
+                      dedup_error_rate=state['dedup_error_rate'])
+        manager.message_ttl = timedelta(seconds=state['message_ttl_seconds'])
+        for entry in state['processed_messages']:
+            message_state = MessageState(**{**entry, 'timestamp': datetime.fromisoformat(entry['timestamp'])})
+            manager.processed_messages[message_state.message_id] = message_state
+        manager.content_hashes = OrderedDict((content_hash, seen) for content_hash, seen in state['content_hashes'])
+        manager.content_filters = deque((started, ScalableBloomFilter.from_state(bloom))
+                                        for started, bloom in state['content_filters'])
+        for thread_id, count, seen in state['conversation_threads']:
+            manager.conversation_threads[thread_id] = count
+            manager._thread_activity[thread_id] = seen
+        return manager
+
+@lru_cache(maxsize=4096)
+def _filter_positions(agent_id: str, n_bits: int, n_hashes: int) -> int:
+    """Bloom filter bits of one agent, by double hashing a 64-bit digest"""
+    digest = int.from_bytes(hashlib.blake2b(agent_id.encode(), digest_size=8).digest(), "big")
+    first, step = digest & 0xFFFFFFFF, (digest >> 32) | 1
+    bits = 0
+    for i in range(n_hashes):
+        bits |= 1 << ((first + i * step) % n_bits)
+    return bits
+
+class PathTrace:
+    """Network-wide loop prevention through message metadata
+
+    A message sent while a handler runs inherits the handled message's
+    trace: ``hops`` counts how many handlers it has passed through and
+    ``path`` is a Bloom filter of the agents that sent it along, as hex.
+    ``check`` rejects a message past ``max_hops``, or one heading back to
+    an agent already on its path, which stops A->B->C->A cycles that
+    per-conversation limits miss. Replies are exempt from the revisit rule
+    since returning to the requester is their point. False positives of
+    the filter drop a message by mistake, so size ``filter_bits`` to the
+    longest chains: 256 bits with 3 hashes keeps the rate under 1% for 16
+    agents.
+    """
+
+    def __init__(self, max_hops: int = 16, drop_revisits: bool = True, filter_bits: int = 256,
+                 n_hashes: int = 3):
+        self.max_hops = max_hops
+        self.drop_revisits = drop_revisits
+        self.filter_bits = filter_bits
+        self.n_hashes = n_hashes
+        self.dropped = {'ttl': 0, 'revisit': 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> 'PathTrace':
+        """Build from a LoopPreventionConfig"""
+        return cls(config.max_hops, config.drop_path_revisits, config.path_filter_bits, config.path_filter_hashes)
+
+    def settings(self) -> Dict:
+        """Constructor arguments, for the same trace in a worker process or subinterpreter"""
+        return {'max_hops': self.max_hops, 'drop_revisits': self.drop_revisits,
+                'filter_bits': self.filter_bits, 'n_hashes': self.n_hashes}
+
+    def extend(self, metadata: Optional[Dict], parent_metadata: Optional[Dict], sender: str) -> Dict:
+        """Metadata for a message ``sender`` sends while handling one with ``parent_metadata``"""
+        parent_metadata = parent_metadata or {}
+        path = int(parent_metadata.get('path', "0"), 16)
+        path |= _filter_positions(sender, self.filter_bits, self.n_hashes)
+        hops = parent_metadata['hops'] + 1 if 'hops' in parent_metadata else 0
+        return {**(metadata or {}), 'hops': hops, 'path': format(path, "x")}
+
+    def visited(self, metadata: Dict, agent_id: str) -> bool:
+        """Whether ``agent_id`` is (probably) on the message's path"""
+        bits = _filter_positions(agent_id, self.filter_bits, self.n_hashes)
+        return int(metadata.get('path', "0"), 16) & bits == bits
+
+    def check(self, metadata: Optional[Dict], recipient: str) -> Optional[str]:
+        """Why a message must be dropped ("ttl" or "revisit"), or None to let it through"""
+        if not metadata or 'hops' not in metadata:
+            return None
+        reason = None
+        if metadata['hops'] > self.max_hops:
+            reason = 'ttl'
+        elif self.drop_revisits and 'in_reply_to' not in metadata and self.visited(metadata, recipient):
+            reason = 'revisit'
+        if reason:
+            with self._lock:
+                self.dropped[reason] += 1
+        return reason
 
 class SmartAgentNode:
     """Agent with loop prevention and intelligent response logic"""
@@ -233,6 +453,33 @@ def demonstrate_loop_prevention():
         else:
             print(f"  {recipient}: [No response - loop prevention]")
 
+def demonstrate_network_loop_prevention():
+    """Show the path trace stopping the echo chamber cycle and a long forwarding chain"""
+    
+    print("\n\nNETWORK-WIDE LOOP PREVENTION")
+    print("=" * 40)
+    
+    trace = PathTrace(max_hops=5)
+    
+    print("\nEcho chamber agent1 -> agent2 -> agent3 -> agent1:")
+    metadata = None
+    for sender, recipient in [("agent1", "agent2"), ("agent2", "agent3"), ("agent3", "agent1")]:
+        metadata = trace.extend(None, metadata, sender)
+        reason = trace.check(metadata, recipient)
+        print(f"  {sender} -> {recipient}: hops={metadata['hops']} path={metadata['path']} "
+              f"{'DROPPED (' + reason + ')' if reason else 'delivered'}")
+    
+    print("\nForwarding chain through fresh agents:")
+    metadata = None
+    for i in range(8):
+        metadata = trace.extend(None, metadata, f"relay{i}")
+        reason = trace.check(metadata, f"relay{i + 1}")
+        print(f"  relay{i} -> relay{i + 1}: hops={metadata['hops']} "
+              f"{'DROPPED (' + reason + ')' if reason else 'delivered'}")
+        if reason:
+            break
+    print(f"\nDropped: {trace.dropped}")
+
 def show_problematic_scenarios():
     """Show scenarios that would cause loops without prevention"""
     
@@ -283,6 +530,7 @@ def show_problematic_scenarios():
 
 if __name__ == "__main__":
     demonstrate_loop_prevention()
+    demonstrate_network_loop_prevention()
     show_problematic_scenarios()
     
     print("\n\nKEY PREVENTION MECHANISMS:")
@@ -292,4 +540,5 @@ if __name__ == "__main__":
     print("3. Echo Detection - Don't respond to own messages")
     print("4. Acknowledgment Filtering - Don't respond to ACK/OK messages")
     print("5. Message TTL - Clean up old conversation state")
-    print("6. Intelligent Response Logic - Context-aware responses")
\ No newline at end of file
+    print("6. Intelligent Response Logic - Context-aware responses")
+    print("7. Path Trace - Hop limit and visited-agent filter stop cycles across the network")
\ No newline at end of file
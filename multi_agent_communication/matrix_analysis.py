@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Vectorized Analysis Helpers for Dependency Matrices
+Whole-matrix NumPy operations shared by both DependencyMatrixSystem
+implementations; results are structured arrays indexed like the agent list
+"""
+
+import numpy as np
+from typing import List, Tuple
+
+try:
+    from scipy.sparse import issparse
+except ImportError:  # Sparse matrices only exist when scipy is installed
+    def issparse(matrix) -> bool:
+        return False
+
+CENTRALITY_DTYPE = np.dtype([
+    ('agent', object),
+    ('in_degree', np.int64),      # How many depend on this agent
+    ('out_degree', np.int64),     # How many this agent depends on
+    ('total_degree', np.int64),
+    ('comm_load', np.float64),    # Incoming plus outgoing communication requirements
+])
+
+DEPENDENCY_DTYPE = np.dtype([
+    ('from_agent', object),
+    ('to_agent', object),
+    ('strength', np.float64),
+])
+
+SCORE_DTYPE = np.dtype([
+    ('agent', object),
+    ('score', np.float64),
+])
+
+def axis_totals(matrix, axis: int) -> np.ndarray:
+    """Row (axis=1) or column (axis=0) sums as a flat array, dense or sparse"""
+    return np.asarray(matrix.sum(axis=axis)).ravel()
+
+def entries_above(matrix, threshold: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Row, column and value of every entry above threshold, in row-major order"""
+    if issparse(matrix):
+        csr = matrix.tocsr()
+        csr.sort_indices()
+        coo = csr.tocoo()
+        mask = coo.data > threshold
+        return coo.row[mask], coo.col[mask], coo.data[mask]
+
+    matrix = np.asarray(matrix)
+    rows, cols = np.nonzero(matrix > threshold)
+    return rows, cols, matrix[rows, cols]
+
+def dependencies_above(matrix, agents: List[str], threshold: float) -> np.ndarray:
+    """Structured (from_agent, to_agent, strength) array of entries above threshold"""
+    names = np.asarray(agents, dtype=object)
+    rows, cols, values = entries_above(matrix, threshold)
+
+    result = np.empty(rows.size, dtype=DEPENDENCY_DTYPE)
+    result['from_agent'] = names[rows]
+    result['to_agent'] = names[cols]
+    result['strength'] = values
+    return result
+
+def centrality_table(adjacency, communication, agents: List[str]) -> np.ndarray:
+    """Degree and communication-load centrality for every agent in one pass of axis reductions"""
+    table = np.empty(len(agents), dtype=CENTRALITY_DTYPE)
+    table['agent'] = np.asarray(agents, dtype=object)
+    table['in_degree'] = axis_totals(adjacency, 0)
+    table['out_degree'] = axis_totals(adjacency, 1)
+    table['total_degree'] = table['in_degree'] + table['out_degree']
+    table['comm_load'] = axis_totals(communication, 0) + axis_totals(communication, 1)
+    return table
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, highest first (ties by index), in O(n + k log k)"""
+    k = min(k, scores.size)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < scores.size:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        # Include every index tied with the k-th score so tie-breaking is by index
+        cutoff = scores[candidates].min()
+        candidates = np.flatnonzero(scores >= cutoff)
+    else:
+        candidates = np.arange(scores.size)
+
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:k]
+
+def scored(agents: List[str], scores: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """Structured (agent, score) array for the selected indices"""
+    result = np.empty(len(indices), dtype=SCORE_DTYPE)
+    result['agent'] = np.asarray(agents, dtype=object)[indices]
+    result['score'] = scores[indices]
+    return result
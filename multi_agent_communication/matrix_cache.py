@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Persistent Matrix Cache
+Stores derived configurations and built dependency matrices on disk, keyed
+by a fingerprint of agent facts, project context and rule versions, and
+memory-maps them back on the next start instead of rebuilding
+"""
+
+import os
+import json
+import errno
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+from dataclasses import asdict, is_dataclass
+from typing import Any, Dict, List, Optional
+
+try:
+    import scipy.sparse as sp
+except ImportError:  # Sparse entries can only be written and read with scipy
+    sp = None
+
+# Bump when the on-disk layout changes
+CACHE_FORMAT_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "multi_agent_matrices")
+
+def _canonical(value: Any) -> Any:
+    """JSON-ready form with deterministic ordering (sets are sorted)"""
+    if is_dataclass(value):
+        return _canonical(asdict(value))
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (set, frozenset)):
+        return sorted(_canonical(v) for v in value)
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+def fingerprint(agents: List[Any], project: Any, versions: Dict[str, Any],
+                extra: Optional[Dict[str, Any]] = None) -> str:
+    """SHA-256 of the facts a configuration is derived from
+
+    Agent order is kept because it fixes the matrix indices.
+    """
+    payload = {
+        'format': CACHE_FORMAT_VERSION,
+        'agents': [_canonical(agent) for agent in agents],
+        'project': _canonical(project),
+        'versions': _canonical(versions),
+        'extra': _canonical(extra or {}),
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+class MatrixCache:
+    """Directory of cache entries, one per fingerprint
+
+    Each entry holds ``config.json`` (the derived configuration), one
+    ``.npy`` file per dense array and one ``.npy`` per CSR component, plus a
+    ``manifest.json`` describing them. Entries are written to a temporary
+    directory and renamed into place, so a crashed writer never leaves a
+    half-written entry behind. A key fixes an entry's contents, so when
+    several processes write the same key the first rename wins and the
+    others discard their copies; readers that lose a race with
+    ``invalidate`` see a miss.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or os.environ.get("MULTI_AGENT_MATRIX_CACHE", DEFAULT_CACHE_DIR)
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def has(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self.entry_path(key), "manifest.json"))
+
+    def save(self, key: str, config: Dict[str, Any], arrays: Optional[Dict[str, Any]] = None,
+             metadata: Optional[Dict[str, Any]] = None):
+        """Write an entry unless one exists; ``arrays`` values may be NumPy arrays or scipy sparse matrices"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{key[:12]}-", dir=self.cache_dir)
+
+        try:
+            manifest = {'format': CACHE_FORMAT_VERSION, 'arrays': {}, 'metadata': metadata or {}}
+            for name, array in (arrays or {}).items():
+                manifest['arrays'][name] = self._write_array(staging, name, array)
+
+            with open(os.path.join(staging, "config.json"), "w") as f:
+                json.dump(config, f, indent=2, default=str)
+            with open(os.path.join(staging, "manifest.json"), "w") as f:
+                json.dump(manifest, f, indent=2)
+
+            target = self.entry_path(key)
+            if os.path.exists(target):
+                shutil.rmtree(staging)
+                return
+            try:
+                os.replace(staging, target)
+            except OSError as e:
+                if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                    raise
+                shutil.rmtree(staging)    # Another writer renamed the same entry into place first
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def _write_array(self, directory: str, name: str, array) -> Dict[str, Any]:
+        if sp is not None and sp.issparse(array):
+            csr = array.tocsr()
+            for part in ("data", "indices", "indptr"):
+                np.save(os.path.join(directory, f"{name}.{part}.npy"), getattr(csr, part))
+            return {'kind': 'csr', 'shape': list(csr.shape)}
+
+        np.save(os.path.join(directory, f"{name}.npy"), np.asarray(array))
+        return {'kind': 'dense'}
+
+    def _read_manifest(self, path: str) -> Optional[Dict[str, Any]]:
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+        return manifest if manifest.get('format') == CACHE_FORMAT_VERSION else None
+
+    def load_config(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached derived configuration, or None on a miss"""
+        path = self.entry_path(key)
+        try:
+            if self._read_manifest(path) is None:
+                return None
+            with open(os.path.join(path, "config.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def load(self, key: str, mmap_mode: Optional[str] = "c"):
+        """(config, arrays, metadata) for a hit, or None on a miss
+
+        Arrays are memory-mapped, so pages are only read when touched. The
+        default copy-on-write mode lets callers modify them in memory
+        without writing back to the cache.
+        """
+        path = self.entry_path(key)
+        try:
+            manifest = self._read_manifest(path)
+            if manifest is None:
+                return None
+
+            arrays = {}
+            for name, spec in manifest['arrays'].items():
+                if spec['kind'] == 'csr':
+                    if sp is None:
+                        return None
+                    parts = [np.load(os.path.join(path, f"{name}.{part}.npy"), mmap_mode=mmap_mode)
+                             for part in ("data", "indices", "indptr")]
+                    arrays[name] = sp.csr_matrix(tuple(parts), shape=tuple(spec['shape']), copy=False)
+                else:
+                    arrays[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+
+            with open(os.path.join(path, "config.json")) as f:
+                config = json.load(f)
+        except FileNotFoundError:
+            return None    # Invalidated while being read
+        return config, arrays, manifest.get('metadata', {})
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop one entry, or the whole cache"""
+        target = self.entry_path(key) if key else self.cache_dir
+        shutil.rmtree(target, ignore_errors=True)
+
+def demonstrate_matrix_cache():
+    """Build matrices once, then reload them from the cache"""
+
+    import io
+    import time
+    import contextlib
+    from rule_based_agent_config import RuleBasedConfigSystem
+    from dependency_matrix_system import DependencyMatrixSystem
+
+    print("PERSISTENT MATRIX CACHE")
+    print("=" * 23)
+
+    roles = ["tech_lead", "backend_developer", "frontend_developer", "designer", "qa_engineer", "devops_engineer"]
+    cache = MatrixCache(tempfile.mkdtemp(prefix="matrix-cache-"))
+
+    def start(label: str):
+        rule_system = RuleBasedConfigSystem()
+        for i in range(300):
+            rule_system.add_agent(f"agent{i}", roles[i % len(roles)], ["high", "medium", "low"][i % 3], {"python"})
+        rule_system.set_project_context("enterprise", "development", "normal", 300, "distributed")
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            rule_system.generate_configuration(cache)
+            dep_system = DependencyMatrixSystem(rule_system)
+            hit = dep_system.load_or_build(cache)
+        elapsed = time.perf_counter() - started
+
+        print(f"{label}: {'cache hit' if hit else 'full build'} in {elapsed:.3f}s "
+              f"({len(dep_system.edge_store)} dependencies, key {dep_system.cache_key()[:12]})")
+
+    start("First start ")
+    start("Second start")
+    cache.invalidate()
+
+if __name__ == "__main__":
+    demonstrate_matrix_cache()
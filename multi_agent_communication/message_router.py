@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Compiled Content-Prefix Router
+Dispatches messages to handlers by verb prefix (TASK_REQUEST:, OFFER:, ...)
+with a single compiled regex scan per message
+"""
+
+import re
+from typing import Callable, List, Optional, Pattern, Tuple
+from dataclasses import dataclass
+
+from multi_agent_screen_network import Message
+
+@dataclass
+class RoutedMessage:
+    """A message with its verb parsed out once by the router"""
+    message: Message
+    verb: str
+    payload: str
+    match: Optional[re.Match] = None  # Set for pattern routes with groups
+
+    @property
+    def sender(self) -> str:
+        return self.message.sender
+
+    @property
+    def content(self) -> str:
+        return self.message.content
+
+class MessageRouter:
+    """Per-agent router compiling all verb and pattern registrations into one regex
+
+    Verb routes match ``VERB<separator>`` at the start of the content; pattern
+    routes match a regular expression at the start of the content. Routes are
+    tried longest verb first, then patterns in registration order, all within
+    the same alternation, so dispatch costs one ``match`` call regardless of
+    how many handlers are registered. The router is itself a message handler
+    and can be passed to ``register_message_handler``.
+    """
+
+    def __init__(self, separator: str = ":"):
+        self.separator = separator
+        self._verb_routes: List[Tuple[str, Callable[[RoutedMessage], None]]] = []
+        self._pattern_routes: List[Tuple[str, Optional[str], Callable[[RoutedMessage], None]]] = []
+        self._default_handler: Optional[Callable[[Message], None]] = None
+
+        # Compiled state, rebuilt lazily after registrations change
+        self._compiled: Optional[Pattern] = None
+        self._group_routes = {}
+
+    def on(self, verb: str, handler: Callable[[RoutedMessage], None]):
+        """Register a handler for content starting with ``verb`` + separator"""
+        self._verb_routes = [(v, h) for v, h in self._verb_routes if v != verb]
+        self._verb_routes.append((verb, handler))
+        self._compiled = None
+
+    def on_pattern(self, pattern: str, handler: Callable[[RoutedMessage], None], verb: str = None):
+        """Register a handler for content matching ``pattern`` at its start
+
+        ``verb`` names the route in the RoutedMessage; it defaults to the
+        matched text. Named groups in the pattern are available through
+        ``RoutedMessage.match`` and must be unique across the router.
+        """
+        re.compile(pattern)  # Fail at registration time on a bad pattern
+        self._pattern_routes.append((pattern, verb, handler))
+        self._compiled = None
+
+    def set_default(self, handler: Callable[[Message], None]):
+        """Handler for messages no route matches"""
+        self._default_handler = handler
+
+    def _compile(self):
+        """Combine every route into a single anchored alternation"""
+        alternatives = []
+        self._group_routes = {}
+
+        # Longest verbs first so COUNTER_BID is not shadowed by COUNTER
+        for index, (verb, handler) in enumerate(sorted(self._verb_routes, key=lambda r: -len(r[0]))):
+            group = f"_verb{index}"
+            alternatives.append(f"(?P<{group}>{re.escape(verb)}){re.escape(self.separator)}")
+            self._group_routes[group] = (None, handler)
+
+        for index, (pattern, verb, handler) in enumerate(self._pattern_routes):
+            group = f"_pattern{index}"
+            alternatives.append(f"(?P<{group}>{pattern})")
+            self._group_routes[group] = (verb, handler)
+
+        combined = "|".join(f"(?:{alt})" for alt in alternatives) or "(?!)"
+        self._compiled = re.compile(rf"\s*(?:{combined})", re.DOTALL)
+
+    def route(self, message: Message) -> Optional[RoutedMessage]:
+        """Parse a message into a RoutedMessage without dispatching it"""
+        routed, _ = self._resolve(message)
+        return routed
+
+    def _resolve(self, message: Message):
+        if self._compiled is None:
+            self._compile()
+
+        match = self._compiled.match(message.content)
+        if not match:
+            return None, None
+
+        # Route groups enclose any user groups, so they always close last
+        group = match.lastgroup
+        verb, handler = self._group_routes[group]
+        routed = RoutedMessage(
+            message=message,
+            verb=verb or match.group(group),
+            payload=message.content[match.end():],
+            match=match
+        )
+        return routed, handler
+
+    def __call__(self, message: Message):
+        """Dispatch a message to its route, or the default handler"""
+        routed, handler = self._resolve(message)
+
+        if handler:
+            handler(routed)
+        elif self._default_handler:
+            self._default_handler(message)
+
+    @property
+    def verbs(self) -> List[str]:
+        """Registered verb prefixes"""
+        return [verb for verb, _ in self._verb_routes]
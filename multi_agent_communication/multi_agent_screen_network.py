@@ -14,6 +14,11 @@ from typing import Dict, List, Optional, Callable, Any
 from dataclasses import dataclass
 from datetime import datetime
 import uuid
+from concurrent.futures import Future, InvalidStateError
+from conversation_executor import ConversationOrderedExecutor, conversation_id
+
+# The message whose handler runs on this thread; what it causes inherits its path trace
+_handling = threading.local()
 
 @dataclass
 class Message:
@@ -53,21 +58,38 @@ class AgentCommunicationNode:
         self.message_handlers: Dict[str, Callable] = {}
         self.running = False
         self.listener_thread = None
+        self._stop_event = threading.Event()
+        self._lifecycle_lock = threading.Lock()
+        
+        # Registrations swap in a new dict, so dispatch reads handlers without locking
+        self._handlers_lock = threading.Lock()
         self.temp_dir = tempfile.gettempdir()
         
+        # Outstanding send_request() calls: correlation_id -> (future, deadline)
+        self.pending_requests: Dict[str, tuple] = {}
+        self._pending_lock = threading.Lock()
+        
     def start(self):
         """Start the agent communication node"""
-        self._create_sessions()
-        self.running = True
-        self.listener_thread = threading.Thread(target=self._message_listener, daemon=True)
-        self.listener_thread.start()
+        with self._lifecycle_lock:
+            if self.running:
+                return
+            self._create_sessions()
+            self._stop_event.clear()
+            self.running = True
+            self.listener_thread = threading.Thread(target=self._message_listener, daemon=True)
+            self.listener_thread.start()
         print(f"Agent {self.agent_id} communication node started")
     
     def stop(self):
         """Stop the agent communication node"""
-        self.running = False
-        if self.listener_thread:
-            self.listener_thread.join(timeout=2)
+        with self._lifecycle_lock:
+            self.running = False
+            self._stop_event.set()
+            listener, self.listener_thread = self.listener_thread, None
+        if listener and listener is not threading.current_thread():
+            listener.join(timeout=2)
+        self._cancel_pending_requests()
         self._cleanup_sessions()
         print(f"Agent {self.agent_id} communication node stopped")
     
@@ -92,9 +114,14 @@ class AgentCommunicationNode:
             except subprocess.CalledProcessError:
                 pass
     
-    def send_message(self, recipient: str, content: str, message_type: str = "text", metadata: Dict = None):
-        """Send a message to another agent"""
-        message = Message(
+    def _new_message(self, recipient: str, content: str, message_type: str = "text",
+                     metadata: Dict = None) -> Message:
+        """Build an outgoing message from this agent"""
+        path_trace = self.network_manager.path_trace
+        if path_trace is not None:
+            parent = getattr(_handling, "message", None)
+            metadata = path_trace.extend(metadata, parent.metadata if parent else None, self.agent_id)
+        return Message(
             id=str(uuid.uuid4()),
             sender=self.agent_id,
             recipient=recipient,
@@ -103,6 +130,12 @@ class AgentCommunicationNode:
             message_type=message_type,
             metadata=metadata
         )
+    
+    def send_message(self, recipient: str, content: str, message_type: str = "text", metadata: Dict = None):
+        """Send a message to another agent"""
+        message = self._new_message(recipient, content, message_type, metadata)
+        if self._loop_detected(message):
+            return False
         
         # Send to recipient's inbox
         recipient_inbox = f"{recipient}_inbox"
@@ -123,9 +156,98 @@ class AgentCommunicationNode:
         except subprocess.CalledProcessError:
             return False
     
+    def send_request(self, recipient: str, content: str, timeout: Optional[float] = 30.0,
+                     message_type: str = "text", metadata: Dict = None) -> Future:
+        """Send a message and return a Future completed by the correlated reply
+        
+        The Future resolves to the reply Message, fails with TimeoutError once
+        ``timeout`` seconds pass without a reply (checked on each listener
+        poll), and can be cancelled by the caller. The recipient answers with
+        ``reply()`` so the correlation ID travels back in the metadata.
+        """
+        correlation_id = str(uuid.uuid4())
+        future: Future = Future()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        
+        with self._pending_lock:
+            self.pending_requests[correlation_id] = (future, deadline)
+        
+        # Drop the waiter however the future finishes (reply, timeout or cancel)
+        future.add_done_callback(lambda _: self._discard_request(correlation_id))
+        
+        request_metadata = dict(metadata or {})
+        request_metadata['correlation_id'] = correlation_id
+        
+        if not self.send_message(recipient, content, message_type, request_metadata):
+            self._fail_request(correlation_id, ConnectionError(f"Could not deliver request to {recipient}"))
+        
+        return future
+    
+    def reply(self, message: 'Message', content: str, message_type: str = None, metadata: Dict = None) -> bool:
+        """Reply to a message, carrying its correlation ID back to the sender"""
+        reply_metadata = dict(metadata or {})
+        correlation_id = (message.metadata or {}).get('correlation_id')
+        if correlation_id:
+            reply_metadata['in_reply_to'] = correlation_id
+        
+        return self.send_message(message.sender, content, message_type or message.message_type, reply_metadata)
+    
+    def _complete_request(self, message: 'Message') -> bool:
+        """Resolve the waiter for a correlated reply; False if nobody is waiting"""
+        correlation_id = (message.metadata or {}).get('in_reply_to')
+        if not correlation_id:
+            return False
+        
+        with self._pending_lock:
+            entry = self.pending_requests.pop(correlation_id, None)
+        
+        if entry is None:
+            return False
+        
+        try:
+            entry[0].set_result(message)
+        except InvalidStateError:
+            pass  # Cancelled by the caller in the meantime
+        return True
+    
+    def _fail_request(self, correlation_id: str, error: Exception):
+        """Fail a pending request with an exception"""
+        with self._pending_lock:
+            entry = self.pending_requests.pop(correlation_id, None)
+        
+        if entry is not None:
+            try:
+                entry[0].set_exception(error)
+            except InvalidStateError:
+                pass
+    
+    def _discard_request(self, correlation_id: str):
+        """Forget a waiter without touching its future"""
+        with self._pending_lock:
+            self.pending_requests.pop(correlation_id, None)
+    
+    def _expire_pending_requests(self):
+        """Time out requests whose deadline has passed"""
+        now = time.monotonic()
+        with self._pending_lock:
+            expired = [cid for cid, (_, deadline) in self.pending_requests.items()
+                       if deadline is not None and deadline <= now]
+        
+        for correlation_id in expired:
+            self._fail_request(correlation_id, TimeoutError(f"No reply for request {correlation_id}"))
+    
+    def _cancel_pending_requests(self):
+        """Cancel every outstanding request, e.g. when the node stops"""
+        with self._pending_lock:
+            entries = list(self.pending_requests.values())
+            self.pending_requests.clear()
+        
+        for future, _ in entries:
+            future.cancel()
+    
     def broadcast_message(self, content: str, message_type: str = "broadcast", metadata: Dict = None):
         """Send a message to all other agents in the network"""
-        other_agents = [agent_id for agent_id in self.network_manager.agents.keys() 
+        other_agents = [agent_id for agent_id in list(self.network_manager.agents)
                        if agent_id != self.agent_id]
         
         for recipient in other_agents:
@@ -154,7 +276,8 @@ class AgentCommunicationNode:
                 if self.running:  # Only log if we're supposed to be running
                     print(f"Error in message listener for {self.agent_id}: {e}")
             
-            time.sleep(1)  # Check for messages every second
+            self._expire_pending_requests()
+            self._stop_event.wait(1)  # Check for messages every second; stop() wakes us
     
     def _process_inbox_content(self, content: str):
         """Process messages from inbox content"""
@@ -170,19 +293,52 @@ class AgentCommunicationNode:
     
     def _handle_message(self, message: Message):
         """Handle an incoming message"""
-        handler = self.message_handlers.get(message.message_type)
-        if handler:
-            try:
-                handler(message)
-            except Exception as e:
-                print(f"Error handling message in {self.agent_id}: {e}")
+        # Replies to our own send_request() calls complete their futures
+        if self._complete_request(message):
+            return
+        
+        executor = self.network_manager.handler_executor
+        if executor and executor.running:
+            # Same sender→recipient thread always lands on the same lane
+            executor.submit(conversation_id(message.sender, self.agent_id),
+                            self._dispatch_message, message)
         else:
-            # Default handler
-            print(f"[{self.agent_id}] Received from {message.sender}: {message.content}")
+            self._dispatch_message(message)
+    
+    def _dispatch_message(self, message: Message):
+        """Run the registered handler for a message"""
+        previous = getattr(_handling, "message", None)
+        _handling.message = message
+        try:
+            handler = self.message_handlers.get(message.message_type)
+            if handler:
+                try:
+                    handler(message)
+                except Exception as e:
+                    print(f"Error handling message in {self.agent_id}: {e}")
+            else:
+                # Default handler
+                print(f"[{self.agent_id}] Received from {message.sender}: {message.content}")
+        finally:
+            _handling.message = previous
+    
+    def _loop_detected(self, message: Message) -> bool:
+        """Whether the network's path trace drops this message as part of a loop"""
+        path_trace = self.network_manager.path_trace
+        if path_trace is None:
+            return False
+        reason = path_trace.check(message.metadata, message.recipient)
+        if reason:
+            print(f"[{self.agent_id}] DROPPED ({reason}): message to {message.recipient} "
+                  f"after {message.metadata['hops']} hops")
+        return reason is not None
     
     def register_message_handler(self, message_type: str, handler: Callable[[Message], None]):
         """Register a handler for a specific message type"""
-        self.message_handlers[message_type] = handler
+        with self._handlers_lock:
+            handlers = dict(self.message_handlers)
+            handlers[message_type] = handler
+            self.message_handlers = handlers
     
     def get_conversation_history(self) -> List[str]:
         """Get the conversation history from both inbox and outbox"""
@@ -210,19 +366,29 @@ class AgentCommunicationNode:
 class MultiAgentNetworkManager:
     """Manages a network of communicating agents"""
     
-    def __init__(self):
+    def __init__(self, handler_lanes: int = 0, path_trace: Optional['PathTrace'] = None):
         self.agents: Dict[str, AgentCommunicationNode] = {}
         self.user_node: Optional[AgentCommunicationNode] = None
+        self._agents_lock = threading.Lock()
         self.network_monitor_running = False
         self.monitor_thread = None
+        
+        # Optional network-wide loop prevention (hop count and path filter in metadata)
+        self.path_trace = path_trace
+        
+        # Optional parallel handler execution, ordered per conversation
+        self.handler_executor: Optional[ConversationOrderedExecutor] = None
+        if handler_lanes > 0:
+            self.handler_executor = ConversationOrderedExecutor(handler_lanes, name="handlers")
     
     def add_agent(self, agent_id: str) -> AgentCommunicationNode:
         """Add an agent to the network"""
-        if agent_id in self.agents:
-            raise ValueError(f"Agent {agent_id} already exists")
-        
-        node = AgentCommunicationNode(agent_id, self)
-        self.agents[agent_id] = node
+        with self._agents_lock:
+            if agent_id in self.agents:
+                raise ValueError(f"Agent {agent_id} already exists")
+            
+            node = AgentCommunicationNode(agent_id, self)
+            self.agents[agent_id] = node
         return node
     
     def add_user(self, user_id: str = "user") -> AgentCommunicationNode:
@@ -232,10 +398,13 @@ class MultiAgentNetworkManager:
     
     def start_network(self):
         """Start all agents in the network"""
+        if self.handler_executor:
+            self.handler_executor.start()
+        
         if self.user_node:
             self.user_node.start()
         
-        for agent in self.agents.values():
+        for agent in list(self.agents.values()):
             agent.start()
         
         self._start_network_monitor()
@@ -251,9 +420,12 @@ class MultiAgentNetworkManager:
         if self.user_node:
             self.user_node.stop()
         
-        for agent in self.agents.values():
+        for agent in list(self.agents.values()):
             agent.stop()
         
+        if self.handler_executor:
+            self.handler_executor.stop()
+        
         print("Network stopped")
     
     def _start_network_monitor(self):
@@ -277,7 +449,10 @@ class MultiAgentNetworkManager:
             'network_running': self.network_monitor_running
         }
         
-        for agent_id, agent in self.agents.items():
+        if self.handler_executor:
+            status['handler_executor'] = self.handler_executor.get_stats()
+        
+        for agent_id, agent in list(self.agents.items()):
             status['agents'][agent_id] = {
                 'running': agent.running,
                 'inbox_session': agent.inbox_session,
@@ -0,0 +1,632 @@
+#!/usr/bin/env python3
+"""
+Multi-Process Agent Runtime
+Places agent groups in worker processes so CPU-heavy handlers run on
+separate cores. Workers exchange messages directly over authenticated
+Unix-domain socket connections (named pipes on Windows), and a supervisor
+restarts workers that exit or stop sending heartbeats.
+"""
+
+import os
+import sys
+import time
+import pickle
+import shutil
+import tempfile
+import threading
+import multiprocessing
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.connection import Client, Listener, wait
+from multiprocessing.reduction import ForkingPickler
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from multi_agent_screen_network import Message
+from agent_context import HandlerRef, HostedNetwork, TransportAgentNode, current_agent
+from agent_partitioner import AgentPartition
+from loop_prevention_system import PathTrace
+
+# How long a sender keeps reconnecting to a worker that is being restarted
+RECONNECT_TIMEOUT = 5.0
+
+# Connection family of the mailboxes: Windows has no Unix-domain sockets
+MAILBOX_FAMILY = "AF_PIPE" if sys.platform == "win32" else "AF_UNIX"
+
+def mailbox_address(directory: str, name: str) -> str:
+    """Address of a mailbox: a socket file in ``directory``, or a pipe named after it on Windows"""
+    if MAILBOX_FAMILY == "AF_PIPE":
+        return rf"\\.\pipe\{os.path.basename(directory)}-{name}"
+    return os.path.join(directory, f"{name}.sock")
+
+def picklable_handler(handler: Union[str, Callable]) -> Callable:
+    """Validate a handler for shipping to a worker; strings become HandlerRefs"""
+    if isinstance(handler, str):
+        return HandlerRef(handler)
+    try:
+        pickle.dumps(handler)
+    except Exception as e:
+        raise TypeError(f"Handler {handler!r} cannot be sent to a worker process ({e}); "
+                        f"use a module-level function or a HandlerRef('module:function')") from None
+    return handler
+
+class Mailbox:
+    """Listening socket plus every inbound connection, drained from one thread
+
+    An accept thread adds connections and wakes the receiver through a
+    pipe, so ``receive`` can block in ``multiprocessing.connection.wait``.
+    """
+
+    def __init__(self, address: str, authkey: bytes):
+        if MAILBOX_FAMILY == "AF_UNIX" and os.path.exists(address):
+            os.unlink(address)    # Left behind by a worker that died
+        self.address = address
+        self.listener = Listener(address, family=MAILBOX_FAMILY, authkey=authkey)
+        self.connections = []
+        self._lock = threading.Lock()
+        self._wake_reader, self._wake_writer = multiprocessing.Pipe(duplex=False)
+        self.closed = False
+        self._accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._accept_thread.start()
+
+    def _accept_loop(self):
+        while not self.closed:
+            try:
+                connection = self.listener.accept()
+            except Exception:
+                if self.closed:
+                    return
+                continue    # Failed handshake; keep listening
+            with self._lock:
+                self.connections.append(connection)
+            self._wake_writer.send_bytes(b"")
+
+    def receive(self, timeout: Optional[float]) -> List[Any]:
+        """Payloads from every ready connection; waits up to ``timeout`` for the first"""
+        with self._lock:
+            connections = list(self.connections)
+
+        payloads = []
+        for ready in wait(connections + [self._wake_reader], timeout):
+            if ready is self._wake_reader:
+                ready.recv_bytes()
+                continue
+            try:
+                while ready.poll():
+                    payloads.append(ready.recv())
+            except (EOFError, OSError):
+                with self._lock:
+                    self.connections.remove(ready)
+                ready.close()
+        return payloads
+
+    def close(self):
+        self.closed = True
+        self.listener.close()
+        with self._lock:
+            connections, self.connections = self.connections, []
+        for connection in connections:
+            connection.close()
+        if MAILBOX_FAMILY == "AF_UNIX" and os.path.exists(self.address):
+            os.unlink(self.address)
+
+class Outbox:
+    """Queue of pickled payloads for one mailbox, written by its own thread
+
+    ``put`` never blocks, so a worker's main loop keeps draining its own
+    mailbox while the peer it is sending to is busy or restarting. A
+    broken connection is reopened, retrying for ``RECONNECT_TIMEOUT``
+    seconds; payloads that still cannot be written are dropped and
+    ``failed`` stays set until a later write succeeds.
+    """
+
+    def __init__(self, address: str, authkey: bytes):
+        self.address = address
+        self.authkey = authkey
+        self.failed = False
+        self.closed = False
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._connection = None
+        self._writer = threading.Thread(target=self._write_loop, name=f"outbox-{os.path.basename(address)}",
+                                        daemon=True)
+        self._writer.start()
+
+    def put(self, data: bytes):
+        with self._condition:
+            self._pending.append(data)
+            self._condition.notify()
+
+    def _write_loop(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self.closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                batch = list(self._pending)
+                self._pending.clear()
+
+            for i, data in enumerate(batch):
+                if not self._write(data):
+                    self.failed = True
+                    print(f"Mailbox {self.address} unreachable; dropped {len(batch) - i} payloads")
+                    break
+            else:
+                self.failed = False
+
+    def _write(self, data: bytes) -> bool:
+        deadline = time.monotonic() + RECONNECT_TIMEOUT
+        while True:
+            try:
+                if self._connection is None:
+                    self._connection = Client(self.address, family=MAILBOX_FAMILY, authkey=self.authkey)
+                self._connection.send_bytes(data)
+                return True
+            except (OSError, EOFError):
+                if self._connection is not None:
+                    self._connection.close()
+                    self._connection = None
+                if self.closed or time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.05)
+
+    def close(self, timeout: float = 2.0):
+        """Flush what is queued, then close"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+        self._writer.join(timeout)
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+class SocketTransport:
+    """Outbound half: routes messages to the mailbox that owns the recipient
+
+    Each destination gets an ``Outbox`` on first use. Payloads are pickled
+    by the caller, so unpicklable ones fail at the send, and written in
+    order by the outbox thread. ``send`` returns False only when the last
+    write to that mailbox was given up on.
+    """
+
+    def __init__(self, routes: Dict[str, str], local_address: str, authkey: bytes,
+                 local_delivery: Callable[[Message], None]):
+        self.routes = routes                  # agent_id -> mailbox address
+        self.local_address = local_address
+        self.authkey = authkey
+        self.local_delivery = local_delivery
+        self._outboxes: Dict[str, Outbox] = {}
+        self._lock = threading.Lock()
+
+    def deliver(self, message: Message) -> bool:
+        address = self.routes.get(message.recipient)
+        if address is None:
+            return False
+        if address == self.local_address:
+            self.local_delivery(message)
+            return True
+        return self.send(address, ("deliver", message))
+
+    def send(self, address: str, payload: Any) -> bool:
+        data = bytes(ForkingPickler.dumps(payload))
+        with self._lock:
+            outbox = self._outboxes.get(address)
+            if outbox is None:
+                outbox = self._outboxes[address] = Outbox(address, self.authkey)
+        outbox.put(data)
+        return not outbox.failed
+
+    def close(self):
+        with self._lock:
+            outboxes, self._outboxes = self._outboxes, {}
+        for outbox in outboxes.values():
+            outbox.close()
+
+def _worker_main(worker_id: int, address: str, parent_address: str, authkey: bytes,
+                 routes: Dict[str, str], handlers: Dict[str, Dict[str, Callable]],
+                 heartbeat_interval: float, path_trace: Optional[Dict[str, Any]] = None):
+    """Entry point of a worker process: host its agents until told to stop"""
+
+    mailbox = Mailbox(address, authkey)
+    local_queue = deque()
+    transport = SocketTransport(routes, address, authkey, local_queue.append)
+    network = HostedNetwork([agent for agent, target in routes.items() if target != parent_address], path_trace)
+
+    nodes = {}
+    for agent_id, agent_handlers in handlers.items():
+        node = TransportAgentNode(agent_id, network, transport)
+        node.message_handlers.update(agent_handlers)
+        node.start()
+        nodes[agent_id] = node
+
+    processed = 0
+    stopping = threading.Event()
+
+    def deliver(message: Message):
+        nonlocal processed
+        node = nodes.get(message.recipient)
+        if node is None:
+            transport.deliver(message)    # Route changed since the sender looked it up
+            return
+        node._handle_message(message)
+        processed += 1
+
+    def send_heartbeats():
+        # Own thread, so a handler that runs for minutes is not taken for a hung worker
+        while True:
+            if not transport.send(parent_address, ("heartbeat", worker_id, os.getpid(), processed)):
+                stopping.set()    # The parent is gone; don't linger as an orphan
+                return
+            if stopping.wait(heartbeat_interval):
+                return
+
+    heartbeats = threading.Thread(target=send_heartbeats, name="heartbeat", daemon=True)
+    heartbeats.start()
+    next_expiry = 0.0
+    try:
+        while not stopping.is_set():
+            now = time.monotonic()
+            if now >= next_expiry:
+                for node in nodes.values():
+                    node._expire_pending_requests()
+                next_expiry = now + heartbeat_interval
+
+            while local_queue:
+                deliver(local_queue.popleft())
+
+            for payload in mailbox.receive(max(0.0, next_expiry - time.monotonic())):
+                kind = payload[0]
+                if kind == "deliver":
+                    deliver(payload[1])
+                elif kind == "register":
+                    _, agent_id, message_type, handler = payload
+                    nodes[agent_id].register_message_handler(message_type, handler)
+                elif kind == "route":
+                    routes[payload[1]] = payload[2]
+                elif kind == "stop":
+                    stopping.set()
+    finally:
+        stopping.set()
+        heartbeats.join(heartbeat_interval + 1)
+        for node in nodes.values():
+            node.stop()
+        transport.close()
+        mailbox.close()
+
+@dataclass
+class WorkerState:
+    """Supervisor's view of one worker process"""
+    worker_id: int
+    address: str
+    agents: List[str]
+    process: Any = None
+    last_heartbeat: float = 0.0
+    processed: int = 0
+    restarts: int = 0
+    status: str = "stopped"     # starting, running, failed, stopped
+
+class RemoteAgentHandle(TransportAgentNode):
+    """Parent-side handle for an agent that lives in a worker process
+
+    Handlers registered here are shipped to the worker, so they must be
+    picklable. Messages sent through the handle go out under the agent's
+    name; requests must come from a parent node such as the user, or from
+    inside a handler, because replies are delivered to the worker.
+    """
+
+    def __init__(self, agent_id: str, network_manager: 'ProcessNetworkManager'):
+        super().__init__(agent_id, network_manager, network_manager.transport)
+
+    def register_message_handler(self, message_type: str, handler: Union[str, Callable[[Message], None]]):
+        handler = picklable_handler(handler)
+        super().register_message_handler(message_type, handler)
+        self.network_manager._handler_registered(self.agent_id, message_type, handler)
+
+    def send_request(self, recipient: str, content: str, timeout: Optional[float] = 30.0,
+                     message_type: str = "text", metadata: Dict = None) -> Future:
+        raise RuntimeError(f"Replies to {self.agent_id} go to its worker process; "
+                           f"send requests from the user node or from inside a handler")
+
+class ProcessNetworkManager:
+    """MultiAgentNetworkManager counterpart that runs agent groups in worker processes
+
+    ``add_agent``/``add_user``/``register_message_handler`` work as before.
+    Agents are assigned to ``n_workers`` processes round-robin, explicitly
+    with ``add_agent(agent_id, worker=...)``, or from a communication-aware
+    partition with ``place_agents``. The user node stays in this process.
+    """
+
+    def __init__(self, n_workers: Optional[int] = None, heartbeat_interval: float = 1.0,
+                 health_timeout: float = 10.0, max_restarts: int = 3, start_method: str = "spawn",
+                 path_trace: Optional[PathTrace] = None):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.heartbeat_interval = heartbeat_interval
+        self.health_timeout = health_timeout
+        self.max_restarts = max_restarts
+        self.context = multiprocessing.get_context(start_method)
+
+        self.agents: Dict[str, RemoteAgentHandle] = {}
+        self.user_node: Optional[TransportAgentNode] = None
+        self.handler_executor = None          # Parent-side handlers run on the dispatcher thread
+        self.path_trace = path_trace          # Workers get a copy with the same settings
+        self.placement: Dict[str, int] = {}
+
+        self._socket_dir = tempfile.mkdtemp(prefix="agent-runtime-")
+        self._authkey = os.urandom(16)
+        self.address = mailbox_address(self._socket_dir, "parent")
+        self.routes: Dict[str, str] = {}
+        self.transport = SocketTransport(self.routes, self.address, self._authkey, self._deliver_local)
+        self.workers: List[WorkerState] = []
+        self.mailbox: Optional[Mailbox] = None
+
+        self.running = False
+        self._lock = threading.Lock()
+        self._dispatcher_thread = None
+        self._supervisor_thread = None
+
+    def add_agent(self, agent_id: str, worker: Optional[int] = None) -> RemoteAgentHandle:
+        """Add an agent, optionally pinned to a worker index"""
+        if self.running:
+            raise RuntimeError("Agents must be added before start_network()")
+        if agent_id in self.agents or (self.user_node and self.user_node.agent_id == agent_id):
+            raise ValueError(f"Agent {agent_id} already exists")
+
+        node = RemoteAgentHandle(agent_id, self)
+        self.agents[agent_id] = node
+        if worker is not None:
+            self.placement[agent_id] = worker % self.n_workers
+        return node
+
+    def add_user(self, user_id: str = "user") -> TransportAgentNode:
+        """Add the user node; it lives in this process"""
+        self.user_node = TransportAgentNode(user_id, self, self.transport)
+        return self.user_node
+
+    def place_agents(self, partition: AgentPartition):
+        """Put each agent in the worker matching its shard (see agent_partitioner)"""
+        for agent, shard in zip(partition.agents, partition.assignment.tolist()):
+            if agent in self.agents:
+                self.placement[agent] = shard % self.n_workers
+
+    def _plan_workers(self):
+        unplaced = [agent for agent in self.agents if agent not in self.placement]
+        for i, agent in enumerate(unplaced):
+            self.placement[agent] = i % self.n_workers
+
+        self.workers = []
+        for worker_id in range(self.n_workers):
+            members = [agent for agent in self.agents if self.placement[agent] == worker_id]
+            address = mailbox_address(self._socket_dir, f"worker-{worker_id}")
+            self.workers.append(WorkerState(worker_id, address, members))
+            for agent in members:
+                self.routes[agent] = address
+
+        if self.user_node:
+            self.routes[self.user_node.agent_id] = self.address
+
+    def start_network(self, ready_timeout: float = 30.0):
+        """Start the worker processes, the dispatcher and the supervisor"""
+        self._plan_workers()
+        self.mailbox = Mailbox(self.address, self._authkey)
+        self.running = True
+
+        if self.user_node:
+            self.user_node.start()
+        for node in self.agents.values():
+            node.running = True
+
+        self._dispatcher_thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher_thread.start()
+
+        for worker in self.workers:
+            if worker.agents:
+                self._spawn(worker)
+
+        # Wait for every worker's first heartbeat
+        deadline = time.monotonic() + ready_timeout
+        while any(w.status == "starting" for w in self.workers) and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        self._supervisor_thread = threading.Thread(target=self._supervise, daemon=True)
+        self._supervisor_thread.start()
+
+        active = sum(1 for w in self.workers if w.agents)
+        print(f"Network started with {len(self.agents)} agents in {active} worker processes" +
+              (" and 1 user" if self.user_node else ""))
+
+    def _spawn(self, worker: WorkerState):
+        handlers = {agent: dict(self.agents[agent].message_handlers) for agent in worker.agents}
+        worker.process = self.context.Process(
+            target=_worker_main,
+            args=(worker.worker_id, worker.address, self.address, self._authkey,
+                  dict(self.routes), handlers, self.heartbeat_interval,
+                  self.path_trace.settings() if self.path_trace else None),
+            name=f"agent-worker-{worker.worker_id}",
+            daemon=True
+        )
+        worker.status = "starting"
+        worker.last_heartbeat = time.monotonic()
+        worker.process.start()
+
+    def stop_network(self, timeout: float = 5.0):
+        """Stop every worker, then the dispatcher and supervisor"""
+        self.running = False
+
+        for worker in self.workers:
+            if worker.process is not None and worker.process.is_alive():
+                self.transport.send(worker.address, ("stop",))
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.join(timeout)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+                    worker.process.join(1)
+            worker.status = "stopped"
+
+        for thread in (self._supervisor_thread, self._dispatcher_thread):
+            if thread:
+                thread.join(timeout=2)
+
+        if self.user_node:
+            self.user_node.stop()
+        for node in self.agents.values():
+            node.running = False
+
+        self.transport.close()
+        if self.mailbox:
+            self.mailbox.close()
+        shutil.rmtree(self._socket_dir, ignore_errors=True)
+        print("Network stopped")
+
+    def _deliver_local(self, message: Message):
+        if self.user_node and message.recipient == self.user_node.agent_id:
+            self.user_node._handle_message(message)
+
+    def _dispatch_loop(self):
+        """Messages for parent-side nodes plus worker heartbeats"""
+        while self.running:
+            for payload in self.mailbox.receive(0.1):
+                kind = payload[0]
+                if kind == "deliver":
+                    self._deliver_local(payload[1])
+                elif kind == "heartbeat":
+                    _, worker_id, pid, processed = payload
+                    worker = self.workers[worker_id]
+                    with self._lock:
+                        worker.last_heartbeat = time.monotonic()
+                        worker.processed = processed
+                        if worker.status == "starting":
+                            worker.status = "running"
+
+            if self.user_node:
+                self.user_node._expire_pending_requests()
+
+    def _supervise(self):
+        """Restart workers that exited or stopped heartbeating"""
+        while self.running:
+            time.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+
+            for worker in self.workers:
+                if not self.running or worker.status not in ("running", "starting"):
+                    continue
+                with self._lock:
+                    silent_for = now - worker.last_heartbeat
+                if not worker.process.is_alive():
+                    self._restart(worker, f"exited with code {worker.process.exitcode}")
+                elif silent_for > self.health_timeout:
+                    self._restart(worker, f"no heartbeat for {silent_for:.1f}s")
+
+    def _restart(self, worker: WorkerState, reason: str):
+        if worker.process.is_alive():
+            worker.process.terminate()
+            worker.process.join(1)
+
+        if worker.restarts >= self.max_restarts:
+            worker.status = "failed"
+            print(f"Worker {worker.worker_id} {reason}; restart limit reached, agents "
+                  f"{', '.join(worker.agents)} are offline")
+            return
+
+        worker.restarts += 1
+        print(f"Worker {worker.worker_id} {reason}; restarting ({worker.restarts}/{self.max_restarts})")
+        self._spawn(worker)
+
+    def _handler_registered(self, agent_id: str, message_type: str, handler: Callable):
+        """Forward a handler registered after start to the agent's worker"""
+        if not self.running:
+            return
+        worker = self.workers[self.placement[agent_id]]
+        self.transport.send(worker.address, ("register", agent_id, message_type, handler))
+
+    def get_network_status(self) -> Dict[str, Any]:
+        """Status of all nodes plus per-worker process health"""
+        now = time.monotonic()
+        status = {
+            'agents': {},
+            'user': None,
+            'total_agents': len(self.agents),
+            'network_running': self.running,
+            'workers': {},
+        }
+
+        for worker in self.workers:
+            with self._lock:
+                status['workers'][worker.worker_id] = {
+                    'pid': worker.process.pid if worker.process else None,
+                    'alive': bool(worker.process and worker.process.is_alive()),
+                    'status': worker.status,
+                    'agents': list(worker.agents),
+                    'processed': worker.processed,
+                    'heartbeat_age': now - worker.last_heartbeat if worker.process else None,
+                    'restarts': worker.restarts,
+                }
+
+        for agent_id in self.agents:
+            worker = self.workers[self.placement[agent_id]] if self.workers else None
+            status['agents'][agent_id] = {
+                'running': bool(worker and worker.status == "running"),
+                'worker': self.placement.get(agent_id),
+            }
+
+        if self.user_node:
+            status['user'] = {
+                'id': self.user_node.agent_id,
+                'running': self.user_node.running
+            }
+
+        return status
+
+    def broadcast_to_all(self, sender_id: str, message: str):
+        """Broadcast a message from one node to all others"""
+        if sender_id in self.agents:
+            self.agents[sender_id].broadcast_message(message)
+        elif self.user_node and sender_id == self.user_node.agent_id:
+            self.user_node.broadcast_message(message)
+
+def cpu_bound_handler(message: Message):
+    """Demo handler: burn CPU proportional to the request, then reply with the result"""
+    total = 0
+    for i in range(int(message.content)):
+        total += i * i % 7
+    current_agent().reply(message, str(total))
+
+def demonstrate_process_runtime():
+    """Throughput of CPU-bound handlers with one worker process versus one per core"""
+
+    print("MULTI-PROCESS AGENT RUNTIME")
+    print("=" * 27)
+
+    def run(n_workers: int, n_requests: int = 64, work: int = 200_000) -> float:
+        network = ProcessNetworkManager(n_workers=n_workers)
+        user = network.add_user()
+        agents = [network.add_agent(f"agent{i}") for i in range(max(4, n_workers))]
+        for agent in agents:
+            agent.register_message_handler("text", cpu_bound_handler)
+
+        network.start_network()
+        started = time.perf_counter()
+        futures = [user.send_request(agents[i % len(agents)].agent_id, str(work), timeout=120)
+                   for i in range(n_requests)]
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - started
+
+        time.sleep(network.heartbeat_interval * 1.5)    # Let the final counts arrive with a heartbeat
+        status = network.get_network_status()
+        network.stop_network()
+        processed = {w: info['processed'] for w, info in status['workers'].items()}
+        print(f"  {n_workers} worker(s): {n_requests / elapsed:.1f} requests/s, processed per worker {processed}")
+        return elapsed
+
+    cores = os.cpu_count() or 1
+    single = run(1)
+    if cores > 1:
+        parallel = run(cores)
+        print(f"Speedup with {cores} workers: {single / parallel:.2f}x")
+    else:
+        print("Only one core available; run on a multi-core machine to see scaling")
+
+if __name__ == "__main__":
+    demonstrate_process_runtime()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Reachability Engine for Dependency Matrices
+Vectorized transitive closure of agent dependency graphs, choosing between
+boolean matrix squaring and bit-packed row-wise Warshall by size and density
+"""
+
+import numpy as np
+from typing import Optional, Tuple
+
+try:
+    from scipy.sparse import csr_matrix, issparse
+    from scipy.sparse.csgraph import connected_components
+except ImportError:  # Without scipy large graphs are closed without SCC condensation
+    connected_components = None
+
+# Graphs this small, or this dense, are fastest with BLAS matrix squaring
+SQUARING_MAX_AGENTS = 512
+SQUARING_MIN_DENSITY = 0.02
+
+def choose_engine(adjacency: np.ndarray) -> str:
+    """Pick the closure engine for a graph: "squaring" or "bitset" """
+    n = adjacency.shape[0]
+    if n <= SQUARING_MAX_AGENTS:
+        return "squaring"
+
+    density = np.count_nonzero(adjacency) / float(n * n)
+    return "squaring" if density >= SQUARING_MIN_DENSITY else "bitset"
+
+def transitive_closure(adjacency, engine: str = "auto") -> np.ndarray:
+    """Boolean reachability: result[i][j] is True when a path i → ... → j exists
+
+    Paths have at least one edge, so result[i][i] is only True for agents on
+    a cycle, matching the Floyd-Warshall loop this replaces. ``adjacency``
+    may be a NumPy array or a scipy sparse matrix. With scipy available,
+    large graphs are first condensed to their strongly connected components,
+    which usually shrinks the problem by orders of magnitude.
+    """
+    if connected_components is not None and issparse(adjacency):
+        if engine in ("auto", "condensation"):
+            return _closure_by_condensation(adjacency)
+        adjacency = adjacency.toarray()
+
+    adjacency = np.asarray(adjacency)
+    if adjacency.ndim != 2 or adjacency.shape[0] != adjacency.shape[1]:
+        raise ValueError(f"Adjacency matrix must be square, got shape {adjacency.shape}")
+
+    if engine == "auto":
+        if connected_components is not None and adjacency.shape[0] > SQUARING_MAX_AGENTS:
+            engine = "condensation"
+        else:
+            engine = choose_engine(adjacency)
+
+    if engine == "condensation":
+        if connected_components is None:
+            raise ValueError("The condensation engine requires scipy")
+        return _closure_by_condensation(csr_matrix(adjacency != 0))
+    if engine == "squaring":
+        return _closure_by_squaring(adjacency != 0)
+    if engine == "bitset":
+        return _closure_by_bitset(adjacency != 0)
+    raise ValueError(f"Unknown reachability engine: {engine}")
+
+def _closure_by_condensation(graph) -> np.ndarray:
+    """Close the DAG of strongly connected components, then expand to agents
+
+    Every agent in a component reaches what the component reaches; agents
+    in a component with more than one member, or with a self-loop, also
+    reach each other and themselves.
+    """
+    n_components, component = connected_components(graph, directed=True, connection="strong")
+    rows, cols = graph.nonzero()
+
+    condensed = np.zeros((n_components, n_components), dtype=bool)
+    condensed[component[rows], component[cols]] = True
+
+    sizes = np.bincount(component, minlength=n_components)
+    cyclic = (sizes > 1) | np.diagonal(condensed)
+    np.fill_diagonal(condensed, False)
+
+    closure = transitive_closure(condensed, choose_engine(condensed))
+    closure[np.arange(n_components), np.arange(n_components)] = cyclic
+    return closure[component][:, component]
+
+def _closure_by_squaring(reach: np.ndarray) -> np.ndarray:
+    """R ← R ∨ R·R until stable; converges in O(log diameter) BLAS products"""
+    while True:
+        if reach.all():
+            return reach
+
+        weights = reach.astype(np.float32)
+        extended = reach | ((weights @ weights) > 0)
+        if np.array_equal(extended, reach):
+            return reach
+        reach = extended
+
+def pack_rows(reach: np.ndarray) -> np.ndarray:
+    """Pack boolean rows into uint64 words, one row of ceil(n/64) words per agent"""
+    n_rows, n_cols = reach.shape
+    n_words = (n_cols + 63) // 64
+    packed = np.zeros((n_rows, n_words * 8), dtype=np.uint8)
+    packed[:, :(n_cols + 7) // 8] = np.packbits(reach, axis=1)
+    return packed.view(np.uint64)
+
+def unpack_rows(words: np.ndarray, n_cols: int) -> np.ndarray:
+    """Inverse of pack_rows"""
+    return np.unpackbits(words.view(np.uint8), axis=1, count=n_cols).astype(bool)
+
+def column_bits(words: np.ndarray, column: int) -> np.ndarray:
+    """Boolean column of a packed matrix (bit order follows np.packbits)"""
+    byte = words.view(np.uint8)[:, column >> 3]
+    return ((byte >> (7 - (column & 7))) & 1).astype(bool)
+
+def _closure_by_bitset(reach: np.ndarray) -> np.ndarray:
+    """Warshall with packed rows: every row that reaches k absorbs row k
+
+    Each pivot costs one word-level OR per row that reaches it, so sparse
+    graphs touch only a small fraction of the matrix.
+    """
+    n = reach.shape[0]
+    words = pack_rows(reach)
+
+    for k in range(n):
+        rows = np.flatnonzero(column_bits(words, k))
+        if rows.size and words[k].any():
+            words[rows] |= words[k]
+
+    return unpack_rows(words, n)
+
+class ReachabilityIndex:
+    """Transitive closure kept up to date as edges are added and removed
+
+    The closure is stored as packed rows. Adding u → v ORs v's reach set
+    (plus v) into u and every row that reaches u. Removing u → v can only
+    change the rows of u and the agents that reach u; those rows are
+    recomputed from the closure of the affected subgraph plus the unchanged
+    rows of the agents it exits to. Both operations return the indices of
+    the rows that may have changed.
+    """
+
+    def __init__(self, n_agents: int):
+        self.n_agents = n_agents
+        self.adjacency = np.zeros((n_agents, n_agents), dtype=bool)
+        self.words = pack_rows(self.adjacency)
+
+    @classmethod
+    def from_adjacency(cls, adjacency: np.ndarray, engine: str = "auto") -> 'ReachabilityIndex':
+        index = cls(adjacency.shape[0])
+        index.adjacency = np.asarray(adjacency) != 0
+        index.words = pack_rows(transitive_closure(index.adjacency, engine))
+        return index
+
+    @classmethod
+    def from_closure(cls, adjacency: np.ndarray, closure: np.ndarray) -> 'ReachabilityIndex':
+        """Wrap an already computed closure, e.g. one loaded from a cache"""
+        index = cls(adjacency.shape[0])
+        index.adjacency = np.asarray(adjacency) != 0
+        index.words = pack_rows(np.asarray(closure) != 0)
+        return index
+
+    def _self_bit(self, node: int) -> np.ndarray:
+        row = np.zeros(self.words.shape[1], dtype=np.uint64)
+        row[node >> 6] = np.uint64(1) << np.uint64(self._bit_position(node))
+        return row
+
+    @staticmethod
+    def _bit_position(node: int) -> int:
+        # np.packbits is big-endian within each byte; uint64 words are little-endian bytes
+        return (node >> 3 & 7) * 8 + (7 - (node & 7))
+
+    def reachable(self, source: int, target: int) -> bool:
+        return bool(column_bits(self.words[source:source + 1], target)[0])
+
+    def reach_set(self, source: int) -> np.ndarray:
+        """Indices of every agent reachable from ``source``"""
+        return np.flatnonzero(unpack_rows(self.words[source:source + 1], self.n_agents)[0])
+
+    def reaching(self, target: int) -> np.ndarray:
+        """Indices of every agent that reaches ``target``"""
+        return np.flatnonzero(column_bits(self.words, target))
+
+    def rows(self, indices: np.ndarray) -> np.ndarray:
+        """Boolean closure rows for the given agents"""
+        return unpack_rows(self.words[indices], self.n_agents)
+
+    def as_matrix(self) -> np.ndarray:
+        return unpack_rows(self.words, self.n_agents)
+
+    def add_edge(self, u: int, v: int) -> np.ndarray:
+        """Insert u → v; returns the rows that changed"""
+        if self.adjacency[u, v]:
+            return np.empty(0, dtype=np.intp)
+        self.adjacency[u, v] = True
+
+        # If u already reached v, everything v reaches is already in u's row
+        if self.reachable(u, v):
+            return np.empty(0, dtype=np.intp)
+
+        gained = self.words[v] | self._self_bit(v)
+        rows = np.union1d(self.reaching(u), [u])
+        self.words[rows] |= gained
+        return rows
+
+    def remove_edge(self, u: int, v: int) -> np.ndarray:
+        """Delete u → v; returns the rows that were recomputed"""
+        if not self.adjacency[u, v]:
+            return np.empty(0, dtype=np.intp)
+        self.adjacency[u, v] = False
+
+        affected = np.union1d(self.reaching(u), [u])
+        if affected.size > self.n_agents // 2:
+            # Most of the graph depends on u; a full rebuild is cheaper
+            self.words = pack_rows(transitive_closure(self.adjacency))
+            return np.arange(self.n_agents)
+
+        self.words[affected] = self._recompute_rows(affected)
+        return affected
+
+    def rows_without_edge(self, u: int, v: int):
+        """(affected rows, their packed rows) as if u → v were removed; the index is unchanged"""
+        if not self.adjacency[u, v]:
+            return np.empty(0, dtype=np.intp), self.words[:0]
+        affected = np.union1d(self.reaching(u), [u])
+        return affected, self._recompute_rows(affected, dropped_edge=(u, v))
+
+    def rows_without_node(self, node: int):
+        """(affected rows, their packed rows) as if ``node`` and its edges were removed
+
+        Only agents that reach ``node`` can lose anything; every other row is
+        reused from the current closure. The index is unchanged.
+        """
+        affected = np.setdiff1d(self.reaching(node), [node])
+        return affected, self._recompute_rows(affected, excluded=node)
+
+    def _recompute_rows(self, affected: np.ndarray, excluded: Optional[int] = None,
+                        dropped_edge: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Packed closure rows of ``affected`` (sorted), assuming no other row changes
+
+        Paths that stay inside the affected set come from the closure of that
+        subgraph; the first edge leaving it lands on an agent whose current
+        row is still exact and is ORed in whole.
+        """
+        if affected.size > self.n_agents // 2:
+            # Most of the graph is affected; closing the whole modified graph is cheaper
+            adjacency = self.adjacency.copy()
+            if excluded is not None:
+                adjacency[excluded, :] = False
+                adjacency[:, excluded] = False
+            if dropped_edge is not None:
+                adjacency[dropped_edge] = False
+            return pack_rows(transitive_closure(adjacency)[affected])
+
+        is_inside = np.zeros(self.n_agents, dtype=bool)
+        is_inside[affected] = True
+        if excluded is not None:
+            is_inside[excluded] = True
+        outside = np.flatnonzero(~is_inside)
+
+        inner_adjacency = self.adjacency[np.ix_(affected, affected)]
+        exit_adjacency = self.adjacency[np.ix_(affected, outside)]
+        if dropped_edge is not None:
+            u, v = dropped_edge
+            row = np.searchsorted(affected, u)
+            if is_inside[v]:
+                inner_adjacency[row, np.searchsorted(affected, v)] = False
+            else:
+                exit_adjacency[row, np.searchsorted(outside, v)] = False
+
+        inner = transitive_closure(inner_adjacency)
+        start = inner | np.eye(affected.size, dtype=bool)
+        exits = (start.astype(np.float32) @ exit_adjacency.astype(np.float32)) > 0
+
+        rows = np.zeros((affected.size, self.n_agents), dtype=bool)
+        rows[:, affected] = inner
+        rows[:, outside] = exits
+        new_words = pack_rows(rows)
+
+        # Outside rows are still exact, so an exit node contributes its whole row
+        for r in range(affected.size):
+            targets = outside[exits[r]]
+            if targets.size:
+                new_words[r] |= np.bitwise_or.reduce(self.words[targets], axis=0)
+
+        return new_words
@@ -8,6 +8,11 @@ from typing import Dict, List, Set, Any, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+from matrix_cache import MatrixCache, fingerprint
+
+# Bump whenever a configuration rule changes, so cached configurations are rebuilt
+RULES_VERSION = 1
+
 # =============================================================================
 # KNOWLEDGE BASE FACTS
 # =============================================================================
@@ -48,8 +53,14 @@ class RuleBasedConfigSystem:
         """Set project context"""
         self.project = ProjectFact(project_type, phase, urgency, team_size, distribution)
     
-    def generate_configuration(self) -> Dict[str, Any]:
-        """Apply rules to generate configuration"""
+    def fingerprint(self, versions: Optional[Dict[str, Any]] = None, extra: Optional[Dict[str, Any]] = None) -> str:
+        """Cache key for everything derived from the current facts and rules"""
+        all_versions = {'config_rules': RULES_VERSION}
+        all_versions.update(versions or {})
+        return fingerprint(self.agents, self.project, all_versions, extra)
+    
+    def generate_configuration(self, cache: Optional[MatrixCache] = None) -> Dict[str, Any]:
+        """Apply rules to generate configuration (reusing a cached one for unchanged facts)"""
         
         if not self.project:
             raise ValueError("Project context must be set")
@@ -57,12 +68,22 @@ class RuleBasedConfigSystem:
         print("RULE-BASED CONFIGURATION GENERATION")
         print("=" * 42)
         
+        key = self.fingerprint() if cache else None
+        cached = cache.load_config(key) if cache else None
+        if cached is not None:
+            self.derived_config = cached
+            print(f"  ✓ Loaded from cache ({key[:12]})")
+            return self.derived_config
+        
         # Apply rules in order of priority
         self._apply_topology_rules()
         self._apply_polling_rules()
         self._apply_participation_rules()
         self._apply_broadcast_rules()
         
+        if cache:
+            cache.save(key, self.derived_config)
+        
         return self.derived_config
     
     def _apply_topology_rules(self):
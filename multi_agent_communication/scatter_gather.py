@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Scatter-Gather for Multi-Agent Result Collection
+Sends a request to many agents at once and streams their replies back
+as they arrive, with quorum, deadline and per-agent latency tracking
+"""
+
+import time
+import statistics
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeout
+from typing import Dict, Iterator, List, Optional
+from dataclasses import dataclass, field
+
+from multi_agent_screen_network import AgentCommunicationNode, Message
+
+@dataclass
+class AgentReply:
+    """One agent's outcome in a scatter-gather round"""
+    agent_id: str
+    message: Optional[Message] = None
+    latency: Optional[float] = None    # Seconds from send to reply
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.message is not None
+
+@dataclass
+class GatherResult:
+    """Everything collected by a scatter-gather round, including partial results"""
+    replies: Dict[str, Message] = field(default_factory=dict)
+    latencies: Dict[str, float] = field(default_factory=dict)
+    failed: Dict[str, str] = field(default_factory=dict)
+    missing: List[str] = field(default_factory=list)
+    quorum_reached: bool = False
+    timed_out: bool = False
+    elapsed: float = 0.0
+
+    def latency_stats(self) -> Dict[str, float]:
+        """Min/mean/median/p95/max reply latency in seconds"""
+        values = sorted(self.latencies.values())
+        if not values:
+            return {}
+
+        p95_index = min(len(values) - 1, int(round(0.95 * (len(values) - 1))))
+        return {
+            'min': values[0],
+            'mean': statistics.mean(values),
+            'median': statistics.median(values),
+            'p95': values[p95_index],
+            'max': values[-1]
+        }
+
+class ScatterGather:
+    """Scatter a request to a set of agents and gather replies as they arrive
+
+    ``requests`` maps each recipient to the content it should receive. Replies
+    are yielded in arrival order when iterating; iteration stops once
+    ``quorum`` successful replies arrived or ``deadline`` seconds elapsed.
+    Whatever arrived by then is available from ``result()``. With no
+    requests the round is empty and ends at once, without reaching quorum.
+    """
+
+    def __init__(self, node: AgentCommunicationNode, requests: Dict[str, str],
+                 quorum: Optional[int] = None, deadline: float = 10.0,
+                 cancel_remaining: bool = True, max_send_workers: int = 8):
+        if quorum is not None and not 0 < quorum <= len(requests):
+            raise ValueError(f"quorum must be between 1 and {len(requests)}")
+
+        self.node = node
+        self.requests = requests
+        self.quorum = quorum
+        self.deadline = deadline
+        self.cancel_remaining = cancel_remaining
+        self.max_send_workers = max_send_workers
+
+        self._futures: Dict[Future, str] = {}
+        self._sent_at: Dict[str, float] = {}
+        self._replied_at: Dict[str, float] = {}
+        self._result = GatherResult()
+        self._started_at: Optional[float] = None
+        self._finished = False
+
+    def _send_one(self, agent_id: str) -> Future:
+        self._sent_at[agent_id] = time.monotonic()
+        future = self.node.send_request(agent_id, self.requests[agent_id], timeout=self.deadline)
+        # Stamp arrival when the reply lands, not when the caller iterates
+        future.add_done_callback(lambda _: self._replied_at.setdefault(agent_id, time.monotonic()))
+        return future
+
+    def _scatter(self):
+        """Send every request, in parallel when there is more than one"""
+        self._started_at = time.monotonic()
+        agent_ids = list(self.requests)
+
+        if len(agent_ids) <= 1:
+            futures = [self._send_one(agent_id) for agent_id in agent_ids]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_send_workers, len(agent_ids))) as pool:
+                futures = list(pool.map(self._send_one, agent_ids))
+
+        self._futures = dict(zip(futures, agent_ids))
+
+    def __iter__(self) -> Iterator[AgentReply]:
+        if self._started_at is not None:
+            raise RuntimeError("A scatter-gather round can only be iterated once")
+
+        self._scatter()
+        remaining = max(0.0, self.deadline - (time.monotonic() - self._started_at))
+
+        try:
+            for future in as_completed(self._futures, timeout=remaining):
+                reply = self._record(future)
+                yield reply
+
+                if self.quorum is not None and len(self._result.replies) >= self.quorum:
+                    self._result.quorum_reached = True
+                    break
+        except FutureTimeout:
+            self._result.timed_out = True
+        finally:
+            self._finish()
+
+    def _record(self, future: Future) -> AgentReply:
+        agent_id = self._futures[future]
+        reply = AgentReply(agent_id=agent_id)
+
+        if future.cancelled():
+            reply.error = "cancelled"
+        elif future.exception() is not None:
+            reply.error = str(future.exception()) or type(future.exception()).__name__
+        else:
+            reply.message = future.result()
+            reply.latency = self._replied_at.get(agent_id, time.monotonic()) - self._sent_at[agent_id]
+
+        if reply.ok:
+            self._result.replies[agent_id] = reply.message
+            self._result.latencies[agent_id] = reply.latency
+        else:
+            self._result.failed[agent_id] = reply.error
+
+        return reply
+
+    def _finish(self):
+        if self._finished:
+            return
+        self._finished = True
+
+        answered = set(self._result.replies) | set(self._result.failed)
+        self._result.missing = [agent_id for agent_id in self.requests if agent_id not in answered]
+
+        if self.quorum is None:
+            self._result.quorum_reached = bool(self.requests) and not self._result.missing and not self._result.failed
+
+        if self.cancel_remaining:
+            for future, agent_id in self._futures.items():
+                if agent_id in self._result.missing:
+                    future.cancel()
+
+        self._result.elapsed = time.monotonic() - self._started_at
+
+    def result(self) -> GatherResult:
+        """Run the round to completion (if not iterated yet) and return what was gathered"""
+        if self._started_at is None:
+            for _ in self:
+                pass
+        return self._result
+
+def scatter_gather(node: AgentCommunicationNode, requests: Dict[str, str],
+                   quorum: Optional[int] = None, deadline: float = 10.0) -> GatherResult:
+    """Convenience wrapper: scatter, gather until quorum/deadline, return the result"""
+    return ScatterGather(node, requests, quorum=quorum, deadline=deadline).result()
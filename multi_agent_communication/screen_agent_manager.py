@@ -68,7 +68,7 @@ except ImportError:
     
     class AdvancedAgentBehaviors:
         @staticmethod
-        def create_collaborative_agents(network): pass
+        def create_collaborative_agents(network, scheduler=None): pass
         @staticmethod
         def create_negotiating_agents(network): pass
         @staticmethod
@@ -252,7 +252,11 @@ def demonstrate_complete_7_agent_ecosystem():
     
     from multi_agent_screen_network import MultiAgentNetworkManager, Message
     from communication_patterns import AdvancedAgentBehaviors
+    from message_router import MessageRouter, RoutedMessage
     from screen_agent_manager import ScreenAgentManager
+    from scatter_gather import ScatterGather
+    from capability_index import CapabilityIndex, CapabilityRouter
+    from task_scheduler import LoadAwareScheduler
     import time
     import json
     
@@ -297,48 +301,58 @@ def demonstrate_complete_7_agent_ecosystem():
     print("\n3. 🤝 AGENT BEHAVIOR PATTERNS CONFIGURATION")
     print("-" * 50)
     
-    # Configure collaborative behavior (recommended pattern)
-    AdvancedAgentBehaviors.create_collaborative_agents(network)
+    # Keyword → agent index shared by the handlers, the task router and the scheduler
+    capability_index = CapabilityIndex.from_agent_configs(agents_config)
+    
+    # Configure collaborative behavior (recommended pattern); the scheduler
+    # hands queued tasks to whichever capable agent reports a RESULT first
+    scheduler = LoadAwareScheduler(list(active_agents), node=user_node, capabilities=capability_index.candidates)
+    AdvancedAgentBehaviors.create_collaborative_agents(network, scheduler)
     print("✅ COLLABORATIVE PATTERN: Agents configured for cooperative task execution")
     
     # Custom message handlers for specialized agent behaviors
     def create_specialized_handler(agent_id: str, capabilities: list):
-        def handler(message: Message):
-            content = message.content
-            sender = message.sender
+        router = MessageRouter()
+        
+        def on_task_request(routed: RoutedMessage):
+            task = routed.payload.strip()
+            
+            # Check if task matches agent capabilities
+            matching_capabilities = capability_index.matching_capabilities(agent_id, task)
+            
+            if matching_capabilities:
+                response = f"TASK_ACCEPTED:{task} - Using capabilities: {', '.join(matching_capabilities)}"
+                active_agents[agent_id]["status"] = "processing"
+            else:
+                response = f"TASK_DECLINED:{task} - Not in my capabilities: {', '.join(capabilities)}"
             
-            if "TASK_REQUEST:" in content:
-                task = content.split("TASK_REQUEST:")[1].strip()
-                
-                # Check if task matches agent capabilities
-                task_keywords = task.lower().split()
-                matching_capabilities = [cap for cap in capabilities if any(keyword in cap for keyword in task_keywords)]
-                
-                if matching_capabilities:
-                    response = f"TASK_ACCEPTED:{task} - Using capabilities: {', '.join(matching_capabilities)}"
-                    active_agents[agent_id]["status"] = "processing"
-                else:
-                    response = f"TASK_DECLINED:{task} - Not in my capabilities: {', '.join(capabilities)}"
-                
-                network.agents[agent_id].send_message(sender, response)
-                
-            elif "RESULT_REQUEST:" in content:
-                # Simulate specialized agent results
-                agent_results = {
-                    "doppler_agent": "RESULT:Secrets analysis complete - 15 secrets managed, 3 environments configured",
-                    "linear_agent": "RESULT:Project KAYA-12 analyzed - 67% completion, 12 issues remaining",
-                    "r_agent": "RESULT:Statistical analysis complete - 85% completion probability in 14 days",
-                    "claude_agent": "RESULT:Quality assessment complete - 91/100 health score, 2 recommendations",
-                    "mermaid_agent": "RESULT:Ecosystem diagram generated - 7-agent architecture visualized",
-                    "terminal_agent": "RESULT:Command optimization complete - 352 commands analyzed, workflows improved",
-                    "coordinator_agent": "RESULT:Coordination complete - All 6 agents synchronized successfully"
-                }
-                
-                result = agent_results.get(agent_id, f"RESULT:Processing complete for {agent_id}")
-                network.agents[agent_id].send_message(sender, result)
+            # Scheduled tasks carry a task ID; echo it and report the result right away
+            task_id = (routed.message.metadata or {}).get('task_id')
+            metadata = {'task_id': task_id} if task_id else None
+            network.agents[agent_id].reply(routed.message, response, metadata=metadata)
+            if task_id and matching_capabilities:
+                network.agents[agent_id].reply(routed.message, f"RESULT:{task} done by {agent_id}", metadata=metadata)
                 active_agents[agent_id]["status"] = "completed"
         
-        return handler
+        def on_result_request(routed: RoutedMessage):
+            # Simulate specialized agent results
+            agent_results = {
+                "doppler_agent": "RESULT:Secrets analysis complete - 15 secrets managed, 3 environments configured",
+                "linear_agent": "RESULT:Project KAYA-12 analyzed - 67% completion, 12 issues remaining",
+                "r_agent": "RESULT:Statistical analysis complete - 85% completion probability in 14 days",
+                "claude_agent": "RESULT:Quality assessment complete - 91/100 health score, 2 recommendations",
+                "mermaid_agent": "RESULT:Ecosystem diagram generated - 7-agent architecture visualized",
+                "terminal_agent": "RESULT:Command optimization complete - 352 commands analyzed, workflows improved",
+                "coordinator_agent": "RESULT:Coordination complete - All 6 agents synchronized successfully"
+            }
+            
+            result = agent_results.get(agent_id, f"RESULT:Processing complete for {agent_id}")
+            network.agents[agent_id].reply(routed.message, result)
+            active_agents[agent_id]["status"] = "completed"
+        
+        router.on("TASK_REQUEST", on_task_request)
+        router.on("RESULT_REQUEST", on_result_request)
+        return router
     
     # Apply specialized handlers to each agent
     for agent_id, agent_data in active_agents.items():
@@ -377,22 +391,37 @@ def demonstrate_complete_7_agent_ecosystem():
         ("coordinator_agent", "Synthesize complete project intelligence report")
     ]
     
+    # Phases finish as soon as the slowest agent replies, bounded by a deadline
+    phase_deadline = 10.0
+    
+    def scatter_and_collect(requests: dict):
+        gather = ScatterGather(user_node, requests, deadline=phase_deadline)
+        for reply in gather:
+            if reply.ok:
+                print(f"  ← {reply.agent_id.upper()} ({reply.latency:.2f}s): {reply.message.content}")
+            else:
+                print(f"  ← {reply.agent_id.upper()}: failed ({reply.error})")
+        
+        result = gather.result()
+        for agent_id in result.missing:
+            print(f"  ← {agent_id.upper()}: no reply within {phase_deadline:.0f}s")
+        stats = result.latency_stats()
+        if stats:
+            print(f"  Phase done in {result.elapsed:.2f}s "
+                  f"(latency median {stats['median']:.2f}s, max {stats['max']:.2f}s)")
+        return result
+    
     # Distribute tasks to specialized agents
-    for agent_id, task in scenario_a_tasks:
-        if user_node:
-            user_node.send_message(agent_id, f"TASK_REQUEST:{task}")
+    if user_node:
+        for agent_id, task in scenario_a_tasks:
             print(f"  → {agent_id.upper()}: {task}")
-    
-    # Allow time for task processing
-    time.sleep(3)
+        scatter_and_collect({agent_id: f"TASK_REQUEST:{task}" for agent_id, task in scenario_a_tasks})
     
     print("\nResult Collection Phase:")
     # Collect results from all agents
-    for agent_id, _ in scenario_a_tasks:
-        if user_node:
-            user_node.send_message(agent_id, "RESULT_REQUEST:Provide your analysis results")
-    
-    time.sleep(2)
+    if user_node:
+        scatter_and_collect({agent_id: "RESULT_REQUEST:Provide your analysis results"
+                             for agent_id, _ in scenario_a_tasks})
     
     # SCENARIO B: Secret Management Ecosystem Analysis
     print("\n🔐 SCENARIO B: Secret Management Ecosystem Analysis")
@@ -409,19 +438,42 @@ def demonstrate_complete_7_agent_ecosystem():
     ]
     
     # Distribute security analysis tasks
-    for agent_id, task in scenario_b_tasks:
-        if user_node:
-            user_node.send_message(agent_id, f"TASK_REQUEST:{task}")
+    if user_node:
+        for agent_id, task in scenario_b_tasks:
             print(f"  → {agent_id.upper()}: {task}")
-    
-    time.sleep(3)
+        scatter_and_collect({agent_id: f"TASK_REQUEST:{task}" for agent_id, task in scenario_b_tasks})
     
     print("\nResult Collection Phase:")
-    for agent_id, _ in scenario_b_tasks:
-        if user_node:
-            user_node.send_message(agent_id, "RESULT_REQUEST:Provide your security analysis")
-    
-    time.sleep(2)
+    if user_node:
+        scatter_and_collect({agent_id: "RESULT_REQUEST:Provide your security analysis"
+                             for agent_id, _ in scenario_b_tasks})
+    
+    # SCENARIO C: Capability-routed task (only matching agents are asked)
+    print("\n🧭 SCENARIO C: Capability-Routed Task Distribution")
+    
+    if user_node:
+        capability_router = CapabilityRouter(user_node, capability_index)
+        routed_task = "Run statistical modeling and prediction analysis"
+        print(f"Task: {routed_task}")
+        print(f"  Routed to: {', '.join(capability_index.candidates(routed_task)) or 'no capable agents'}")
+        routed_result = capability_router.request(routed_task, deadline=phase_deadline)
+        for agent_id, reply in routed_result.replies.items():
+            print(f"  ← {agent_id.upper()}: {reply.content}")
+    
+    # SCENARIO D: Load-balanced task queue (one task per agent at a time)
+    print("\n⚖️  SCENARIO D: Load-Balanced Task Queue")
+    
+    if user_node:
+        queued_tasks = ["Rotate auth tokens", "Triage open issues", "Run prediction analysis",
+                        "Validation of release testing", "Draw workflow diagrams", "Run prediction modeling",
+                        "Rotate staging secrets", "Regression analysis"]
+        for task in queued_tasks:
+            scheduled = scheduler.submit(task)
+            print(f"  → task {scheduled.task_id} ({task}) queued for {scheduled.assigned_to.upper()}")
+        time.sleep(phase_deadline / 2)
+        for agent_id, load in scheduler.get_load_report().items():
+            if load['completed']:
+                print(f"  ← {agent_id.upper()}: {load['completed']} completed, {load['stolen']} stolen")
     
     # 6. INTEGRATION WITH EXISTING MCP SERVERS
     print("\n6. 🔗 INTEGRATION WITH EXISTING MCP SERVERS")
@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+"""
+Subinterpreter Agent Runtime
+Runs agent groups in isolated subinterpreters of one process, each with its
+own GIL, so handlers of different groups run on separate cores without the
+startup and memory cost of worker processes. Groups exchange batched
+message frames over a shared-buffer channel: the sender writes a batch into
+a slot of a buffer every interpreter can see, and only the slot number
+crosses an interpreter queue. Where the interpreter has no isolated
+subinterpreters, groups run on threads of the main interpreter with the
+same channel.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import threading
+from collections import deque
+from dataclasses import dataclass
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from multi_agent_screen_network import Message
+from agent_context import HandlerRef, HostedNetwork, TransportAgentNode, current_agent, handler_path
+from loop_prevention_system import PathTrace
+
+try:
+    from concurrent import interpreters                      # Python 3.14+
+    create_queue = interpreters.create_queue
+    _QUEUE_MODULE = "concurrent.interpreters"
+except ImportError:
+    try:
+        # 3.13 with the PEP 734 backport: pip install interpreters-pep-734
+        from interpreters_backport import interpreters
+        from interpreters_backport.interpreters import queues as _queues
+        create_queue = _queues.create
+        _QUEUE_MODULE = "interpreters_backport.interpreters.queues"
+    except ImportError:
+        interpreters = None
+        create_queue = None
+        _QUEUE_MODULE = None
+
+SUBINTERPRETERS_AVAILABLE = interpreters is not None
+
+# Each endpoint's slab of outgoing batch slots; larger batches travel inline
+SLOT_SIZE = 64 * 1024
+SLOTS_PER_ENDPOINT = 32
+
+# Queue items drained per receive() before handling starts
+MAX_RECEIVE_BATCH = 256
+
+MAIN_ENDPOINT = 0
+
+class BufferChannel:
+    """One endpoint's view of the channel mesh shared by all interpreters
+
+    Every endpoint owns a slab of ``SLOT_SIZE`` slots in a shared buffer
+    and a queue of its free slots. ``send`` packs a batch of message frames
+    into a free slot and posts (sender, slot, length) to the receiver's
+    inbox; the receiver decodes straight out of the sender's slab and hands
+    the slot back. Batches larger than a slot, or sent while all slots are
+    in flight, travel inline. The queues carry the synchronization, so the
+    same code runs over interpreter queues or ``queue.Queue``.
+    """
+
+    def __init__(self, endpoint: int, inboxes: Tuple, slabs: Tuple, free_slots: Tuple):
+        self.endpoint = endpoint
+        self.inboxes = inboxes
+        self.slabs = slabs
+        self.free_slots = free_slots
+
+    def send(self, target: int, frames: List[str]):
+        data = "\n".join(frames).encode("utf-8")
+        if len(data) <= SLOT_SIZE:
+            try:
+                slot = self.free_slots[self.endpoint].get_nowait()
+            except queue.Empty:
+                pass
+            else:
+                start = slot * SLOT_SIZE
+                self.slabs[self.endpoint][start:start + len(data)] = data
+                self.inboxes[target].put(("slot", self.endpoint, slot, len(data)))
+                return
+        self.inboxes[target].put(("inline", data))
+
+    def send_control(self, target: int, payload: Tuple):
+        self.inboxes[target].put(payload)
+
+    def receive(self, timeout: Optional[float]) -> List[Tuple]:
+        """Payloads waiting in this endpoint's inbox; waits up to ``timeout`` for the first
+
+        Frames come back as ("deliver", Message); control payloads as sent.
+        """
+        inbox = self.inboxes[self.endpoint]
+        items = []
+        try:
+            items.append(inbox.get(timeout=timeout) if timeout else inbox.get_nowait())
+            while len(items) < MAX_RECEIVE_BATCH:
+                items.append(inbox.get_nowait())
+        except queue.Empty:
+            pass
+
+        payloads = []
+        for item in items:
+            kind = item[0]
+            if kind == "slot":
+                _, sender, slot, length = item
+                start = slot * SLOT_SIZE
+                text = str(self.slabs[sender][start:start + length], "utf-8")
+                self.free_slots[sender].put(slot)
+            elif kind == "inline":
+                text = item[1].decode("utf-8")
+            else:
+                payloads.append(item)
+                continue
+            payloads.extend(("deliver", Message.from_json(frame)) for frame in text.split("\n"))
+        return payloads
+
+def open_channel(n_endpoints: int, make_queue: Callable[[], Any]) -> Tuple[Tuple, Tuple, Tuple, List[bytearray]]:
+    """(inboxes, slabs, free_slots, buffers) for ``n_endpoints``; keep ``buffers`` alive while in use"""
+    buffers = [bytearray(SLOT_SIZE * SLOTS_PER_ENDPOINT) for _ in range(n_endpoints)]
+    inboxes = tuple(make_queue() for _ in range(n_endpoints))
+    free_slots = tuple(make_queue() for _ in range(n_endpoints))
+    for slots in free_slots:
+        for slot in range(SLOTS_PER_ENDPOINT):
+            slots.put(slot)
+    return inboxes, tuple(memoryview(buffer) for buffer in buffers), free_slots, buffers
+
+class ChannelTransport:
+    """Routes messages to the endpoint that hosts the recipient
+
+    With ``batching`` on, frames collect per endpoint until ``flush``, so a
+    group sends everything one round of handlers produced in a single slot.
+    """
+
+    def __init__(self, routes: Dict[str, int], channel: BufferChannel,
+                 local_delivery: Callable[[Message], None], batching: bool = False):
+        self.routes = routes                  # agent_id -> endpoint
+        self.channel = channel
+        self.local_delivery = local_delivery
+        self.batching = batching
+        self._pending: Dict[int, List[str]] = {}
+
+    def deliver(self, message: Message) -> bool:
+        endpoint = self.routes.get(message.recipient)
+        if endpoint is None:
+            return False
+        if endpoint == self.channel.endpoint:
+            self.local_delivery(message)
+        elif self.batching:
+            self._pending.setdefault(endpoint, []).append(message.to_json())
+        else:
+            self.channel.send(endpoint, [message.to_json()])
+        return True
+
+    def flush(self):
+        pending, self._pending = self._pending, {}
+        for endpoint, frames in pending.items():
+            self.channel.send(endpoint, frames)
+
+def _group_main(config: str, inboxes: Tuple, slabs: Tuple, free_slots: Tuple):
+    """Entry point of an agent group, in a subinterpreter or a thread: host its agents until told to stop"""
+
+    settings = json.loads(config)
+    group_id = settings['group']
+    routes = settings['routes']
+    stats_interval = settings['stats_interval']
+
+    channel = BufferChannel(group_id + 1, inboxes, slabs, free_slots)
+    local_queue = deque()
+    transport = ChannelTransport(routes, channel, local_queue.append, batching=True)
+    network = HostedNetwork([agent for agent, endpoint in routes.items() if endpoint != MAIN_ENDPOINT],
+                            settings['path_trace'])
+
+    nodes = {}
+    for agent_id, agent_handlers in settings['handlers'].items():
+        node = TransportAgentNode(agent_id, network, transport)
+        node.message_handlers.update({message_type: HandlerRef(path) for message_type, path in agent_handlers.items()})
+        node.start()
+        nodes[agent_id] = node
+
+    processed = 0
+    running = True
+    next_stats = 0.0
+
+    def deliver(message: Message):
+        nonlocal processed
+        node = nodes.get(message.recipient)
+        if node is None:
+            transport.deliver(message)
+            return
+        node._handle_message(message)
+        processed += 1
+
+    try:
+        while running:
+            now = time.monotonic()
+            if now >= next_stats:
+                channel.send_control(MAIN_ENDPOINT, ("stats", group_id, processed))
+                for node in nodes.values():
+                    node._expire_pending_requests()
+                next_stats = now + stats_interval
+
+            for payload in channel.receive(max(0.0, next_stats - time.monotonic())):
+                kind = payload[0]
+                if kind == "deliver":
+                    deliver(payload[1])
+                elif kind == "register":
+                    _, agent_id, message_type, path = payload
+                    nodes[agent_id].register_message_handler(message_type, HandlerRef(path))
+                elif kind == "stop":
+                    running = False
+
+            while local_queue:
+                deliver(local_queue.popleft())
+            transport.flush()
+    finally:
+        for node in nodes.values():
+            node.stop()
+        channel.send_control(MAIN_ENDPOINT, ("stats", group_id, processed))
+
+# Runs inside a fresh subinterpreter; config and channel parts arrive through prepare_main()
+_GROUP_BOOTSTRAP = """
+import json, sys
+sys.path[:0] = [path for path in json.loads(config)['sys_path'] if path not in sys.path]
+from agent_context import HandlerRef
+HandlerRef(json.loads(config)['entry']).resolve()(config, inboxes, slabs, free_slots)
+"""
+
+@dataclass
+class GroupState:
+    """Manager's view of one agent group"""
+    group_id: int
+    agents: List[str]
+    thread: Any = None
+    interpreter_id: Optional[int] = None
+    processed: int = 0
+    restarts: int = 0
+    status: str = "stopped"     # starting, running, failed, stopped
+    error: Optional[str] = None
+
+class GroupAgentHandle(TransportAgentNode):
+    """Main-interpreter handle for an agent that lives in a group
+
+    Handlers registered here are stored as import paths, since nothing else
+    can cross into a subinterpreter. Messages sent through the handle go
+    out under the agent's name; requests must come from the user node or
+    from inside a handler, because replies are delivered to the group.
+    """
+
+    def __init__(self, agent_id: str, network_manager: 'SubinterpreterNetworkManager'):
+        super().__init__(agent_id, network_manager, network_manager.transport)
+
+    def register_message_handler(self, message_type: str, handler: Union[str, Callable[[Message], None]]):
+        path = handler_path(handler)
+        super().register_message_handler(message_type, HandlerRef(path))
+        self.network_manager._handler_registered(self.agent_id, message_type, path)
+
+    def send_request(self, recipient: str, content: str, timeout: Optional[float] = 30.0,
+                     message_type: str = "text", metadata: Dict = None) -> Future:
+        raise RuntimeError(f"Replies to {self.agent_id} go to its agent group; "
+                           f"send requests from the user node or from inside a handler")
+
+class SubinterpreterNetworkManager:
+    """MultiAgentNetworkManager counterpart that runs agent groups in subinterpreters
+
+    ``add_agent``/``add_user``/``register_message_handler`` work as in
+    ``ProcessNetworkManager``; agents are placed in ``n_groups`` groups
+    round-robin, with ``add_agent(agent_id, group=...)``, or from a
+    partition with ``place_agents``. ``mode`` is "subinterpreter", "thread"
+    (same channel, one shared GIL) or "auto", which picks subinterpreters
+    when the interpreter has them. A group whose loop dies is restarted in
+    a fresh interpreter up to ``max_restarts`` times; queued messages wait
+    for it.
+    """
+
+    def __init__(self, n_groups: Optional[int] = None, mode: str = "auto",
+                 stats_interval: float = 1.0, max_restarts: int = 3, path_trace: Optional[PathTrace] = None):
+        if mode == "auto":
+            mode = "subinterpreter" if SUBINTERPRETERS_AVAILABLE else "thread"
+        if mode not in ("subinterpreter", "thread"):
+            raise ValueError(f"Unknown mode {mode!r}; use 'subinterpreter', 'thread' or 'auto'")
+        if mode == "subinterpreter" and not SUBINTERPRETERS_AVAILABLE:
+            raise RuntimeError(f"Python {sys.version_info.major}.{sys.version_info.minor} has no isolated "
+                               f"subinterpreters (3.14+, or 3.13 with the interpreters-pep-734 package); "
+                               f"use mode='thread' or ProcessNetworkManager")
+
+        self.n_groups = n_groups or os.cpu_count() or 1
+        self.mode = mode
+        self.stats_interval = stats_interval
+        self.max_restarts = max_restarts
+
+        self.agents: Dict[str, GroupAgentHandle] = {}
+        self.user_node: Optional[TransportAgentNode] = None
+        self.handler_executor = None          # User handlers run on the dispatcher thread
+        self.path_trace = path_trace          # Groups get a copy with the same settings
+        self.placement: Dict[str, int] = {}
+        self.routes: Dict[str, int] = {}
+        self.groups: List[GroupState] = []
+
+        make_queue = create_queue if mode == "subinterpreter" else queue.Queue
+        *self._channel_parts, self._buffers = open_channel(self.n_groups + 1, make_queue)
+        self.channel = BufferChannel(MAIN_ENDPOINT, *self._channel_parts)
+        self.transport = ChannelTransport(self.routes, self.channel, self._deliver_local)
+
+        self.running = False
+        self._stopping = False
+        self._lock = threading.Lock()
+        self._dispatcher_thread = None
+
+    def add_agent(self, agent_id: str, group: Optional[int] = None) -> GroupAgentHandle:
+        """Add an agent, optionally pinned to a group index"""
+        if self.running:
+            raise RuntimeError("Agents must be added before start_network()")
+        if agent_id in self.agents or (self.user_node and self.user_node.agent_id == agent_id):
+            raise ValueError(f"Agent {agent_id} already exists")
+
+        node = GroupAgentHandle(agent_id, self)
+        self.agents[agent_id] = node
+        if group is not None:
+            self.placement[agent_id] = group % self.n_groups
+        return node
+
+    def add_user(self, user_id: str = "user") -> TransportAgentNode:
+        """Add the user node; it lives in the main interpreter"""
+        self.user_node = TransportAgentNode(user_id, self, self.transport)
+        return self.user_node
+
+    def place_agents(self, partition: 'AgentPartition'):
+        """Put each agent in the group matching its shard (see agent_partitioner)"""
+        for agent, shard in zip(partition.agents, partition.assignment.tolist()):
+            if agent in self.agents:
+                self.placement[agent] = shard % self.n_groups
+
+    def _plan_groups(self):
+        unplaced = [agent for agent in self.agents if agent not in self.placement]
+        for i, agent in enumerate(unplaced):
+            self.placement[agent] = i % self.n_groups
+
+        self.groups = []
+        for group_id in range(self.n_groups):
+            members = [agent for agent in self.agents if self.placement[agent] == group_id]
+            self.groups.append(GroupState(group_id, members))
+            for agent in members:
+                self.routes[agent] = group_id + 1
+
+        if self.user_node:
+            self.routes[self.user_node.agent_id] = MAIN_ENDPOINT
+
+    def _group_config(self, group: GroupState) -> str:
+        """Everything a group needs, as JSON: only plain strings cross into a subinterpreter"""
+        return json.dumps({
+            'group': group.group_id,
+            'entry': handler_path(_group_main),
+            'routes': self.routes,
+            'handlers': {agent: {message_type: handler_path(handler)
+                                 for message_type, handler in self.agents[agent].message_handlers.items()}
+                         for agent in group.agents},
+            'stats_interval': self.stats_interval,
+            'path_trace': self.path_trace.settings() if self.path_trace else None,
+            'sys_path': sys.path,
+        })
+
+    def start_network(self, ready_timeout: float = 30.0):
+        """Start every agent group and the dispatcher for the user node"""
+        self._plan_groups()
+        self.running = True
+        self._stopping = False
+
+        if self.user_node:
+            self.user_node.start()
+        for node in self.agents.values():
+            node.running = True
+
+        self._dispatcher_thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher_thread.start()
+
+        for group in self.groups:
+            if group.agents:
+                group.status = "starting"
+                group.thread = threading.Thread(target=self._run_group, args=(group,),
+                                                name=f"agent-group-{group.group_id}", daemon=True)
+                group.thread.start()
+
+        # Each group reports once its agents are loaded
+        deadline = time.monotonic() + ready_timeout
+        while any(g.status == "starting" for g in self.groups) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        active = sum(1 for g in self.groups if g.agents)
+        where = "subinterpreters" if self.mode == "subinterpreter" else "threads"
+        print(f"Network started with {len(self.agents)} agents in {active} {where}" +
+              (" and 1 user" if self.user_node else ""))
+
+    def _run_group(self, group: GroupState):
+        """Host one group until it is stopped, restarting it if its loop dies"""
+        while True:
+            try:
+                if self.mode == "subinterpreter":
+                    self._run_in_subinterpreter(group)
+                else:
+                    _group_main(self._group_config(group), *self._channel_parts)
+                return
+            except Exception as e:
+                reason = str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+                if self._stopping:
+                    return
+                if group.restarts >= self.max_restarts:
+                    group.status, group.error = "failed", reason
+                    print(f"Group {group.group_id} died ({reason}); restart limit reached, agents "
+                          f"{', '.join(group.agents)} are offline")
+                    return
+                group.restarts += 1
+                print(f"Group {group.group_id} died ({reason}); restarting ({group.restarts}/{self.max_restarts})")
+
+    def _run_in_subinterpreter(self, group: GroupState):
+        interpreter = interpreters.create()
+        group.interpreter_id = interpreter.id
+        try:
+            interpreter.exec(f"import {_QUEUE_MODULE}")    # Queues can only cross once their module is loaded
+            inboxes, slabs, free_slots = self._channel_parts
+            interpreter.prepare_main(config=self._group_config(group), inboxes=inboxes,
+                                     slabs=slabs, free_slots=free_slots)
+            interpreter.exec(_GROUP_BOOTSTRAP)
+        finally:
+            interpreter.close()
+
+    def stop_network(self, timeout: float = 5.0):
+        """Stop every group, then the dispatcher"""
+        self._stopping = True
+        for group in self.groups:
+            if group.thread is not None and group.thread.is_alive():
+                self.channel.send_control(group.group_id + 1, ("stop",))
+        for group in self.groups:
+            if group.thread is not None:
+                group.thread.join(timeout)
+            if group.status != "failed":
+                group.status = "stopped"
+
+        self.running = False
+        if self._dispatcher_thread:
+            self._dispatcher_thread.join(timeout=2)
+        for payload in self.channel.receive(None):    # Final counts sent as the groups exited
+            self._process(payload)
+
+        if self.user_node:
+            self.user_node.stop()
+        for node in self.agents.values():
+            node.running = False
+        print("Network stopped")
+
+    def _deliver_local(self, message: Message):
+        if self.user_node and message.recipient == self.user_node.agent_id:
+            self.user_node._handle_message(message)
+
+    def _process(self, payload: Tuple):
+        kind = payload[0]
+        if kind == "deliver":
+            self._deliver_local(payload[1])
+        elif kind == "stats":
+            _, group_id, processed = payload
+            group = self.groups[group_id]
+            with self._lock:
+                group.processed = processed
+                if group.status == "starting":
+                    group.status = "running"
+
+    def _dispatch_loop(self):
+        """Messages for the user node plus group statistics"""
+        while self.running:
+            for payload in self.channel.receive(0.1):
+                self._process(payload)
+            if self.user_node:
+                self.user_node._expire_pending_requests()
+
+    def _handler_registered(self, agent_id: str, message_type: str, path: str):
+        """Forward a handler registered after start to the agent's group"""
+        if not self.running:
+            return
+        self.channel.send_control(self.placement[agent_id] + 1, ("register", agent_id, message_type, path))
+
+    def get_network_status(self) -> Dict[str, Any]:
+        """Status of all nodes plus per-group health"""
+        status = {
+            'agents': {},
+            'user': None,
+            'total_agents': len(self.agents),
+            'network_running': self.running,
+            'mode': self.mode,
+            'groups': {},
+        }
+
+        for group in self.groups:
+            with self._lock:
+                status['groups'][group.group_id] = {
+                    'status': group.status,
+                    'interpreter': group.interpreter_id,
+                    'agents': list(group.agents),
+                    'processed': group.processed,
+                    'restarts': group.restarts,
+                    'error': group.error,
+                }
+
+        for agent_id in self.agents:
+            group = self.groups[self.placement[agent_id]] if self.groups else None
+            status['agents'][agent_id] = {
+                'running': bool(group and group.status == "running"),
+                'group': self.placement.get(agent_id),
+            }
+
+        if self.user_node:
+            status['user'] = {
+                'id': self.user_node.agent_id,
+                'running': self.user_node.running
+            }
+
+        return status
+
+    def broadcast_to_all(self, sender_id: str, message: str):
+        """Broadcast a message from one node to all others"""
+        if sender_id in self.agents:
+            self.agents[sender_id].broadcast_message(message)
+        elif self.user_node and sender_id == self.user_node.agent_id:
+            self.user_node.broadcast_message(message)
+
+def cpu_bound_handler(message: Message):
+    """Demo handler: burn CPU proportional to the request, then reply with the result"""
+    total = 0
+    for i in range(int(message.content)):
+        total += i * i % 7
+    current_agent().reply(message, str(total))
+
+def demonstrate_subinterpreter_runtime():
+    """Start-up cost and CPU-bound throughput of a few hundred small agents, threads versus subinterpreters"""
+
+    print("SUBINTERPRETER AGENT RUNTIME")
+    print("=" * 28)
+
+    cores = os.cpu_count() or 1
+
+    def run(mode: str, n_agents: int = 200, n_requests: int = 64, work: int = 100_000) -> float:
+        network = SubinterpreterNetworkManager(n_groups=max(2, cores), mode=mode)
+        user = network.add_user()
+        agents = [network.add_agent(f"agent{i}") for i in range(n_agents)]
+        for agent in agents:
+            agent.register_message_handler("text", cpu_bound_handler)
+
+        started = time.perf_counter()
+        network.start_network()
+        startup = time.perf_counter() - started
+
+        started = time.perf_counter()
+        futures = [user.send_request(agents[i % n_agents].agent_id, str(work), timeout=120)
+                   for i in range(n_requests)]
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - started
+
+        network.stop_network()
+        processed = {g: info['processed'] for g, info in network.get_network_status()['groups'].items()}
+        print(f"  {mode}: start {startup * 1000:.0f} ms, {n_requests / elapsed:.1f} requests/s, "
+              f"processed per group {processed}")
+        return elapsed
+
+    threaded = run("thread")
+    if not SUBINTERPRETERS_AVAILABLE:
+        print("No isolated subinterpreters on this Python (3.14+, or 3.13 with interpreters-pep-734); "
+              "groups ran on threads")
+        return
+    isolated = run("subinterpreter")
+    if cores > 1:
+        print(f"Speedup from per-group GILs: {threaded / isolated:.2f}x")
+    else:
+        print("Only one core available; run on a multi-core machine to see scaling")
+
+if __name__ == "__main__":
+    demonstrate_subinterpreter_runtime()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Load-Aware Task Scheduler with Work Stealing
+Tracks in-flight work per agent from TASK_ACCEPTED/RESULT traffic, assigns
+tasks to the least-loaded capable agent and lets idle agents steal queued work
+"""
+
+import threading
+import itertools
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set
+from dataclasses import dataclass, field
+
+from multi_agent_screen_network import AgentCommunicationNode, Message
+
+@dataclass
+class ScheduledTask:
+    """A task waiting for, or running on, an agent"""
+    task_id: int
+    content: str
+    capable_agents: Set[str]
+    assigned_to: Optional[str] = None
+    stolen_from: Optional[str] = None
+
+@dataclass
+class AgentLoad:
+    """Load bookkeeping for one agent"""
+    agent_id: str
+    in_flight: List[int] = field(default_factory=list)   # task_ids dispatched or accepted
+    queue: Deque[int] = field(default_factory=deque)      # task_ids waiting for this agent
+    completed: int = 0
+    stolen: int = 0
+
+    @property
+    def load(self) -> int:
+        return len(self.in_flight) + len(self.queue)
+
+class LoadAwareScheduler:
+    """Assigns tasks to the least-loaded capable agent with work stealing
+
+    Each agent runs at most ``max_in_flight`` tasks at once. Extra tasks are
+    queued on the least-loaded capable agent. When an agent finishes a task
+    (a RESULT message), it takes the next task from its own queue or, if that
+    queue is empty, steals the oldest compatible task from the most loaded
+    agent. The same happens when an agent joins or reports ``IDLE``.
+    ``dispatch`` is called to actually hand a task to an agent; by default it
+    sends ``TASK_REQUEST:<content>`` from the coordinating node with the task
+    ID in the metadata. Agents must echo that ``task_id``: replies without
+    one, or for tasks the scheduler is not tracking, are ignored.
+    """
+
+    def __init__(self, agents: List[str], max_in_flight: int = 1,
+                 node: Optional[AgentCommunicationNode] = None,
+                 dispatch: Optional[Callable[[str, ScheduledTask], None]] = None,
+                 capabilities: Optional[Callable[[str], List[str]]] = None):
+        if dispatch is None and node is None:
+            raise ValueError("Either a coordinating node or a dispatch callable is required")
+
+        self.max_in_flight = max_in_flight
+        self.node = node
+        self.dispatch = dispatch or self._send_task_request
+        self.capabilities = capabilities   # task content -> capable agent IDs
+
+        self.loads: Dict[str, AgentLoad] = {agent_id: AgentLoad(agent_id) for agent_id in agents}
+        self.tasks: Dict[int, ScheduledTask] = {}
+        self._task_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _send_task_request(self, agent_id: str, task: ScheduledTask):
+        self.node.send_message(agent_id, f"TASK_REQUEST:{task.content}",
+                               metadata={'task_id': task.task_id})
+
+    def add_agent(self, agent_id: str):
+        """Track a new agent and let it steal queued work it can run"""
+        with self._lock:
+            self.loads.setdefault(agent_id, AgentLoad(agent_id))
+        self._pull_work(agent_id)
+
+    def submit(self, content: str, capable_agents: Optional[List[str]] = None) -> ScheduledTask:
+        """Schedule a task on the least-loaded capable agent"""
+        if capable_agents is None:
+            capable_agents = self.capabilities(content) if self.capabilities else list(self.loads)
+
+        candidates = {agent_id for agent_id in capable_agents if agent_id in self.loads}
+        if not candidates:
+            raise ValueError(f"No known agent can run task: {content}")
+
+        to_dispatch = None
+        with self._lock:
+            # Agents that join later may still steal it
+            task = ScheduledTask(next(self._task_ids), content, set(capable_agents))
+            self.tasks[task.task_id] = task
+
+            # Ties broken by agent ID so assignment is deterministic
+            target = min(candidates, key=lambda a: (self.loads[a].load, a))
+            load = self.loads[target]
+            task.assigned_to = target
+
+            if len(load.in_flight) < self.max_in_flight:
+                load.in_flight.append(task.task_id)
+                to_dispatch = (target, task)
+            else:
+                load.queue.append(task.task_id)
+
+        # Send outside the lock; dispatch may block on I/O
+        if to_dispatch:
+            self.dispatch(*to_dispatch)
+        return task
+
+    def task_accepted(self, agent_id: str, task_id: int) -> bool:
+        """Check a TASK_ACCEPTED against the dispatched task; False if it is not tracked
+
+        Dispatched tasks already count as load, so an accept changes nothing.
+        """
+        with self._lock:
+            load = self.loads.get(agent_id)
+            return load is not None and task_id in load.in_flight
+
+    def task_declined(self, agent_id: str, task_id: int):
+        """Record a TASK_DECLINED: the agent is free again and the task is rescheduled elsewhere"""
+        task = None
+        with self._lock:
+            load = self.loads.get(agent_id)
+            if load and task_id in load.in_flight:
+                load.in_flight.remove(task_id)
+                task = self.tasks.pop(task_id, None)
+
+        if task:
+            task.capable_agents.discard(agent_id)
+            if task.capable_agents & set(self.loads):
+                self.submit(task.content, list(task.capable_agents))
+            else:
+                print(f"[scheduler] Task {task.task_id} declined by every capable agent: {task.content}")
+        self._pull_work(agent_id)
+
+    def task_completed(self, agent_id: str, task_id: int):
+        """Record a RESULT and hand the agent its next task (own queue first, then steal)"""
+        with self._lock:
+            load = self.loads.get(agent_id)
+            if not load or task_id not in load.in_flight:
+                return    # Not a task this scheduler handed out
+
+            load.in_flight.remove(task_id)
+            load.completed += 1
+            self.tasks.pop(task_id, None)
+
+        self._pull_work(agent_id)
+
+    def agent_idle(self, agent_id: str):
+        """Record an IDLE report: fill the agent's free slots"""
+        if agent_id in self.loads:
+            self._pull_work(agent_id)
+
+    def _pull_work(self, agent_id: str):
+        """Fill an agent's free slots from its own queue or by stealing"""
+        while True:
+            with self._lock:
+                load = self.loads[agent_id]
+                if len(load.in_flight) >= self.max_in_flight:
+                    return
+
+                task = None
+                if load.queue:
+                    task = self.tasks[load.queue.popleft()]
+                else:
+                    task = self._steal_for(agent_id)
+
+                if task is None:
+                    return
+
+                task.assigned_to = agent_id
+                load.in_flight.append(task.task_id)
+
+            self.dispatch(agent_id, task)
+
+    def _steal_for(self, thief: str) -> Optional[ScheduledTask]:
+        """Take the oldest queued task the thief can run from the most loaded agent (lock held)"""
+        victims = sorted((l for l in self.loads.values() if l.agent_id != thief and l.queue),
+                         key=lambda l: -l.load)
+
+        for victim in victims:
+            for task_id in victim.queue:
+                task = self.tasks[task_id]
+                if thief in task.capable_agents:
+                    victim.queue.remove(task_id)
+                    task.stolen_from = victim.agent_id
+                    self.loads[thief].stolen += 1
+                    return task
+
+        return None
+
+    def observe(self, message: Message):
+        """Update load from an agent's TASK_ACCEPTED / TASK_DECLINED / RESULT / IDLE message"""
+        task_id = (message.metadata or {}).get('task_id')
+        content = message.content.lstrip()
+
+        if content.startswith("IDLE"):
+            self.agent_idle(message.sender)
+        elif task_id is None:
+            return
+        elif content.startswith("TASK_ACCEPTED:"):
+            self.task_accepted(message.sender, task_id)
+        elif content.startswith("TASK_DECLINED:"):
+            self.task_declined(message.sender, task_id)
+        elif content.startswith("RESULT:"):
+            self.task_completed(message.sender, task_id)
+
+    def as_handler(self, next_handler: Optional[Callable[[Message], None]] = None) -> Callable[[Message], None]:
+        """Handler for the coordinating node: observe load, then pass the message on"""
+        def handler(message: Message):
+            self.observe(message)
+            if next_handler:
+                next_handler(message)
+        return handler
+
+    def get_load_report(self) -> Dict[str, Dict[str, int]]:
+        """In-flight, queued, completed and stolen counts per agent"""
+        with self._lock:
+            return {
+                agent_id: {
+                    'in_flight': len(load.in_flight),
+                    'queued': len(load.queue),
+                    'completed': load.completed,
+                    'stolen': load.stolen
+                }
+                for agent_id, load in self.loads.items()
+            }
+
+def demonstrate_task_scheduler():
+    """Show balancing and stealing on an uneven workload without screen sessions"""
+
+    print("LOAD-AWARE TASK SCHEDULER")
+    print("=" * 30)
+
+    dispatched = []
+    scheduler = LoadAwareScheduler(
+        ["agent1", "agent2", "agent3"],
+        max_in_flight=1,
+        dispatch=lambda agent_id, task: dispatched.append((agent_id, task.task_id))
+    )
+
+    # Six tasks only agent1/agent2 can run, one any agent can run
+    for i in range(6):
+        scheduler.submit(f"analysis part {i}", ["agent1", "agent2"])
+    scheduler.submit("general task")
+
+    print(f"Initial dispatch: {dispatched}")
+    print(f"Load: {scheduler.get_load_report()}")
+
+    def finish(agent_id: str):
+        running = next(task_id for dispatched_to, task_id in reversed(dispatched) if dispatched_to == agent_id)
+        scheduler.task_completed(agent_id, running)
+
+    # agent3 finishes its general task and steals nothing (it cannot run analysis)
+    finish("agent3")
+    # agent2 finishes and takes queued analysis work
+    finish("agent2")
+    finish("agent2")
+    finish("agent2")
+
+    # A new agent that can run analysis steals from the longest queue as it joins
+    scheduler.submit("analysis part 6", ["agent1", "agent2", "agent4"])
+    scheduler.add_agent("agent4")
+
+    print(f"After completions: {dispatched}")
+    print(f"Load: {scheduler.get_load_report()}")
+
+if __name__ == "__main__":
+    demonstrate_task_scheduler()
@@ -0,0 +1,1125 @@
+#!/usr/bin/env python3
+"""
+TCP Transport and Agent Broker
+Lets one logical agent network span several hosts. A small broker process
+maps agent IDs to the node that hosts them; nodes look routes up once and
+cache them. Messages between nodes go over persistent pooled TCP
+connections: sends are pipelined onto a per-connection queue, and a writer
+thread packs whatever has queued up into one length-prefixed batch frame.
+Every connection, to the broker or between nodes, starts with a mutual
+HMAC challenge on a shared authkey; nothing else is read from a peer that
+fails it.
+"""
+
+import os
+import sys
+import hmac
+import json
+import time
+import zlib
+import queue
+import select
+import socket
+import struct
+import uuid
+import threading
+import socketserver
+import multiprocessing
+from multiprocessing import AuthenticationError
+from collections import deque
+from dataclasses import dataclass, field
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from multi_agent_screen_network import Message
+from conversation_executor import ConversationOrderedExecutor, conversation_id
+from agent_context import HandlerRef, TransportAgentNode, current_agent, handler_path
+from loop_prevention_system import LoopPreventionManager, PathTrace
+
+FRAME_HEADER = struct.Struct("!I")
+
+# Lines of a batch frame that carry node-to-node control requests instead of a message
+CONTROL_PREFIX = "!"
+
+# Out-of-order sequence numbers a delivery watermark holds before skipping the gap
+MAX_SEQUENCE_GAP = 1024
+
+# Upper bound on one batch frame; a writer starts a new frame past this
+MAX_FRAME_BYTES = 1 << 20
+
+CONNECT_TIMEOUT = 2.0
+
+# How long a writer keeps reconnecting before handing its batch back for re-routing
+RECONNECT_TIMEOUT = 5.0
+
+# The shared secret when none is passed in
+AUTHKEY_ENV = "AGENT_NETWORK_AUTHKEY"
+CHALLENGE_BYTES = 32
+
+Address = Tuple[str, int]
+
+def write_frame(stream, payload: bytes):
+    stream.write(FRAME_HEADER.pack(len(payload)) + payload)
+
+def read_frame(stream) -> Optional[bytes]:
+    """Next frame from a buffered binary stream, or None at end of stream"""
+    header = stream.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        return None
+    (length,) = FRAME_HEADER.unpack(header)
+    payload = stream.read(length)
+    return payload if len(payload) == length else None
+
+def resolve_authkey(authkey: Optional[bytes] = None) -> bytes:
+    """The network's shared secret: ``authkey``, or else $AGENT_NETWORK_AUTHKEY"""
+    if authkey is None and os.environ.get(AUTHKEY_ENV):
+        authkey = os.environ[AUTHKEY_ENV].encode()
+    if not authkey:
+        raise ValueError(f"A shared authkey is required; pass authkey= or set {AUTHKEY_ENV}")
+    return authkey
+
+def _proof(authkey: bytes, challenge: bytes) -> bytes:
+    return hmac.new(authkey, b"agent-network:" + challenge, "sha256").digest()
+
+def accept_handshake(reader, writer, authkey: bytes):
+    """Accepting side: the peer proves it holds the authkey, then we prove it back
+
+    Raises AuthenticationError before any request or message is read from
+    a peer without the key. The key authenticates connections, it does not
+    encrypt them: use TLS or a private network between untrusted hosts.
+    """
+    challenge = os.urandom(CHALLENGE_BYTES)
+    write_frame(writer, challenge)
+    writer.flush()
+    answer = read_frame(reader)
+    if (answer is None or len(answer) != 2 * CHALLENGE_BYTES
+            or not hmac.compare_digest(answer[:CHALLENGE_BYTES], _proof(authkey, challenge))):
+        raise AuthenticationError("Peer failed the authkey challenge")
+    write_frame(writer, _proof(authkey, answer[CHALLENGE_BYTES:]))
+    writer.flush()
+
+def connect_handshake(reader, writer, authkey: bytes):
+    """Connecting side of ``accept_handshake``"""
+    challenge = read_frame(reader)
+    if challenge is None:
+        raise ConnectionError("Connection closed during the handshake")
+    own_challenge = os.urandom(CHALLENGE_BYTES)
+    write_frame(writer, _proof(authkey, challenge) + own_challenge)
+    writer.flush()
+    answer = read_frame(reader)
+    if answer is None or not hmac.compare_digest(answer, _proof(authkey, own_challenge)):
+        raise AuthenticationError("Remote end failed the authkey challenge")
+
+class AgentBroker(socketserver.ThreadingTCPServer):
+    """Registry of which node hosts which agent
+
+    Speaks JSON requests in length-prefixed frames over persistent
+    connections: register, unregister, move, lookup and table. A node is
+    unregistered when the connection it registered over closes, so a
+    crashed node's agents stop resolving. Clients must pass the authkey
+    handshake first.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, authkey: Optional[bytes] = None):
+        self.authkey = resolve_authkey(authkey)
+        super().__init__((host, port), _BrokerHandler)
+        self.routes: Dict[str, str] = {}             # agent_id -> node_id
+        self.nodes: Dict[str, Address] = {}          # node_id -> (host, port)
+        self._lock = threading.Lock()
+
+    def process(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        with self._lock:
+            if op == "register":
+                node = request["node"]
+                taken = [agent for agent in request.get("agents", [])
+                         if self.routes.get(agent, node) != node]
+                if taken:
+                    return {'ok': False, 'error': f"Agents already hosted elsewhere: {', '.join(taken)}"}
+                self.nodes[node] = tuple(request["address"])
+                for agent in request.get("agents", []):
+                    self.routes[agent] = node
+                return {'ok': True}
+
+            if op == "unregister":
+                node = request["node"]
+                self.nodes.pop(node, None)
+                self.routes = {agent: owner for agent, owner in self.routes.items() if owner != node}
+                return {'ok': True}
+
+            if op == "move":
+                if request["node"] not in self.nodes:
+                    return {'ok': False, 'error': f"Unknown node {request['node']}"}
+                self.routes[request["agent"]] = request["node"]
+                return {'ok': True}
+
+            if op == "lookup":
+                return {'ok': True, 'routes': {agent: self._address_of(agent) for agent in request["agents"]}}
+
+            if op == "table":
+                return {'ok': True, 'routes': dict(self.routes), 'nodes': dict(self.nodes)}
+
+        return {'ok': False, 'error': f"Unknown operation {op!r}"}
+
+    def _address_of(self, agent: str) -> Optional[Address]:
+        node = self.routes.get(agent)
+        return self.nodes.get(node) if node else None
+
+class _BrokerHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        registered = set()
+        try:
+            self.connection.settimeout(CONNECT_TIMEOUT)
+            accept_handshake(self.rfile, self.wfile, self.server.authkey)
+            self.connection.settimeout(None)
+        except (OSError, AuthenticationError) as e:
+            print(f"Broker refused {self.client_address[0]}:{self.client_address[1]}: {e}")
+            return
+        try:
+            while True:
+                payload = read_frame(self.rfile)
+                if payload is None:
+                    return
+                try:
+                    request = json.loads(payload)
+                    response = self.server.process(request)
+                except (KeyError, TypeError, ValueError) as e:
+                    request, response = {}, {'ok': False, 'error': f"Malformed request: {e}"}
+                if request.get("op") == "register" and response.get('ok'):
+                    registered.add(request["node"])
+                elif request.get("op") == "unregister":
+                    registered.discard(request["node"])
+                write_frame(self.wfile, json.dumps(response).encode())
+        except OSError:
+            return
+        finally:
+            for node in registered:
+                self.server.process({'op': "unregister", 'node': node})
+
+def run_broker(host: str = "127.0.0.1", port: int = 0, ready: Optional[Any] = None,
+               authkey: Optional[bytes] = None):
+    """Serve a broker until killed; puts the bound address on ``ready`` if given"""
+    broker = AgentBroker(host, port, authkey)
+    if ready is not None:
+        ready.put(broker.server_address[:2])
+    broker.serve_forever()
+
+def start_broker_process(host: str = "127.0.0.1", port: int = 0,
+                         authkey: Optional[bytes] = None) -> Tuple[multiprocessing.Process, Address]:
+    """Run a broker in its own process; returns the process and its address"""
+    context = multiprocessing.get_context("spawn")
+    ready = context.Queue()
+    process = context.Process(target=run_broker, args=(host, port, ready, resolve_authkey(authkey)),
+                              name="agent-broker", daemon=True)
+    process.start()
+    return process, tuple(ready.get(timeout=30))
+
+class BrokerClient:
+    """One persistent connection to the broker, reopened once if it breaks
+
+    Registrations are tied to the connection, so ``registration()`` is
+    asked for the node's current registration and replayed on a new one.
+    """
+
+    def __init__(self, address: Address, authkey: bytes,
+                 registration: Optional[Callable[[], Optional[Dict[str, Any]]]] = None):
+        self.address = tuple(address)
+        self.authkey = authkey
+        self.registration = registration
+        self._socket = None
+        self._stream = None
+        self._lock = threading.Lock()
+
+    def request(self, op: str, **fields) -> Dict[str, Any]:
+        payload = json.dumps({'op': op, **fields}).encode()
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._socket is None:
+                        self._connect()
+                    return self._exchange(payload)
+                except OSError:
+                    self._close()
+                    if attempt:
+                        raise
+        raise ConnectionError(f"Broker at {self.address} unreachable")
+
+    def _connect(self):
+        self._socket = socket.create_connection(self.address, timeout=CONNECT_TIMEOUT)
+        self._stream = self._socket.makefile("rwb")
+        connect_handshake(self._stream, self._stream, self.authkey)
+        registration = self.registration() if self.registration else None
+        if registration:
+            self._exchange(json.dumps(registration).encode())
+
+    def _exchange(self, payload: bytes) -> Dict[str, Any]:
+        write_frame(self._stream, payload)
+        self._stream.flush()
+        response = read_frame(self._stream)
+        if response is None:
+            raise ConnectionError("Broker closed the connection")
+        return json.loads(response)
+
+    def _close(self):
+        for closable in (self._stream, self._socket):
+            if closable is not None:
+                try:
+                    closable.close()
+                except OSError:
+                    pass
+        self._socket = self._stream = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+class PeerConnection:
+    """Persistent, pipelined connection to one remote node
+
+    ``send`` only queues the frame. The writer thread drains the queue into
+    batch frames, so a burst of sends costs one write rather than one per
+    message. TCP gives no delivery receipt: frames written just before a
+    peer dies can be lost, and requests cover that with their timeouts.
+    """
+
+    def __init__(self, address: Address, on_failure: Callable[[Address, List[str]], None], authkey: bytes):
+        self.address = tuple(address)
+        self.on_failure = on_failure
+        self.authkey = authkey
+        self.frames_sent = 0
+        self.messages_sent = 0
+        self.closed = False
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._socket = None
+        self._writer = threading.Thread(target=self._write_loop, name=f"peer-{address[0]}:{address[1]}",
+                                        daemon=True)
+        self._writer.start()
+
+    def send(self, frame: str):
+        with self._condition:
+            self._pending.append(frame)
+            self._condition.notify()
+
+    def _write_loop(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self.closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                batch, size = [], 0
+                while self._pending and size < MAX_FRAME_BYTES:
+                    frame = self._pending.popleft()
+                    batch.append(frame)
+                    size += len(frame) + 1
+
+            if self._write("\n".join(batch).encode("utf-8")):
+                self.frames_sent += 1
+                self.messages_sent += len(batch)
+            else:
+                self.on_failure(self.address, batch)
+
+    def _write(self, payload: bytes) -> bool:
+        deadline = time.monotonic() + RECONNECT_TIMEOUT
+        while True:
+            try:
+                if self._socket is not None and self._peer_closed():
+                    self._reset()
+                if self._socket is None:
+                    self._connect()
+                self._socket.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+                return True
+            except AuthenticationError as e:
+                print(f"Peer {self.address[0]}:{self.address[1]} rejected: {e}")
+                self._reset()
+                return False
+            except OSError:
+                self._reset()
+                if self.closed or time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.05)
+
+    def _connect(self):
+        self._socket = socket.create_connection(self.address, timeout=CONNECT_TIMEOUT)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self._socket.makefile("rwb") as stream:
+            connect_handshake(stream, stream, self.authkey)
+        self._socket.settimeout(None)
+
+    def _peer_closed(self) -> bool:
+        # Peers never write after the handshake, so a readable socket means EOF or a reset.
+        # Writing into it would be accepted locally and then lost.
+        readable, _, _ = select.select([self._socket], [], [], 0)
+        return bool(readable)
+
+    def _reset(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def close(self, timeout: float = 2.0):
+        """Flush what is queued, then close"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+        self._writer.join(timeout)
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+class ConnectionPool:
+    """``connections_per_peer`` persistent connections per remote node
+
+    A conversation always uses the same connection, so messages from one
+    sender to one recipient arrive in order while other conversations
+    share the load.
+    """
+
+    def __init__(self, connections_per_peer: int, on_failure: Callable[[Address, List[str]], None], authkey: bytes):
+        self.connections_per_peer = max(1, connections_per_peer)
+        self.on_failure = on_failure
+        self.authkey = authkey
+        self.peers: Dict[Address, List[PeerConnection]] = {}
+        self._lock = threading.Lock()
+
+    def _connections(self, address: Address) -> List[PeerConnection]:
+        connections = self.peers.get(address)
+        if connections is None:
+            with self._lock:
+                connections = self.peers.get(address)
+                if connections is None:
+                    connections = [PeerConnection(address, self.on_failure, self.authkey)
+                                   for _ in range(self.connections_per_peer)]
+                    self.peers[address] = connections
+        return connections
+
+    def send(self, address: Address, message: Message):
+        connections = self._connections(address)
+        lane = zlib.crc32(conversation_id(message.sender, message.recipient).encode()) % len(connections)
+        connections[lane].send(message.to_json())
+
+    def send_line(self, address: Address, line: str):
+        """Queue a raw frame line on the peer's first connection"""
+        self._connections(address)[0].send(line)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            peers = dict(self.peers)
+        return {f"{host}:{port}": {'connections': len(connections),
+                                   'frames': sum(c.frames_sent for c in connections),
+                                   'messages': sum(c.messages_sent for c in connections)}
+                for (host, port), connections in peers.items()}
+
+    def close(self):
+        with self._lock:
+            peers, self.peers = self.peers, {}
+        for connections in peers.values():
+            for connection in connections:
+                connection.close()
+
+class FrameServer:
+    """Accepts peer connections and hands every decoded batch to ``on_batch``
+
+    Batches, including control lines, are only read from peers that passed
+    the authkey handshake.
+    """
+
+    def __init__(self, host: str, port: int, on_batch: Callable[[str], None], authkey: bytes):
+        self.on_batch = on_batch
+        self.authkey = authkey
+        self.listener = socket.create_server((host, port))
+        self.listener.settimeout(0.2)
+        self.address: Address = self.listener.getsockname()[:2]
+        self.connections: List[socket.socket] = []
+        self.closed = False
+        self._lock = threading.Lock()
+        self._accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._accept_thread.start()
+
+    def _accept_loop(self):
+        while not self.closed:
+            try:
+                connection, _ = self.listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            with self._lock:
+                self.connections.append(connection)
+            threading.Thread(target=self._read_loop, args=(connection,), daemon=True).start()
+
+    def _read_loop(self, connection: socket.socket):
+        stream = connection.makefile("rwb")
+        try:
+            connection.settimeout(CONNECT_TIMEOUT)
+            try:
+                accept_handshake(stream, stream, self.authkey)
+            except AuthenticationError as e:
+                print(f"Refused peer connection: {e}")
+                return
+            connection.settimeout(None)
+            while True:
+                payload = read_frame(stream)
+                if payload is None:
+                    return
+                self.on_batch(payload.decode("utf-8"))
+        except OSError:
+            return
+        finally:
+            stream.close()
+            with self._lock:
+                if connection in self.connections:
+                    self.connections.remove(connection)
+            connection.close()
+
+    def close(self):
+        self.closed = True
+        self._accept_thread.join(timeout=1)
+        self.listener.close()
+        with self._lock:
+            connections, self.connections = self.connections, []
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            connection.close()
+
+class SequenceWindow:
+    """Which sequence numbers of one conversation were delivered
+
+    ``mark`` is the watermark: everything at or below it arrived. Numbers
+    that overtook a gap wait in ``ahead`` until the gap fills, so messages
+    re-routed during a migration are neither lost nor delivered twice.
+    Numbers are only comparable within one ``epoch`` of the sender: a
+    sender that restarts counts from 1 again under a new epoch.
+    """
+
+    def __init__(self, mark: int = 0, ahead=(), epoch: Optional[str] = None):
+        self.mark = mark
+        self.ahead = set(ahead)
+        self.epoch = epoch
+
+    def accept(self, seq: int) -> bool:
+        """Record ``seq``; False if it was already delivered"""
+        if seq <= self.mark or seq in self.ahead:
+            return False
+        self.ahead.add(seq)
+        if len(self.ahead) > MAX_SEQUENCE_GAP:
+            # A message dropped in transit leaves a gap that never fills; give up on it
+            self.mark = min(self.ahead) - 1
+        while self.mark + 1 in self.ahead:
+            self.mark += 1
+            self.ahead.discard(self.mark)
+        return True
+
+    def to_state(self) -> Dict[str, Any]:
+        return {'mark': self.mark, 'ahead': sorted(self.ahead), 'epoch': self.epoch}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'SequenceWindow':
+        return cls(state['mark'], state['ahead'], state.get('epoch'))
+
+class TcpTransport:
+    """Delivers locally when the recipient lives on this node, otherwise over the pool
+
+    Routes come from the broker and are cached. A batch a connection could
+    not write is re-routed once with fresh routes, in case the recipient
+    moved; otherwise it is dropped and counted. Every message is stamped
+    with a per-conversation sequence number (metadata "seq") that the
+    receiving node checks against its watermarks, and with the sender's
+    epoch ("epoch"), which is new whenever the sender starts from scratch
+    and moves with it when it migrates.
+    """
+
+    def __init__(self, manager: 'TcpNetworkManager', pool: ConnectionPool, broker: BrokerClient):
+        self.manager = manager
+        self.pool = pool
+        self.broker = broker
+        self.route_cache: Dict[str, Address] = {}
+        self.sequence: Dict[str, Dict[str, int]] = {}    # sender -> recipient -> last seq sent
+        self.epochs: Dict[str, str] = {}                 # sender -> epoch its sequence numbers belong to
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def deliver(self, message: Message) -> bool:
+        if self.manager.hosts(message.sender):
+            self.manager._count_traffic(message.sender, message.recipient)
+        if self.manager.dispatches(message.recipient):
+            self._stamp(message)
+            self.manager._enqueue(message)
+            return True
+        address = self.route(message.recipient)
+        if address is None:
+            return False
+        self._stamp(message)
+        self.pool.send(address, message)
+        return True
+
+    def _stamp(self, message: Message):
+        # Forwarded messages keep the number their sender gave them
+        if 'seq' in (message.metadata or {}):
+            return
+        with self._lock:
+            counters = self.sequence.setdefault(message.sender, {})
+            counters[message.recipient] = seq = counters.get(message.recipient, 0) + 1
+            epoch = self.epochs.get(message.sender)
+            if epoch is None:
+                self.epochs[message.sender] = epoch = uuid.uuid4().hex[:16]
+        message.metadata = {**(message.metadata or {}), 'seq': seq, 'epoch': epoch}
+
+    def route(self, agent_id: str, refresh: bool = False) -> Optional[Address]:
+        if not refresh:
+            address = self.route_cache.get(agent_id)
+            if address is not None:
+                return address
+        try:
+            found = self.broker.request("lookup", agents=[agent_id])['routes'].get(agent_id)
+        except (OSError, ConnectionError):
+            found = None
+        with self._lock:
+            if found is None:
+                self.route_cache.pop(agent_id, None)
+                return None
+            self.route_cache[agent_id] = address = tuple(found)
+        return address
+
+    def set_route(self, agent_id: str, address: Address):
+        with self._lock:
+            self.route_cache[agent_id] = tuple(address)
+
+    def invalidate(self, agent_id: str):
+        with self._lock:
+            self.route_cache.pop(agent_id, None)
+
+    def undeliverable(self, address: Address, frames: List[str]):
+        for frame in frames:
+            if frame.startswith(CONTROL_PREFIX):
+                with self._lock:
+                    self.dropped += 1
+                continue
+            message = Message.from_json(frame)
+            retry = self.route(message.recipient, refresh=True)
+            if retry is not None and retry != address:
+                self.pool.send(retry, message)
+            else:
+                with self._lock:
+                    self.dropped += 1
+        print(f"Connection to {address[0]}:{address[1]} failed; re-routed or dropped {len(frames)} messages")
+
+@dataclass
+class Handoff:
+    """An agent on its way to another node; its messages wait in ``held``"""
+    node: TransportAgentNode
+    target: str
+    address: Address
+    deadline: float
+    future: Future
+    held: List[Message] = field(default_factory=list)
+
+class TcpNetworkManager:
+    """MultiAgentNetworkManager counterpart for one node of a multi-host network
+
+    Agents added here live on this node; every other agent is found through
+    the broker. Inbound and local messages are dispatched from one thread,
+    or across ``handler_lanes`` with per-conversation ordering. Agents can
+    move to another node while the network runs with ``migrate_agent``.
+    With a ``loop_prevention`` LoopPreventionConfig, each agent gets its
+    own LoopPreventionManager, and that state moves with the agent.
+    """
+
+    def __init__(self, node_id: str, broker_address: Address, host: str = "127.0.0.1", port: int = 0,
+                 advertise_host: Optional[str] = None, handler_lanes: int = 0, connections_per_peer: int = 2,
+                 path_trace: Optional[PathTrace] = None, authkey: Optional[bytes] = None,
+                 loop_prevention=None):
+        self.node_id = node_id
+        self.authkey = resolve_authkey(authkey)
+        self.host = host
+        self.port = port
+        self.advertise_host = advertise_host or (socket.gethostname() if host in ("", "0.0.0.0") else host)
+
+        self.agents: Dict[str, TransportAgentNode] = {}
+        self.user_node: Optional[TransportAgentNode] = None
+        self.handler_executor: Optional[ConversationOrderedExecutor] = None
+        if handler_lanes > 0:
+            self.handler_executor = ConversationOrderedExecutor(handler_lanes, name=f"{node_id}-handlers")
+        self.path_trace = path_trace
+        self.loop_prevention = loop_prevention
+
+        self.broker = BrokerClient(broker_address, self.authkey, registration=self._registration)
+        self.pool = ConnectionPool(connections_per_peer, self._undeliverable, self.authkey)
+        self.transport = TcpTransport(self, self.pool, self.broker)
+        self.server: Optional[FrameServer] = None
+
+        # Delivery watermarks: recipient -> sender -> window; traffic: local agent -> peer -> messages
+        self.watermarks: Dict[str, Dict[str, SequenceWindow]] = {}
+        self.traffic: Dict[str, Dict[str, int]] = {}
+        self._traffic_lock = threading.Lock()
+
+        # Migration bookkeeping, only touched by the dispatcher thread
+        self.handoffs: Dict[str, Handoff] = {}
+        self.moved: Dict[str, Tuple[Address, TransportAgentNode]] = {}   # Tombstones: new address, old node
+        self._reply_forwarding: Dict[str, Address] = {}                   # correlation_id -> previous node
+        self._redirected: Set[Tuple[Address, str]] = set()
+
+        self.running = False
+        self.received = 0
+        self.duplicates = 0
+        self._inbox: queue.Queue = queue.Queue()
+        self._agents_lock = threading.Lock()
+        self._dispatcher_thread = None
+
+    @property
+    def address(self) -> Optional[Address]:
+        return (self.advertise_host, self.server.address[1]) if self.server else None
+
+    def hosts(self, agent_id: str) -> bool:
+        return agent_id in self.agents or bool(self.user_node and self.user_node.agent_id == agent_id)
+
+    def dispatches(self, agent_id: str) -> bool:
+        """Messages for this agent go through the local dispatcher: hosted, in handoff, or just moved away"""
+        return self.hosts(agent_id) or agent_id in self.handoffs or agent_id in self.moved
+
+    def add_agent(self, agent_id: str) -> TransportAgentNode:
+        """Add an agent to this node; registered with the broker at once if running"""
+        with self._agents_lock:
+            if self.hosts(agent_id):
+                raise ValueError(f"Agent {agent_id} already exists")
+            node = TransportAgentNode(agent_id, self, self.transport, self._new_loop_prevention(agent_id))
+            self.agents[agent_id] = node
+        if self.running:
+            self._register([agent_id])
+            node.start()
+        return node
+
+    def _new_loop_prevention(self, agent_id: str) -> Optional[LoopPreventionManager]:
+        if self.loop_prevention is None:
+            return None
+        return LoopPreventionManager.from_config(agent_id, self.loop_prevention)
+
+    def add_user(self, user_id: str = "user") -> TransportAgentNode:
+        """Add the user node to this node"""
+        self.user_node = TransportAgentNode(user_id, self, self.transport)
+        if self.running:
+            self._register([user_id])
+            self.user_node.start()
+        return self.user_node
+
+    def _local_ids(self) -> List[str]:
+        return list(self.agents) + ([self.user_node.agent_id] if self.user_node else [])
+
+    def _register(self, agent_ids: List[str]):
+        response = self.broker.request("register", node=self.node_id, address=list(self.address), agents=agent_ids)
+        if not response.get('ok'):
+            raise ValueError(response.get('error', "Broker refused registration"))
+
+    def _registration(self) -> Optional[Dict[str, Any]]:
+        """What to re-register after the broker connection is reopened"""
+        if not self.running:
+            return None
+        return {'op': "register", 'node': self.node_id, 'address': list(self.address), 'agents': self._local_ids()}
+
+    def start_network(self):
+        """Listen for peers, register this node's agents with the broker and start dispatching"""
+        self.server = FrameServer(self.host, self.port, self._receive, self.authkey)
+        self._register(self._local_ids())
+        self.running = True
+
+        if self.handler_executor:
+            self.handler_executor.start()
+        if self.user_node:
+            self.user_node.start()
+        for node in list(self.agents.values()):
+            node.start()
+
+        self._dispatcher_thread = threading.Thread(target=self._dispatch_loop, name=f"{self.node_id}-dispatch",
+                                                   daemon=True)
+        self._dispatcher_thread.start()
+        host, port = self.address
+        print(f"Node {self.node_id} started with {len(self.agents)} agents on {host}:{port}" +
+              (" and 1 user" if self.user_node else ""))
+
+    def stop_network(self):
+        """Unregister, flush outbound connections and stop"""
+        try:
+            self.broker.request("unregister", node=self.node_id)
+        except (OSError, ConnectionError):
+            pass    # Broker already gone; nothing to clean up there
+
+        self.pool.close()
+        self.running = False
+        if self._dispatcher_thread:
+            self._dispatcher_thread.join(timeout=2)
+        if self.server:
+            self.server.close()
+        if self.handler_executor:
+            self.handler_executor.stop()
+
+        if self.user_node:
+            self.user_node.stop()
+        for node in list(self.agents.values()):
+            node.stop()
+        for handoff in self.handoffs.values():
+            handoff.future.cancel()
+        self.broker.close()
+        print(f"Node {self.node_id} stopped")
+
+    def migrate_agent(self, agent_id: str, target_node: str, timeout: float = 10.0) -> Future:
+        """Move a hosted agent to another node without losing its messages
+
+        The agent's handlers (by import path), delivery watermarks, sequence
+        counters, optional ``loop_prevention`` state and any messages that
+        arrive meanwhile go to the target. The broker and the senders' route
+        caches are then pointed at the target, and this node forwards
+        whatever still reaches it. The Future resolves to the target node ID
+        once the target has taken over, or fails and leaves the agent here.
+        """
+        future: Future = Future()
+        self._inbox.put(("migrate", agent_id, target_node, timeout, future))
+        return future
+
+    def _send_control(self, address: Address, payload: Dict[str, Any]):
+        self.pool.send_line(address, CONTROL_PREFIX + json.dumps(payload))
+
+    def _receive(self, batch: str):
+        for frame in batch.split("\n"):
+            if frame.startswith(CONTROL_PREFIX):
+                self._inbox.put(("control", json.loads(frame[len(CONTROL_PREFIX):])))
+            else:
+                self._inbox.put(Message.from_json(frame))
+
+    def _enqueue(self, message: Message):
+        self._inbox.put(message)
+
+    def _undeliverable(self, address: Address, frames: List[str]):
+        self.transport.undeliverable(address, frames)
+
+    def _dispatch_loop(self):
+        """Hand inbound and local messages to their nodes, and run migrations between them"""
+        next_expiry = 0.0
+        while self.running:
+            try:
+                item = self._inbox.get(timeout=0.1)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, Message):
+                self._dispatch(item)
+            elif item is not None and item[0] == "control":
+                self._control(item[1])
+            elif item is not None and item[0] == "migrate":
+                self._start_handoff(*item[1:])
+
+            now = time.monotonic()
+            if now >= next_expiry:
+                for node in self._nodes():
+                    node._expire_pending_requests()
+                for agent_id in [a for a, handoff in self.handoffs.items() if handoff.deadline <= now]:
+                    self._abort_handoff(agent_id, TimeoutError(f"Node {self.handoffs[agent_id].target} "
+                                                               f"did not take over {agent_id}"))
+                next_expiry = now + 0.1
+
+    def _dispatch(self, message: Message):
+        recipient = message.recipient
+        handoff = self.handoffs.get(recipient)
+        if handoff is not None:
+            handoff.held.append(message)
+            return
+
+        node = self.agents.get(recipient)
+        if node is None and self.user_node and self.user_node.agent_id == recipient:
+            node = self.user_node
+        if node is None:
+            self._forward(message)
+            return
+
+        seq = (message.metadata or {}).get('seq')
+        if seq is not None:
+            epoch = message.metadata.get('epoch')
+            windows = self.watermarks.setdefault(recipient, {})
+            window = windows.get(message.sender)
+            if window is None or window.epoch != epoch:
+                # First message, or the sender restarted and counts from 1 again
+                windows[message.sender] = window = SequenceWindow(epoch=epoch)
+            if not window.accept(seq):
+                self.duplicates += 1
+                return
+
+        in_reply_to = (message.metadata or {}).get('in_reply_to')
+        if in_reply_to and in_reply_to in self._reply_forwarding:
+            # Reply to a request the agent sent before it moved here; the waiter is on the old node
+            self.pool.send(self._reply_forwarding.pop(in_reply_to), message)
+            return
+
+        self._count_traffic(recipient, message.sender)
+        self.received += 1
+        node._handle_message(message)
+
+    def _forward(self, message: Message):
+        """A message for an agent that is not here: moved away, or a stale route"""
+        moved = self.moved.get(message.recipient)
+        if moved is None:
+            self.transport.invalidate(message.recipient)
+            if not self.transport.deliver(message):
+                with self.transport._lock:
+                    self.transport.dropped += 1
+                print(f"No route to {message.recipient} on {self.node_id}; dropped message {message.id}")
+            return
+
+        address, old_node = moved
+        if old_node._complete_request(message):
+            return    # Reply to a request the agent made before it left
+
+        self.pool.send(address, message)
+        sender_address = self.transport.route(message.sender)
+        if sender_address and sender_address != self.address and (sender_address, message.recipient) not in self._redirected:
+            self._redirected.add((sender_address, message.recipient))
+            self._send_control(sender_address, {'op': "route", 'agent': message.recipient, 'address': list(address)})
+
+    def _start_handoff(self, agent_id: str, target_node: str, timeout: float, future: Future):
+        node = self.agents.get(agent_id)
+        try:
+            if node is None:
+                raise KeyError(f"Agent {agent_id} is not hosted on {self.node_id}")
+            address = self.broker.request("table")['nodes'].get(target_node)
+            if address is None:
+                raise KeyError(f"Unknown node {target_node}")
+            if self.handler_executor:
+                self.handler_executor.drain()    # No handler of the agent may still be running here
+            state = self._export_agent(node)
+        except Exception as e:
+            future.set_exception(e)
+            return
+
+        with self._agents_lock:
+            self.agents.pop(agent_id)
+        self.handoffs[agent_id] = Handoff(node, target_node, tuple(address), time.monotonic() + timeout, future)
+        self._send_control(tuple(address), {'op': "adopt", 'from': list(self.address), 'state': state})
+
+    def _export_agent(self, node: TransportAgentNode) -> Dict[str, Any]:
+        with self.transport._lock:
+            sequence = dict(self.transport.sequence.get(node.agent_id, {}))
+            epoch = self.transport.epochs.get(node.agent_id)
+        with node._pending_lock:
+            awaiting = list(node.pending_requests)
+        return {
+            'agent': node.agent_id,
+            'handlers': {message_type: handler_path(handler) for message_type, handler in node.message_handlers.items()},
+            'watermarks': {sender: window.to_state()
+                           for sender, window in self.watermarks.get(node.agent_id, {}).items()},
+            'sequence': sequence,
+            'epoch': epoch,
+            'traffic': self.traffic_snapshot().get(node.agent_id, {}),
+            'loop_prevention': node.loop_prevention.export_state() if node.loop_prevention else None,
+            'awaiting': awaiting,
+        }
+
+    def _adopt_agent(self, state: Dict[str, Any], previous: Address):
+        agent_id = state['agent']
+        if state.get('loop_prevention'):
+            loop_prevention = LoopPreventionManager.from_state(state['loop_prevention'])
+        else:
+            loop_prevention = self._new_loop_prevention(agent_id)
+        node = TransportAgentNode(agent_id, self, self.transport, loop_prevention)
+        for message_type, path in state['handlers'].items():
+            node.register_message_handler(message_type, HandlerRef(path))
+
+        self.watermarks[agent_id] = {sender: SequenceWindow.from_state(window)
+                                     for sender, window in state['watermarks'].items()}
+        with self.transport._lock:
+            self.transport.sequence[agent_id] = dict(state['sequence'])
+            if state.get('epoch'):
+                self.transport.epochs[agent_id] = state['epoch']
+        with self._traffic_lock:
+            self.traffic[agent_id] = dict(state.get('traffic', {}))
+        for correlation_id in state['awaiting']:
+            self._reply_forwarding[correlation_id] = previous
+
+        self.moved.pop(agent_id, None)    # Coming back to a node it once left
+        with self._agents_lock:
+            self.agents[agent_id] = node
+        node.start()
+        response = self.broker.request("move", agent=agent_id, node=self.node_id)
+        if not response.get('ok'):
+            raise RuntimeError(response.get('error', "Broker refused the move"))
+
+    def _control(self, payload: Dict[str, Any]):
+        op = payload.get('op')
+        if op == "adopt":
+            previous = tuple(payload['from'])
+            agent_id = payload['state']['agent']
+            try:
+                self._adopt_agent(payload['state'], previous)
+                self._send_control(previous, {'op': "adopted", 'agent': agent_id, 'node': self.node_id})
+            except Exception as e:
+                with self._agents_lock:
+                    self.agents.pop(agent_id, None)
+                self._send_control(previous, {'op': "adopted", 'agent': agent_id, 'error': str(e)})
+
+        elif op == "adopted":
+            agent_id = payload['agent']
+            if payload.get('error'):
+                self._abort_handoff(agent_id, RuntimeError(f"Migration of {agent_id} failed: {payload['error']}"))
+            else:
+                self._finish_handoff(agent_id)
+
+        elif op == "route":
+            self.transport.set_route(payload['agent'], payload['address'])
+
+    def _finish_handoff(self, agent_id: str):
+        handoff = self.handoffs.pop(agent_id, None)
+        if handoff is None:
+            return
+        handoff.node.running = False    # Kept only to complete its outstanding requests
+        self.moved[agent_id] = (handoff.address, handoff.node)
+        self._redirected = {entry for entry in self._redirected if entry[1] != agent_id}
+        self.transport.set_route(agent_id, handoff.address)
+        with self.transport._lock:
+            self.transport.sequence.pop(agent_id, None)
+            self.transport.epochs.pop(agent_id, None)
+        self.watermarks.pop(agent_id, None)
+        with self._traffic_lock:
+            self.traffic.pop(agent_id, None)
+        for message in handoff.held:
+            self.pool.send(handoff.address, message)
+        print(f"Agent {agent_id} moved from {self.node_id} to {handoff.target} "
+              f"({len(handoff.held)} held messages forwarded)")
+        handoff.future.set_result(handoff.target)
+
+    def _abort_handoff(self, agent_id: str, error: Exception):
+        handoff = self.handoffs.pop(agent_id, None)
+        if handoff is None:
+            return
+        with self._agents_lock:
+            self.agents[agent_id] = handoff.node
+        for message in handoff.held:
+            self._dispatch(message)
+        handoff.future.set_exception(error)
+
+    def _count_traffic(self, agent_id: str, peer: str):
+        with self._traffic_lock:
+            peers = self.traffic.setdefault(agent_id, {})
+            peers[peer] = peers.get(peer, 0) + 1
+
+    def traffic_snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Messages each hosted agent sent to or received from every peer"""
+        with self._traffic_lock:
+            return {agent_id: dict(peers) for agent_id, peers in self.traffic.items() if agent_id in self.agents}
+
+    def _nodes(self) -> List[TransportAgentNode]:
+        nodes = list(self.agents.values()) + [node for _, node in self.moved.values()]
+        return nodes + ([self.user_node] if self.user_node else [])
+
+    def get_network_status(self) -> Dict[str, Any]:
+        """Local nodes, peer connection statistics and the broker's view of the network"""
+        status = {
+            'node': self.node_id,
+            'address': self.address,
+            'agents': {agent_id: {'running': node.running} for agent_id, node in list(self.agents.items())},
+            'user': None,
+            'total_agents': len(self.agents),
+            'network_running': self.running,
+            'received': self.received,
+            'duplicates': self.duplicates,
+            'dropped': self.transport.dropped,
+            'moved': {agent_id: f"{host}:{port}" for agent_id, ((host, port), _) in list(self.moved.items())},
+            'peers': self.pool.stats(),
+        }
+        if self.user_node:
+            status['user'] = {'id': self.user_node.agent_id, 'running': self.user_node.running}
+        if self.handler_executor:
+            status['handler_executor'] = self.handler_executor.get_stats()
+        return status
+
+    def broadcast_to_all(self, sender_id: str, message: str):
+        """Broadcast from a local node to every agent the broker knows, on any host"""
+        sender = self.agents.get(sender_id) or (self.user_node if self.user_node and
+                                                self.user_node.agent_id == sender_id else None)
+        if sender is None:
+            return
+        for agent_id in self.broker.request("table")['routes']:
+            if agent_id != sender_id:
+                sender.send_message(agent_id, message, "broadcast")
+
+def echo_handler(message: Message):
+    """Demo handler: reply with the content and the node that answered"""
+    node = current_agent()
+    node.reply(message, f"{node.network_manager.node_id}:{message.content}")
+
+def _demo_node_main(node_id: str, broker_address: Address, authkey: bytes, agent_ids: List[str], stop):
+    """A remote node process for the demo: host agents until ``stop`` is set"""
+    network = TcpNetworkManager(node_id, broker_address, authkey=authkey)
+    for agent_id in agent_ids:
+        network.add_agent(agent_id).register_message_handler("text", echo_handler)
+    network.start_network()
+    stop.wait()
+    network.stop_network()
+
+def demonstrate_tcp_transport():
+    """A broker and two node processes on localhost, driven from a third node"""
+
+    print("TCP TRANSPORT AND AGENT BROKER")
+    print("=" * 30)
+
+    authkey = os.urandom(16)
+    broker_process, broker_address = start_broker_process(authkey=authkey)
+    print(f"Broker listening on {broker_address[0]}:{broker_address[1]}")
+
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    remote_nodes = [
+        context.Process(target=_demo_node_main, args=(f"node{n}", broker_address, authkey,
+                                                      [f"node{n}-agent{i}" for i in range(4)], stop))
+        for n in (1, 2)
+    ]
+    for process in remote_nodes:
+        process.start()
+
+    network = TcpNetworkManager("node0", broker_address, authkey=authkey)
+    user = network.add_user()
+    network.start_network()
+
+    # Wait until both remote nodes have registered
+    deadline = time.monotonic() + 30
+    while len(network.broker.request("table")['nodes']) < 3 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    routes = network.broker.request("table")['routes']
+    remote_agents = sorted(agent for agent in routes if agent != user.agent_id)
+    print(f"Broker routes: {len(remote_agents)} remote agents on {len(set(routes.values())) - 1} nodes")
+
+    print(f"\nRound trip: {user.send_request(remote_agents[0], 'hello', timeout=10).result().content}")
+
+    n_requests = 5000
+    started = time.perf_counter()
+    futures = [user.send_request(remote_agents[i % len(remote_agents)], str(i), timeout=30)
+               for i in range(n_requests)]
+    answered = sum(1 for i, future in enumerate(futures) if future.result().content.endswith(f":{i}"))
+    elapsed = time.perf_counter() - started
+    print(f"{answered}/{n_requests} pipelined requests answered in {elapsed:.2f}s "
+          f"({n_requests / elapsed:,.0f} requests/s)")
+
+    for peer, stats in network.get_network_status()['peers'].items():
+        print(f"  to {peer}: {stats['messages']} messages in {stats['frames']} frames "
+              f"over {stats['connections']} pooled connections")
+
+    network.stop_network()
+    stop.set()
+    for process in remote_nodes:
+        process.join(timeout=10)
+    broker_process.terminate()
+    broker_process.join()
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "broker":
+        host = sys.argv[2] if len(sys.argv) > 2 else "0.0.0.0"
+        port = int(sys.argv[3]) if len(sys.argv) > 3 else 7400
+        if not os.environ.get(AUTHKEY_ENV):
+            sys.exit(f"Set {AUTHKEY_ENV} to the network's shared secret before starting a broker")
+        print(f"Agent broker listening on {host}:{port}")
+        run_broker(host, port)
+    else:
+        demonstrate_tcp_transport()
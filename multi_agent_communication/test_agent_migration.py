@@ -0,0 +1,106 @@
+"""Tests for live agent migration and delivery watermarks between TCP nodes"""
+
+import os
+import time
+import threading
+
+import pytest
+
+from configuration_variables import LoopPreventionConfig
+from tcp_transport import SequenceWindow, TcpNetworkManager, echo_handler, start_broker_process
+
+AUTHKEY = os.urandom(16)
+
+@pytest.fixture(scope="module")
+def broker_address():
+    process, address = start_broker_process(authkey=AUTHKEY)
+    yield address
+    process.terminate()
+    process.join()
+
+@pytest.fixture
+def nodes(broker_address):
+    started = []
+
+    def start(node_id, agents=(), user=None, **options):
+        network = TcpNetworkManager(node_id, broker_address, authkey=AUTHKEY, **options)
+        if user:
+            network.add_user(user)
+        for agent_id in agents:
+            network.add_agent(agent_id).register_message_handler("text", echo_handler)
+        network.start_network()
+        started.append(network)
+        return network
+
+    yield start
+    for network in started:
+        if network.running:
+            network.stop_network()
+
+def test_sequence_window_drops_duplicates_and_tolerates_reordering():
+    window = SequenceWindow()
+    assert [window.accept(seq) for seq in (1, 3, 2, 3, 1, 4)] == [True, True, True, False, False, True]
+    assert window.mark == 4 and not window.ahead
+
+    restored = SequenceWindow.from_state(window.to_state())
+    assert not restored.accept(4) and restored.accept(5)
+
+def test_restarted_sender_is_not_treated_as_duplicate(nodes):
+    server = nodes("server", agents=["worker"])
+    first = nodes("client-a", user="user")
+    for i in range(3):
+        assert first.user_node.send_request("worker", f"before{i}", timeout=5).result().content == f"server:before{i}"
+    first.stop_network()
+
+    # Same user ID, fresh node: its sequence numbers start at 1 again
+    second = nodes("client-b", user="user")
+    assert second.user_node.send_request("worker", "after", timeout=30).result().content == "server:after"
+    assert server.get_network_status()['duplicates'] == 0
+
+def test_migration_under_traffic_loses_no_messages(nodes):
+    source = nodes("source", agents=["worker"], user="caller")
+    target = nodes("target")
+
+    calls = []
+    calling = threading.Event()
+    calling.set()
+
+    def keep_calling():
+        while calling.is_set():
+            calls.append(source.user_node.send_request("worker", f"call{len(calls)}", timeout=15))
+            time.sleep(0.001)
+
+    caller = threading.Thread(target=keep_calling)
+    caller.start()
+    time.sleep(0.1)
+    assert source.migrate_agent("worker", "target").result(timeout=10) == "target"
+    time.sleep(0.1)
+    calling.clear()
+    caller.join()
+
+    answers = [future.result(timeout=15).content for future in calls]
+    assert [answer.split(":", 1)[1] for answer in answers] == [f"call{i}" for i in range(len(calls))]
+    assert answers[-1].startswith("target:")
+    assert "worker" in target.agents and "worker" not in source.agents
+    assert source.get_network_status()['duplicates'] + target.get_network_status()['duplicates'] == 0
+
+def test_migration_to_unknown_node_keeps_the_agent(nodes):
+    source = nodes("lonely", agents=["stay"], user="asker")
+    with pytest.raises(KeyError):
+        source.migrate_agent("stay", "nowhere").result(timeout=5)
+    assert source.user_node.send_request("stay", "still here", timeout=5).result().content == "lonely:still here"
+
+def test_loop_prevention_state_moves_with_the_agent(nodes):
+    config = LoopPreventionConfig(max_responses_per_thread=10)
+    source = nodes("guarded", agents=["worker"], user="caller", loop_prevention=config)
+    target = nodes("unguarded")
+    caller = source.user_node
+    assert caller.send_request("worker", "alpha", timeout=5).result().content == "guarded:alpha"
+    assert source.migrate_agent("worker", "unguarded").result(timeout=10) == "unguarded"
+
+    # The target has no config of its own; the duplicate check came with the agent
+    repeated = caller.send_request("worker", "ALPHA", timeout=1)
+    assert caller.send_request("worker", "beta", timeout=5).result().content == "unguarded:beta"
+    with pytest.raises(TimeoutError):
+        repeated.result(timeout=5)
+    assert target.agents["worker"].loop_prevention.conversation_threads == {"caller-worker": 2}
@@ -0,0 +1,71 @@
+"""Tests for the multilevel agent partitioner"""
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from agent_partitioner import partition_agents
+
+def planted_clusters(rng, n_clusters, size, inside=0.5, outside=0.01):
+    """Communication matrix with dense traffic inside clusters and little between them"""
+    n = n_clusters * size
+    cluster = np.repeat(np.arange(n_clusters), size)
+    same = cluster[:, None] == cluster[None, :]
+    probability = np.where(same, inside, outside)
+    communication = np.where(rng.random((n, n)) < probability, rng.integers(1, 20, size=(n, n)), 0)
+    np.fill_diagonal(communication, 0)
+    return communication.astype(float), cluster
+
+def cut_of(communication, assignment):
+    symmetric = communication + communication.T
+    np.fill_diagonal(symmetric, 0)
+    return symmetric[assignment[:, None] != assignment[None, :]].sum() / 2.0
+
+@pytest.mark.parametrize("n_shards", [2, 4, 8])
+def test_planted_clusters_are_recovered(n_shards):
+    rng = np.random.default_rng(42)
+    communication, cluster = planted_clusters(rng, n_shards, 60)
+    agents = [f"agent{i}" for i in range(communication.shape[0])]
+    partition = partition_agents(communication, agents, n_shards)
+
+    assert partition.cut_weight == pytest.approx(cut_of(communication, partition.assignment))
+    assert partition.total_weight == pytest.approx(communication.sum())
+    # At least as good as the planted split, and balanced
+    assert partition.cut_weight <= cut_of(communication, cluster) * 1.05
+    assert partition.imbalance <= 0.1 + 1e-9
+    assert all(partition.shards)
+
+def test_random_graphs_respect_the_load_bound_and_beat_random_splits():
+    rng = np.random.default_rng(7)
+    for _ in range(10):
+        n = int(rng.integers(20, 300))
+        n_shards = int(rng.integers(2, 6))
+        communication = np.where(rng.random((n, n)) < 0.05, rng.integers(1, 10, size=(n, n)), 0).astype(float)
+        loads = rng.integers(1, 5, size=n).astype(float)
+        partition = partition_agents(sp.csr_matrix(communication), list(range(n)), n_shards,
+                                     loads=loads, imbalance=0.1)
+
+        max_load = max(loads.sum() / n_shards * 1.1, loads.max())
+        assert partition.loads.max() <= max_load + 1e-9
+        np.testing.assert_allclose(partition.loads, np.bincount(partition.assignment, weights=loads,
+                                                                 minlength=n_shards))
+        assert partition.cut_weight == pytest.approx(cut_of(communication, partition.assignment))
+        random_cut = cut_of(communication, rng.integers(0, n_shards, size=n))
+        assert partition.cut_weight < random_cut
+
+def test_dense_and_sparse_input_agree_and_seed_is_deterministic():
+    rng = np.random.default_rng(3)
+    communication, _ = planted_clusters(rng, 3, 40)
+    agents = [f"agent{i}" for i in range(120)]
+    dense = partition_agents(communication, agents, 3, seed=5)
+    sparse = partition_agents(sp.csr_matrix(communication), agents, 3, seed=5)
+    np.testing.assert_array_equal(dense.assignment, sparse.assignment)
+    np.testing.assert_array_equal(dense.assignment, partition_agents(communication, agents, 3, seed=5).assignment)
+
+def test_edge_cases():
+    with pytest.raises(ValueError):
+        partition_agents(np.zeros((2, 2)), ["a", "b"], 0)
+
+    partition = partition_agents(np.zeros((3, 3)), ["a", "b", "c"], 5)
+    assert partition.n_shards == 3 and sorted(partition.assignment.tolist()) == [0, 1, 2]
+    assert partition.internal_fraction == 1.0 and partition.shard_of("a") in (0, 1, 2)
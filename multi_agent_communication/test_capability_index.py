@@ -0,0 +1,57 @@
+"""Tests for the capability index against the substring scan it replaced"""
+
+import random
+
+from capability_index import CapabilityIndex
+
+# The 7-agent ecosystem demo's agents (screen_agent_manager.py), plus short and symbolic capabilities
+AGENTS_CONFIG = {
+    "doppler_agent": {"capabilities": ["auth", "secrets", "tokens"]},
+    "linear_agent": {"capabilities": ["issues", "projects", "teams"]},
+    "r_agent": {"capabilities": ["modeling", "prediction", "analysis"]},
+    "claude_agent": {"capabilities": ["analysis", "validation", "testing"]},
+    "mermaid_agent": {"capabilities": ["diagrams", "workflows", "charts"]},
+    "terminal_agent": {"capabilities": ["commands", "automation", "docs"]},
+    "coordinator_agent": {"capabilities": ["synthesis", "coordination", "management"]},
+    "frontend_agent": {"capabilities": ["ui", "ml", "c++", "ci/cd"]},
+}
+
+def substring_scan(task, capabilities):
+    """The handlers' original rule, before the index"""
+    task_keywords = task.lower().split()
+    return [cap for cap in capabilities if any(keyword in cap for keyword in task_keywords)]
+
+def test_default_rule_matches_the_substring_scan():
+    index = CapabilityIndex.from_agent_configs(AGENTS_CONFIG)
+    rng = random.Random(30)
+    words = [cap for config in AGENTS_CONFIG.values() for cap in config["capabilities"]]
+    words += ["UI", "ML", "C++", "a", "on", "run", "analysis,", "(testing)", "data", "team"]
+
+    tasks = ["Run statistical modeling and prediction analysis", "Fix the UI", "Train an ML model in C++", ""]
+    for _ in range(300):
+        picked = rng.sample(words, rng.randint(1, 4))
+        # Substrings of capabilities as well as whole ones
+        tasks.append(" ".join(word[rng.randrange(len(word)):][:rng.randint(1, len(word))] for word in picked))
+
+    for task in tasks:
+        expected = {agent_id: substring_scan(task, config["capabilities"])
+                    for agent_id, config in AGENTS_CONFIG.items()}
+        assert index.match(task) == {agent_id: caps for agent_id, caps in expected.items() if caps}, task
+        for agent_id in AGENTS_CONFIG:
+            assert index.matching_capabilities(agent_id, task) == expected[agent_id]
+
+def test_opt_in_length_and_punctuation_rules():
+    index = CapabilityIndex.from_agent_configs(AGENTS_CONFIG, min_token_length=3, strip_punctuation=True)
+    assert index.candidates("Fix UI") == []
+    assert sorted(index.candidates("statistical analysis, please")) == ["claude_agent", "r_agent"]
+    assert index.candidates("(c++)") == []    # Stripping punctuation leaves "c"
+
+def test_reindexing_and_removal():
+    index = CapabilityIndex.from_agent_configs(AGENTS_CONFIG)
+    index.add_agent("r_agent", ["forecasting"])
+    assert index.matching_capabilities("r_agent", "modeling") == []
+    assert index.matching_capabilities("r_agent", "cast") == ["forecasting"]
+
+    index.remove_agent("r_agent")
+    assert "r_agent" not in index.match("forecasting analysis")
+    assert all(agent_id != "r_agent" for entries in index.index.values() for agent_id, _ in entries)
@@ -0,0 +1,76 @@
+"""Tests for content digests and the scalable Bloom filter"""
+
+import json
+import random
+
+import pytest
+
+import content_digest
+from content_digest import ContentDigest, ScalableBloomFilter
+
+def test_normalization_options():
+    exact = ContentDigest("blake2b")
+    folded = ContentDigest("blake2b", ignore_case=True)
+    collapsed = ContentDigest("blake2b", collapse_whitespace=True)
+    both = ContentDigest("blake2b", ignore_case=True, collapse_whitespace=True)
+
+    assert exact("Hello  World") != exact("hello world")
+    assert folded("Hello World") == folded("hELLO wORLD") != folded("Hello  World")
+    assert collapsed(" Hello \t\n World ") == collapsed("Hello World") != collapsed("hello world")
+    assert both("  HELLO\n\nworld") == both("hello world") == exact("hello world")
+    assert folded("Straße") == folded("STRASSE")    # Case folding, not just lower()
+
+@pytest.mark.parametrize("algorithm", ["blake2b", "md5", "sha1", "sha256"])
+def test_digests_are_stable_64_bit_ints(algorithm):
+    digest = ContentDigest(algorithm)
+    assert digest("message") == ContentDigest(algorithm)("message")
+    assert 0 <= digest("message") < 2 ** 64 and digest("message") != digest("massage")
+
+def test_unknown_algorithm_is_rejected():
+    with pytest.raises(ValueError, match="crc32"):
+        ContentDigest("crc32")
+
+def test_xxh64_falls_back_to_blake2b_without_xxhash(monkeypatch):
+    monkeypatch.setattr(content_digest, "xxhash", None)
+    digest = ContentDigest("xxh64", ignore_case=True)
+    assert digest.algorithm == "blake2b"
+    assert digest("Some Content") == ContentDigest("blake2b", ignore_case=True)("some content")
+
+def test_xxh64_is_used_when_xxhash_is_installed():
+    xxhash = pytest.importorskip("xxhash")
+    digest = ContentDigest("xxh64")
+    assert digest.algorithm == "xxh64" and digest("content") == xxhash.xxh64_intdigest(b"content")
+
+def test_bloom_filter_has_no_false_negatives_and_keeps_its_error_rate():
+    rng = random.Random(50)
+    bloom = ScalableBloomFilter(initial_capacity=1000, error_rate=0.01)
+    added = {rng.getrandbits(64) for _ in range(7000)}
+    for digest in added:
+        bloom.add(digest)
+
+    assert len(bloom.slices) == 3    # 1000 + 2000 + 4000
+    assert all(digest in bloom for digest in added)
+    probes = [digest for digest in (rng.getrandbits(64) for _ in range(100_000)) if digest not in added]
+    false_positives = sum(digest in bloom for digest in probes)
+    assert false_positives / len(probes) <= 0.01
+
+def test_bloom_filter_add_reports_repeats():
+    bloom = ScalableBloomFilter(initial_capacity=10)
+    assert bloom.add(12345) and not bloom.add(12345)
+    assert len(bloom) == 1 and bloom.size_bytes > 0
+
+def test_bloom_filter_state_round_trip():
+    rng = random.Random(51)
+    bloom = ScalableBloomFilter(initial_capacity=100, error_rate=0.001)
+    added = [rng.getrandbits(64) for _ in range(250)]
+    for digest in added:
+        bloom.add(digest)
+
+    restored = ScalableBloomFilter.from_state(json.loads(json.dumps(bloom.to_state())))
+    assert restored.to_state() == bloom.to_state()
+    assert len(restored) == len(bloom) and all(digest in restored for digest in added)
+
+    # The restored filter keeps filling its last slice rather than starting a new one
+    extra = rng.getrandbits(64)
+    assert restored.add(extra) and extra in restored
+    assert len(restored.slices) == len(bloom.slices)
@@ -0,0 +1,103 @@
+"""Tests for per-conversation ordering and cross-conversation parallelism"""
+
+import time
+import random
+import threading
+
+import pytest
+
+from conversation_executor import ConversationOrderedExecutor, conversation_id
+
+@pytest.fixture
+def executor():
+    executor = ConversationOrderedExecutor(num_lanes=4)
+    executor.start()
+    yield executor
+    executor.stop()
+
+def conversations_on_different_lanes(executor, count):
+    by_lane = {}
+    for i in range(100):
+        conversation = conversation_id(f"agent{i}", "coordinator")
+        by_lane.setdefault(executor.lane_for(conversation), conversation)
+    assert len(by_lane) >= count
+    return list(by_lane.values())[:count]
+
+def test_one_conversation_runs_in_order_on_one_lane(executor):
+    rng = random.Random(26)
+    conversation = conversation_id("agent1", "coordinator")
+    seen = []
+
+    def handle(sequence):
+        time.sleep(rng.random() / 1000)
+        seen.append((sequence, threading.current_thread().name))
+
+    lanes = {executor.submit(conversation, handle, sequence) for sequence in range(50)}
+    assert executor.drain(5)
+    assert [sequence for sequence, _ in seen] == list(range(50))
+    assert lanes == {executor.lane_for(conversation)}
+    assert {thread for _, thread in seen} == {f"conversation-lane-{executor.lane_for(conversation)}"}
+
+def test_different_conversations_run_concurrently(executor):
+    first, second = conversations_on_different_lanes(executor, 2)
+    both_running = threading.Barrier(2, timeout=5)
+    met = []
+
+    def handle():
+        both_running.wait()    # Breaks after 5s unless the other conversation runs at the same time
+        met.append(True)
+
+    executor.submit(first, handle)
+    executor.submit(second, handle)
+    assert executor.drain(10)
+    assert met == [True, True]
+
+def test_drain_waits_for_running_work(executor):
+    release = threading.Event()
+    executor.submit("blocked", release.wait)
+    assert not executor.drain(timeout=0.05)
+
+    release.set()
+    assert executor.drain(timeout=5)
+    assert sum(executor.get_stats()['completed']) == 1
+
+def test_stop_finishes_queued_work_then_refuses_more():
+    executor = ConversationOrderedExecutor(num_lanes=2, name="stopping")
+    executor.start()
+    done = []
+    for i in range(20):
+        executor.submit(f"c{i % 3}", lambda i=i: (time.sleep(0.001), done.append(i)))
+    executor.stop()
+
+    assert sorted(done) == list(range(20))
+    assert not executor.running and not any(worker.is_alive() for worker in executor.workers)
+    with pytest.raises(RuntimeError):
+        executor.submit("c0", done.append, 99)
+
+def test_a_failing_task_does_not_stop_its_lane(executor):
+    done = []
+    lane = executor.submit("flaky", lambda: 1 / 0)
+    executor.submit("flaky", done.append, "after")
+    assert executor.drain(5)
+    assert done == ["after"]
+    stats = executor.get_stats()
+    assert stats['errors'][lane] == 1 and stats['completed'][lane] == 1
+
+def test_network_handlers_keep_each_senders_order(local_network):
+    network = local_network(["coordinator", "helper"], handler_lanes=4)
+    received = []
+    network.agents["coordinator"].register_message_handler("text", lambda message: received.append(
+        (message.sender, int(message.content))))
+
+    for i in range(30):
+        network.user_node.send_message("coordinator", str(i))
+        network.agents["helper"].send_message("coordinator", str(i))
+    network.transport.drain()
+    assert network.handler_executor.drain(5)
+
+    for sender in ("user", "helper"):
+        assert [n for s, n in received if s == sender] == list(range(30))
+
+def test_lane_count_is_checked():
+    with pytest.raises(ValueError):
+        ConversationOrderedExecutor(num_lanes=0)
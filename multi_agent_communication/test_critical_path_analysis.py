@@ -0,0 +1,83 @@
+"""Tests for cycle detection and critical-path scheduling against networkx"""
+
+import networkx as nx
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from critical_path_analysis import analyze_critical_paths, strongly_connected_components, weighted_csr
+
+def random_weights(rng, n, density, acyclic=False):
+    weights = np.where(rng.random((n, n)) < density, rng.integers(1, 10, size=(n, n)), 0).astype(float)
+    if acyclic:
+        weights = np.triu(weights, k=1)    # i depends on j only for j > i
+    return weights
+
+def test_components_match_networkx_and_follow_edges():
+    rng = np.random.default_rng(40)
+    for _ in range(40):
+        n = int(rng.integers(1, 80))
+        weights = random_weights(rng, n, rng.choice([0.01, 0.04, 0.1]))
+        indptr, indices, _ = weighted_csr(weights)
+        component = strongly_connected_components(indptr, indices)
+
+        expected = {frozenset(c) for c in nx.strongly_connected_components(nx.DiGraph(weights > 0))}
+        actual = {}
+        for node, c in enumerate(component.tolist()):
+            actual.setdefault(c, set()).add(node)
+        assert {frozenset(c) for c in actual.values()} == expected
+
+        rows, cols = np.nonzero(weights)
+        assert np.all(component[rows] >= component[cols])
+
+def naive_schedule(weights, durations):
+    """Earliest finish per agent by dynamic programming over a DAG"""
+    graph = nx.DiGraph(weights > 0)
+    graph.add_nodes_from(range(len(durations)))
+    finish = {}
+    for node in reversed(list(nx.topological_sort(graph))):
+        start = max((finish[dep] + weights[node, dep] for dep in graph.successors(node)), default=0.0)
+        finish[node] = start + durations[node]
+    return np.array([finish[i] for i in range(len(durations))])
+
+def test_schedule_of_random_dags():
+    rng = np.random.default_rng(4)
+    for _ in range(40):
+        n = int(rng.integers(1, 60))
+        weights = random_weights(rng, n, rng.choice([0.03, 0.1, 0.3]), acyclic=True)
+        permutation = rng.permutation(n)
+        weights = weights[np.ix_(permutation, permutation)]
+        durations = rng.integers(0, 5, size=n).astype(float)
+        agents = [f"a{i}" for i in range(n)]
+
+        analysis = analyze_critical_paths(weights, agents, durations)
+        expected = naive_schedule(weights, durations)
+        assert not analysis.has_cycles
+        np.testing.assert_allclose(analysis.earliest_finish, expected)
+        assert analysis.length == pytest.approx(expected.max())
+        assert np.all(analysis.slack >= -1e-9)
+        np.testing.assert_allclose(analysis.latest_finish - analysis.latest_start, durations)
+
+        # The reported path is a real dependency chain of the full length, made of critical agents
+        path = [agents.index(agent) for agent in analysis.critical_path]
+        assert all(weights[later, earlier] > 0 for earlier, later in zip(path, path[1:]))
+        length = durations[path[0]] + sum(weights[later, earlier] + durations[later]
+                                          for earlier, later in zip(path, path[1:]))
+        assert length == pytest.approx(analysis.length)
+        assert set(analysis.critical_path) <= set(analysis.critical_agents)
+
+def test_cycles_are_reported_and_scheduled_as_one_unit():
+    agents = ["a", "b", "c", "d", "e"]
+    weights = np.zeros((5, 5))
+    weights[0, 1] = weights[1, 0] = 1.0       # a and b depend on each other
+    weights[2, 0] = 2.0                       # c depends on the a/b cycle
+    weights[3, 3] = 1.0                       # d depends on itself
+    durations = np.array([1.0, 3.0, 1.0, 0.0, 0.0])
+
+    for matrix in (weights, sp.csr_matrix(weights)):
+        analysis = analyze_critical_paths(matrix, agents, durations)
+        assert sorted(map(sorted, analysis.cycles)) == [["a", "b"], ["d"]]
+        assert analysis.earliest_finish[0] == analysis.earliest_finish[1] == 3.0
+        assert analysis.length == 6.0
+        assert analysis.critical_path == ["a", "b", "c"]
+        assert analysis.slack_of("e") == 6.0
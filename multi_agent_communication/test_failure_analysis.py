@@ -0,0 +1,105 @@
+"""Tests for articulation points, bridges, dominators and removal what-ifs against networkx"""
+
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+
+from critical_path_analysis import strongly_connected_components
+from failure_analysis import (FailureAnalyzer, articulation_points_and_bridges, dominated_counts,
+                              dominator_tree, undirected_csr)
+from graph_metrics import adjacency_to_csr
+from reachability_engine import ReachabilityIndex
+
+def random_adjacency(rng, n, density):
+    return rng.random((n, n)) < density
+
+def test_cut_vertices_and_bridges_match_networkx():
+    rng = np.random.default_rng(41)
+    for _ in range(40):
+        n = int(rng.integers(1, 80))
+        adjacency = random_adjacency(rng, n, rng.choice([0.01, 0.03, 0.08]))
+        points, bridges = articulation_points_and_bridges(*undirected_csr(*adjacency_to_csr(adjacency)))
+
+        graph = nx.Graph(adjacency | adjacency.T)
+        graph.add_nodes_from(range(n))
+        graph.remove_edges_from(nx.selfloop_edges(graph))
+        assert sorted(np.asarray(points).tolist()) == sorted(nx.articulation_points(graph))
+        assert sorted(bridges) == sorted(tuple(sorted(edge)) for edge in nx.bridges(graph))
+
+def networkx_dominators(adjacency):
+    """Immediate dominators with a virtual root feeding every source component, as dominator_tree does"""
+    n = adjacency.shape[0]
+    graph = nx.DiGraph(adjacency)
+    graph.add_nodes_from(range(n))
+    graph.remove_edges_from(nx.selfloop_edges(graph))
+    component = strongly_connected_components(*adjacency_to_csr(adjacency))
+    rows, cols = np.nonzero(adjacency)
+    entered = set(component[cols[component[rows] != component[cols]]].tolist())
+    graph.add_edges_from(("root", v) for v in range(n) if component[v] not in entered)
+
+    idom = nx.immediate_dominators(graph, "root")
+    return [-1 if idom[v] == "root" else idom[v] for v in range(n)]
+
+def test_dominator_tree_matches_networkx():
+    rng = np.random.default_rng(42)
+    for _ in range(40):
+        n = int(rng.integers(1, 80))
+        adjacency = random_adjacency(rng, n, rng.choice([0.01, 0.03, 0.08]))
+        idom = dominator_tree(*adjacency_to_csr(adjacency))
+        assert idom.tolist() == networkx_dominators(adjacency)
+
+        # Dominated counts are dominator-subtree sizes
+        tree = nx.DiGraph((d, v) for v, d in enumerate(idom.tolist()) if d != -1)
+        counts = dominated_counts(idom)
+        for v in range(n):
+            assert counts[v] == (len(nx.descendants(tree, v)) if v in tree else 0)
+
+def test_removal_impact_matches_a_rebuilt_closure():
+    rng = np.random.default_rng(43)
+    agents = [f"a{i}" for i in range(30)]
+    adjacency = random_adjacency(rng, 30, 0.06)
+    np.fill_diagonal(adjacency, False)
+    analyzer = FailureAnalyzer(adjacency, agents, ReachabilityIndex.from_adjacency(adjacency))
+    closure = analyzer.reachability_index.as_matrix()
+
+    for node in range(30):
+        without = adjacency.copy()
+        without[node, :] = without[:, node] = False
+        lost = closure & ~ReachabilityIndex.from_adjacency(without).as_matrix()
+        lost[:, node] = False
+        lost[node] = False
+
+        impact = analyzer.remove_agent(agents[node])
+        assert impact.lost_pairs == int(lost.sum())
+        assert impact.dependents == [agents[i] for i in np.flatnonzero(closure[:, node]) if i != node]
+
+    for u, v in np.argwhere(adjacency)[:20]:
+        without = adjacency.copy()
+        without[u, v] = False
+        lost = closure & ~ReachabilityIndex.from_adjacency(without).as_matrix()
+        impact = analyzer.remove_link(agents[u], agents[v])
+        assert impact.lost_pairs == int(lost.sum())
+        assert impact.lost_reachability == {agents[i]: [agents[j] for j in np.flatnonzero(lost[i])]
+                                            for i in np.flatnonzero(lost.any(axis=1))}
+
+def test_removal_queries_build_the_index_when_none_is_given():
+    rng = np.random.default_rng(44)
+    adjacency = random_adjacency(rng, 25, 0.08)
+    agents = [f"a{i}" for i in range(25)]
+    given = FailureAnalyzer(adjacency, agents, ReachabilityIndex.from_adjacency(adjacency))
+    for matrix in (adjacency, sp.csr_matrix(adjacency)):
+        built = FailureAnalyzer(matrix, agents)
+        np.testing.assert_array_equal(built.reachability_index.as_matrix(), given.reachability_index.as_matrix())
+        assert built.remove_agent("a3") == given.remove_agent("a3")
+        u, v = np.argwhere(adjacency)[0]
+        assert built.remove_link(agents[u], agents[v]) == given.remove_link(agents[u], agents[v])
+
+def test_bottlenecks_on_a_chain():
+    # a depends on b, b on c: c is every chain's foundation, b sits on a's only chain
+    adjacency = np.zeros((3, 3), dtype=bool)
+    adjacency[0, 1] = adjacency[1, 2] = True
+    analyzer = FailureAnalyzer(adjacency, ["a", "b", "c"])
+    assert analyzer.immediate_dominators == {'a': "b", 'b': "c", 'c': None}
+    assert analyzer.articulation_points == ["b"]
+    assert sorted(analyzer.bridges) == [("a", "b"), ("b", "c")]
+    assert [str(agent) for agent in analyzer.bottlenecks()['agent']] == ["c", "b"]
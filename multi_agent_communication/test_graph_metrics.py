@@ -0,0 +1,60 @@
+"""Tests for the native graph metrics against networkx"""
+
+import networkx as nx
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from graph_metrics import (adjacency_to_csr, betweenness_centrality, betweenness_error_bound,
+                           compute_graph_metrics, samples_for_error)
+
+def random_adjacency(rng, n, density):
+    adjacency = rng.random((n, n)) < density
+    np.fill_diagonal(adjacency, False)
+    return adjacency
+
+def as_digraph(adjacency):
+    return nx.from_numpy_array(adjacency.astype(int), create_using=nx.DiGraph)
+
+@pytest.mark.parametrize("normalized", [True, False])
+def test_betweenness_matches_networkx(normalized):
+    rng = np.random.default_rng(37)
+    for _ in range(25):
+        n = int(rng.integers(1, 60))
+        adjacency = random_adjacency(rng, n, rng.choice([0.02, 0.08, 0.3]))
+        expected = nx.betweenness_centrality(as_digraph(adjacency), normalized=normalized)
+        actual = betweenness_centrality(*adjacency_to_csr(adjacency), normalized=normalized)
+        np.testing.assert_allclose(actual, [expected[i] for i in range(n)], atol=1e-9)
+
+def test_betweenness_counts_every_shortest_path():
+    # Two equal routes from 0 to 3; each middle agent carries half of them
+    adjacency = np.zeros((4, 4), dtype=bool)
+    adjacency[0, 1] = adjacency[0, 2] = adjacency[1, 3] = adjacency[2, 3] = True
+    np.testing.assert_allclose(betweenness_centrality(*adjacency_to_csr(adjacency), normalized=False),
+                               [0.0, 0.5, 0.5, 0.0])
+
+def test_metrics_match_networkx_for_dense_and_sparse_input():
+    rng = np.random.default_rng(7)
+    adjacency = random_adjacency(rng, 40, 0.1)
+    agents = [f"agent{i}" for i in range(40)]
+    graph = nx.relabel_nodes(as_digraph(adjacency), dict(enumerate(agents)))
+
+    for matrix in (adjacency, sp.csr_matrix(adjacency)):
+        metrics = compute_graph_metrics(matrix, agents)
+        assert metrics['nodes'] == 40 and metrics['edges'] == graph.number_of_edges()
+        assert metrics['density'] == pytest.approx(nx.density(graph))
+        for name, expected in (('in_degree_centrality', nx.in_degree_centrality(graph)),
+                               ('out_degree_centrality', nx.out_degree_centrality(graph)),
+                               ('betweenness_centrality', nx.betweenness_centrality(graph))):
+            assert metrics[name] == pytest.approx(expected)
+
+def test_sampled_betweenness_stays_within_its_error_bound():
+    rng = np.random.default_rng(11)
+    adjacency = random_adjacency(rng, 200, 0.03)
+    csr = adjacency_to_csr(adjacency)
+    exact = betweenness_centrality(*csr)
+    samples = samples_for_error(200, 0.25)
+    assert samples < 200 and betweenness_error_bound(200, samples) <= 0.25
+    sampled = betweenness_centrality(*csr, samples=samples, seed=3)
+    assert np.abs(sampled - exact).max() <= betweenness_error_bound(200, samples)
+    np.testing.assert_array_equal(betweenness_centrality(*csr, samples=500), exact)
@@ -0,0 +1,36 @@
+"""Tests for communication-aware federated mesh clusters"""
+
+import numpy as np
+import scipy.sparse as sp
+
+from hybrid_topology_system import HybridTopologyBuilder
+
+def test_federated_mesh_accepts_arrays_sparse_matrices_and_nested_lists():
+    agents = [f"agent{i}" for i in range(9)]
+    communication = np.zeros((9, 9))
+    for group in ([0, 4, 8], [1, 3, 5], [2, 6, 7]):
+        for i in group:
+            for j in group:
+                if i != j:
+                    communication[i, j] = 10 + i
+    builder = HybridTopologyBuilder(agents)
+
+    results = [builder.federated_mesh(matrix)
+               for matrix in (communication, sp.csr_matrix(communication), communication.tolist())]
+    clusterings = [sorted(sorted(cluster.agents) for cluster in result["clusters"]) for result in results]
+    assert clusterings[0] == [["agent0", "agent4", "agent8"], ["agent1", "agent3", "agent5"],
+                              ["agent2", "agent6", "agent7"]]
+    assert clusterings[1] == clusterings[0] and clusterings[2] == clusterings[0]
+
+    # The busiest agent inside each cluster leads it
+    leaders = [[cluster.agents[0] for cluster in result["clusters"]] for result in results]
+    assert sorted(leaders[0]) == ["agent5", "agent7", "agent8"]
+    assert leaders[1] == leaders[0] and leaders[2] == leaders[0]
+    assert results[2]["partition"].cut_weight == 0.0
+
+def test_federated_mesh_without_a_matrix_slices_by_position():
+    builder = HybridTopologyBuilder([f"agent{i}" for i in range(6)])
+    result = builder.federated_mesh()
+    assert [cluster.agents for cluster in result["clusters"]] == [["agent0", "agent1"], ["agent2", "agent3"],
+                                                                  ["agent4", "agent5"]]
+    assert "partition" not in result
@@ -0,0 +1,156 @@
+"""Tests for loop-prevention state and network-wide path tracing"""
+
+import pytest
+
+import content_digest
+from agent_context import current_agent
+from content_digest import ContentDigest
+from loop_prevention_system import LoopPreventionManager, PathTrace
+
+@pytest.mark.parametrize("probabilistic", [False, True])
+def test_restored_manager_remembers_content_and_threads(probabilistic):
+    manager = LoopPreventionManager("agent", max_responses=2, digest=ContentDigest("blake2b", ignore_case=True),
+                                    probabilistic_dedup=probabilistic)
+    manager.record_processed_message("Hello there", "peer", "m1")
+
+    restored = LoopPreventionManager.from_state(manager.export_state())
+    assert restored.digest.algorithm == "blake2b" and restored.digest.ignore_case
+    assert not restored.should_process_message("HELLO THERE", "peer")
+    restored.record_processed_message("Second", "peer", "m2")
+    assert not restored.should_process_message("Third", "peer")    # Thread count carried over
+    assert list(restored.processed_messages) == ["m1", "m2"]
+
+def test_restore_refuses_a_digest_algorithm_that_is_not_available(monkeypatch):
+    state = LoopPreventionManager("agent", digest=ContentDigest("blake2b")).export_state()
+    state['digest']['algorithm'] = "xxh64"
+    monkeypatch.delitem(content_digest.DIGEST_FUNCTIONS, "xxh64", raising=False)
+
+    with pytest.raises(ValueError, match="xxh64"):
+        LoopPreventionManager.from_state(state)
+
+RING = {'a': "b", 'b': "c", 'c': "a"}
+
+def forward_around_the_ring(message):
+    """Pass the message on to the next agent of RING, remembering whether the send went out"""
+    node = current_agent()
+    sent = node.send_message(RING[node.agent_id], message.content)
+    node.network_manager.hops.append((node.agent_id, (message.metadata or {}).get('hops'), sent))
+
+def ring_network(local_network, path_trace):
+    network = local_network(list(RING), path_trace=path_trace)
+    network.hops = []
+    for node in network.agents.values():
+        node.register_message_handler("text", forward_around_the_ring)
+    return network
+
+def test_a_cycle_is_cut_when_it_comes_back_to_an_agent(local_network):
+    trace = PathTrace()
+    network = ring_network(local_network, trace)
+    network.user_node.send_message("a", "go round")
+    network.transport.drain()
+
+    # a -> b and b -> c go out; c -> a would revisit a
+    assert network.hops == [("a", 0, True), ("b", 1, True), ("c", 2, False)]
+    assert trace.dropped == {'ttl': 0, 'revisit': 1}
+
+def test_hop_limit_stops_a_cycle_when_revisits_are_allowed(local_network):
+    trace = PathTrace(max_hops=4, drop_revisits=False)
+    network = ring_network(local_network, trace)
+    network.user_node.send_message("a", "go round")
+    network.transport.drain()
+
+    assert [sent for _, _, sent in network.hops] == [True] * 4 + [False]
+    assert network.hops[-1] == ("b", 4, False)    # Its message would be hop 5
+    assert trace.dropped == {'ttl': 1, 'revisit': 0}
+
+def test_replies_may_return_to_the_requester(local_network):
+    trace = PathTrace()
+    network = local_network(["a"], path_trace=trace)
+    answers = []
+
+    def answer(message):
+        node = current_agent()
+        node.send_message("user", "not a reply")    # Heads back to the user without in_reply_to
+        answers.append(node.reply(message, "reply"))
+
+    network.agents["a"].register_message_handler("text", answer)
+    assert network.user_node.send_request("a", "question", timeout=5).result(timeout=5).content == "reply"
+    assert answers == [True] and trace.dropped == {'ttl': 0, 'revisit': 1}
+
+def test_untraced_messages_pass(local_network):
+    trace = PathTrace(max_hops=0)
+    assert trace.check(None, "a") is None and trace.check({'origin': "elsewhere"}, "a") is None
+    assert trace.dropped == {'ttl': 0, 'revisit': 0}
+
+    # Without a path trace the network adds no metadata, and nothing is dropped
+    network = ring_network(local_network, None)
+    network.agents["c"].register_message_handler("text", lambda message: network.hops.append(("c", None, None)))
+    network.user_node.send_message("a", "once round")
+    network.transport.drain()
+    assert [agent for agent, _, _ in network.hops] == ["a", "b", "c"]
+    assert all(message.metadata is None for message in network.transport.delivered)
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def test_entries_expire_after_the_ttl():
+    clock = FakeClock()
+    start = clock.now
+    manager = LoopPreventionManager("agent", max_responses=10, message_ttl_minutes=1, clock=clock)
+    manager.record_processed_message("first", "a", "m1")
+    manager.record_processed_message("second", "b", "m2")
+    clock.now += 30
+    manager.record_processed_message("third", "c", "m3")
+
+    clock.now = start + 61
+    manager._evict()
+    assert list(manager.processed_messages) == ["m3"]
+    assert list(manager.content_hashes) == [manager.digest("third")]
+    assert manager.conversation_threads == {"c-agent": 1}
+    assert manager.should_process_message("first", "a")    # Forgotten, so no longer a duplicate
+
+    clock.now = start + 91
+    manager._evict()
+    assert not manager.processed_messages and not manager.content_hashes
+    assert not manager.conversation_threads and not manager._thread_activity
+    assert manager.evicted == {'expired': 3, 'capacity': 0}
+
+def test_caps_evict_the_least_recently_active_entry():
+    clock = FakeClock()
+    manager = LoopPreventionManager("agent", max_responses=10, max_tracked_messages=2, max_tracked_threads=2,
+                                    clock=clock)
+    manager.record_processed_message("one", "a", "m1")
+    clock.now += 1
+    manager.record_processed_message("two", "b", "m2")
+    clock.now += 1
+    manager.record_processed_message("one", "a", "m1")    # a, "one" and m1 are active again
+    clock.now += 1
+    manager.record_processed_message("three", "c", "m3")
+
+    assert list(manager.processed_messages) == ["m1", "m3"]
+    assert list(manager.content_hashes) == [manager.digest("one"), manager.digest("three")]
+    assert manager.conversation_threads == {"a-agent": 2, "c-agent": 1}
+    assert manager.evicted == {'expired': 0, 'capacity': 1}
+
+def test_bloom_generations_are_dropped_after_one_and_a_half_ttls():
+    clock = FakeClock()
+    start = clock.now
+    manager = LoopPreventionManager("agent", max_responses=10, message_ttl_minutes=1, clock=clock,
+                                    probabilistic_dedup=True)
+    manager.record_processed_message("old", "a", "m1")
+    clock.now += 31    # Past half a TTL: the next message starts a new generation
+    manager.record_processed_message("new", "b", "m2")
+    assert [started for started, _ in manager.content_filters] == [start, start + 31]
+
+    clock.now = start + 89
+    manager._evict()
+    assert len(manager.content_filters) == 2 and not manager.should_process_message("old", "c")
+
+    clock.now = start + 90
+    manager._evict()
+    assert [started for started, _ in manager.content_filters] == [start + 31]
+    assert manager.should_process_message("old", "c") and not manager.should_process_message("new", "c")
@@ -0,0 +1,69 @@
+"""Tests for the persistent matrix cache under concurrent writers and readers"""
+
+import os
+import json
+import threading
+
+import numpy as np
+import scipy.sparse as sp
+
+from matrix_cache import MatrixCache
+
+def test_round_trip_with_dense_and_sparse_arrays(tmp_path):
+    cache = MatrixCache(str(tmp_path))
+    dense = np.arange(12.0).reshape(3, 4)
+    sparse = sp.random(50, 50, density=0.1, format="csr", random_state=0)
+    cache.save("key", {'topology': "mesh"}, {'dense': dense, 'sparse': sparse}, {'n': 3})
+
+    config, arrays, metadata = cache.load("key")
+    assert config == {'topology': "mesh"} and metadata == {'n': 3}
+    np.testing.assert_array_equal(arrays['dense'], dense)
+    assert (arrays['sparse'] != sparse).nnz == 0
+    assert cache.load_config("key") == {'topology': "mesh"}
+
+def test_concurrent_saves_of_one_key_all_succeed(tmp_path):
+    cache = MatrixCache(str(tmp_path))
+    array = np.ones((200, 200))
+    errors = []
+    start = threading.Barrier(8)
+
+    def save():
+        start.wait()
+        try:
+            cache.save("shared", {'ok': True}, {'array': array})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert cache.load("shared")[0] == {'ok': True}
+    assert os.listdir(tmp_path) == ["shared"]    # No staging directories left behind
+
+def test_existing_entry_is_kept(tmp_path):
+    cache = MatrixCache(str(tmp_path))
+    cache.save("key", {'version': 1})
+    cache.save("key", {'version': 2})
+    assert cache.load_config("key") == {'version': 1}
+    assert os.listdir(tmp_path) == ["key"]
+
+def test_readers_see_a_miss_for_missing_or_foreign_entries(tmp_path):
+    cache = MatrixCache(str(tmp_path))
+    assert cache.load("absent") is None and cache.load_config("absent") is None
+
+    cache.save("partial", {'a': 1}, {'array': np.zeros(3)})
+    os.remove(os.path.join(cache.entry_path("partial"), "array.npy"))    # Invalidated mid-read
+    assert cache.load("partial") is None
+
+    cache.save("old", {'a': 1})
+    manifest_path = os.path.join(cache.entry_path("old"), "manifest.json")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest['format'] = -1
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+    assert cache.load("old") is None and cache.load_config("old") is None
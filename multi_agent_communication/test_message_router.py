@@ -0,0 +1,103 @@
+"""Tests for verb and pattern routing in the compiled message router"""
+
+import re
+
+import pytest
+
+from message_router import MessageRouter
+from multi_agent_screen_network import Message
+
+def message(content):
+    return Message("m", "sender", "agent", content, "")
+
+@pytest.fixture
+def calls():
+    return []
+
+def recorder(calls, name):
+    return lambda routed: calls.append((name, routed))
+
+def test_verb_prefix_routing_and_payload(calls):
+    router = MessageRouter()
+    router.on("TASK_REQUEST", recorder(calls, "task"))
+    router.on("RESULT", recorder(calls, "result"))
+
+    router(message("TASK_REQUEST:analyze: the logs"))
+    router(message("  RESULT:42"))
+    (name, task), (_, result) = calls
+    assert name == "task" and task.verb == "TASK_REQUEST" and task.payload == "analyze: the logs"
+    assert task.sender == "sender" and task.content == "TASK_REQUEST:analyze: the logs"
+    assert result.verb == "RESULT" and result.payload == "42"
+
+def test_longest_verb_wins_and_the_separator_is_required(calls):
+    router = MessageRouter()
+    router.on("COUNTER", recorder(calls, "counter"))
+    router.on("COUNTER_BID", recorder(calls, "counter_bid"))
+    router.set_default(lambda msg: calls.append(("default", msg)))
+
+    router(message("COUNTER_BID:resource1,50"))
+    router(message("COUNTER:7"))
+    router(message("COUNTERBID:7"))
+    assert [(name, getattr(item, "payload", None)) for name, item in calls] == [
+        ("counter_bid", "resource1,50"), ("counter", "7"), ("default", None)]
+    assert calls[-1][1].content == "COUNTERBID:7"    # The default handler gets the plain Message
+
+def test_registering_a_verb_again_replaces_its_handler(calls):
+    router = MessageRouter()
+    router.on("PING", recorder(calls, "old"))
+    router(message("PING:1"))
+    router.on("PING", recorder(calls, "new"))
+    router(message("PING:2"))
+    assert [name for name, _ in calls] == ["old", "new"] and router.verbs == ["PING"]
+
+def test_pattern_routes_dispatch_by_their_own_group(calls):
+    router = MessageRouter()
+    router.on("BID", recorder(calls, "bid"))
+    # Named groups that end the pattern must not be mistaken for the route
+    router.on_pattern(r"OFFER (?P<item>\w+) for (?P<price>\d+)", recorder(calls, "offer"), verb="OFFER")
+    router.on_pattern(r"(?P<code>[A-Z]{3})-\d+", recorder(calls, "ticket"))
+
+    router(message("OFFER lamp for 30 today"))
+    router(message("ABC-123 is fixed"))
+    router(message("BID:resource2,10"))
+
+    (offer_name, offer), (ticket_name, ticket), (bid_name, bid) = calls
+    assert offer_name == "offer" and offer.verb == "OFFER"
+    assert offer.match.group("item") == "lamp" and offer.match.group("price") == "30"
+    assert offer.payload == " today"
+    assert ticket_name == "ticket" and ticket.verb == "ABC-123" and ticket.match.group("code") == "ABC"
+    assert ticket.payload == " is fixed"
+    assert bid_name == "bid" and bid.payload == "resource2,10"
+
+def test_verbs_take_precedence_over_patterns(calls):
+    router = MessageRouter()
+    router.on_pattern(r"STATUS\S*", recorder(calls, "pattern"))
+    router.on("STATUS", recorder(calls, "verb"))
+    router(message("STATUS:ok"))
+    assert [name for name, _ in calls] == ["verb"]
+
+def test_unrouted_messages_go_to_the_fallback_or_nowhere(calls):
+    router = MessageRouter()
+    router.on("HELLO", recorder(calls, "hello"))
+    router(message("goodbye"))    # No default handler: ignored
+    assert calls == [] and router.route(message("goodbye")) is None
+
+    router.set_default(lambda msg: calls.append(("default", msg)))
+    router(message("goodbye"))
+    assert calls[0][0] == "default" and calls[0][1].content == "goodbye"
+
+    empty = MessageRouter()
+    empty.set_default(lambda msg: calls.append(("empty", msg)))
+    empty(message("HELLO:x"))
+    assert calls[-1][0] == "empty"
+
+def test_route_parses_without_dispatching_and_custom_separators(calls):
+    router = MessageRouter(separator=" | ")
+    router.on("LOG", recorder(calls, "log"))
+    routed = router.route(message("LOG | disk full | retrying"))
+    assert calls == [] and routed.verb == "LOG" and routed.payload == "disk full | retrying"
+    assert router.route(message("LOG:disk full")) is None
+
+def test_bad_patterns_fail_at_registration():
+    with pytest.raises(re.error):
+        MessageRouter().on_pattern(r"(unclosed", lambda routed: None)
@@ -0,0 +1,80 @@
+"""Tests for request/reply correlation on agent nodes, over the in-process test transport"""
+
+import time
+import threading
+
+import pytest
+
+from agent_context import current_agent
+
+@pytest.fixture
+def network(local_network):
+    network = local_network(["worker", "silent"])
+    network.agents["silent"].register_message_handler("text", lambda message: None)
+    return network
+
+def test_replies_complete_the_request_they_answer(network):
+    held = []
+    both_arrived = threading.Event()
+
+    def answer_in_reverse(message):
+        held.append(message)
+        if len(held) == 2:
+            for request in reversed(held):
+                current_agent().reply(request, f"answer to {request.content}")
+            both_arrived.set()
+
+    network.agents["worker"].register_message_handler("text", answer_in_reverse)
+    user = network.user_node
+    first = user.send_request("worker", "first", timeout=5)
+    second = user.send_request("worker", "second", timeout=5)
+
+    assert both_arrived.wait(5)
+    assert first.result(timeout=5).content == "answer to first"
+    assert second.result(timeout=5).content == "answer to second"
+    assert first.result().metadata['in_reply_to'] == held[0].metadata['correlation_id']
+    assert not user.pending_requests
+
+def test_uncorrelated_and_late_replies_reach_the_handler(network):
+    seen, requests = [], []
+    user = network.user_node
+    user.register_message_handler("text", seen.append)
+    network.agents["silent"].register_message_handler("text", requests.append)
+
+    network.agents["worker"].send_message("user", "unsolicited", metadata={'in_reply_to': "unknown"})
+    late = user.send_request("silent", "quick", timeout=0.05)
+    network.transport.drain()
+    time.sleep(0.1)
+    user._expire_pending_requests()
+    network.agents["silent"].reply(requests[0], "too late")
+    network.transport.drain()
+
+    assert isinstance(late.exception(timeout=1), TimeoutError)
+    assert [message.content for message in seen] == ["unsolicited", "too late"]
+
+def test_requests_time_out(network):
+    user = network.user_node
+    expiring = user.send_request("silent", "anyone?", timeout=0.05)
+    waiting = user.send_request("silent", "take your time", timeout=None)
+    time.sleep(0.1)
+    user._expire_pending_requests()
+
+    with pytest.raises(TimeoutError):
+        expiring.result(timeout=1)
+    assert not waiting.done() and len(user.pending_requests) == 1
+    waiting.cancel()
+    assert not user.pending_requests    # Cancelling drops the waiter
+
+def test_undeliverable_requests_fail_at_once(network):
+    future = network.user_node.send_request("nobody", "hello")
+    with pytest.raises(ConnectionError):
+        future.result(timeout=1)
+    assert not network.user_node.pending_requests
+
+def test_stop_cancels_outstanding_requests(network):
+    user = network.user_node
+    futures = [user.send_request("silent", f"request {i}", timeout=30) for i in range(3)]
+    network.transport.drain()
+    user.stop()
+    assert all(future.cancelled() for future in futures)
+    assert not user.pending_requests
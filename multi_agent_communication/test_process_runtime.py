@@ -0,0 +1,64 @@
+"""Tests for the multi-process runtime: workers exchanging messages over their mailboxes"""
+
+import time
+import threading
+
+from agent_context import current_agent
+from process_runtime import ProcessNetworkManager
+
+BURST = 2000
+CHUNK = "x" * 4096      # A burst is several times larger than a Unix socket buffer
+_received = {}
+
+def burst_handler(message):
+    """Send BURST chunks to the agent named in the message"""
+    for i in range(BURST):
+        current_agent().send_message(message.content, f"{i}:{CHUNK}", message_type="chunk")
+
+def slow_handler(message):
+    time.sleep(float(message.content))
+    current_agent().reply(message, "done")
+
+def chunk_handler(message):
+    count = _received[message.recipient] = _received.get(message.recipient, 0) + 1
+    if count == BURST:
+        current_agent().send_message("user", message.recipient, message_type="done")
+
+def test_workers_sending_bursts_to_each_other_do_not_deadlock():
+    network = ProcessNetworkManager(n_workers=2)
+    user = network.add_user()
+    for agent_id, worker in (("left", 0), ("right", 1)):
+        agent = network.add_agent(agent_id, worker=worker)
+        agent.register_message_handler("burst", burst_handler)
+        agent.register_message_handler("chunk", chunk_handler)
+
+    done = []
+    both_done = threading.Event()
+
+    def on_done(message):
+        done.append(message.content)
+        if len(done) == 2:
+            both_done.set()
+
+    user.register_message_handler("done", on_done)
+    network.start_network()
+    try:
+        user.send_message("left", "right", message_type="burst")
+        user.send_message("right", "left", message_type="burst")
+        assert both_done.wait(60), f"only {done} finished"
+        assert sorted(done) == ["left", "right"]
+        assert all(worker['restarts'] == 0 for worker in network.get_network_status()['workers'].values())
+    finally:
+        network.stop_network()
+
+def test_a_long_handler_does_not_get_its_worker_restarted():
+    network = ProcessNetworkManager(n_workers=1, heartbeat_interval=0.1, health_timeout=0.5)
+    user = network.add_user()
+    network.add_agent("slow").register_message_handler("text", slow_handler)
+    network.start_network()
+    try:
+        # Twenty heartbeat intervals, four times the health timeout
+        assert user.send_request("slow", "2.0", timeout=30).result(timeout=30).content == "done"
+        assert network.get_network_status()['workers'][0]['restarts'] == 0
+    finally:
+        network.stop_network()
@@ -0,0 +1,118 @@
+"""Tests for transitive closure engines and the incremental reachability index"""
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from reachability_engine import ReachabilityIndex, pack_rows, transitive_closure, unpack_rows
+
+def naive_closure(adjacency):
+    """Paths of at least one edge, by breadth-first search from every agent"""
+    adjacency = np.asarray(adjacency) != 0
+    n = adjacency.shape[0]
+    closure = np.zeros((n, n), dtype=bool)
+    for source in range(n):
+        frontier = np.flatnonzero(adjacency[source])
+        while frontier.size:
+            new = frontier[~closure[source, frontier]]
+            closure[source, new] = True
+            frontier = np.flatnonzero(adjacency[new].any(axis=0) & ~closure[source])
+    return closure
+
+def random_graph(rng, n, density):
+    return rng.random((n, n)) < density
+
+@pytest.mark.parametrize("engine", ["squaring", "bitset", "condensation"])
+def test_closure_engines_match_naive_closure(engine):
+    rng = np.random.default_rng(33)
+    for _ in range(40):
+        n = int(rng.integers(1, 90))
+        adjacency = random_graph(rng, n, rng.choice([0.01, 0.03, 0.1, 0.3]))
+        np.testing.assert_array_equal(transitive_closure(adjacency, engine), naive_closure(adjacency))
+
+def test_closure_of_sparse_input_and_large_graphs():
+    rng = np.random.default_rng(35)
+    adjacency = random_graph(rng, 700, 0.002)
+    expected = naive_closure(adjacency)
+    np.testing.assert_array_equal(transitive_closure(adjacency), expected)
+    np.testing.assert_array_equal(transitive_closure(sp.csr_matrix(adjacency)), expected)
+    np.testing.assert_array_equal(transitive_closure(sp.csr_matrix(adjacency), engine="bitset"), expected)
+
+def test_closure_diagonal_only_marks_cycles():
+    adjacency = np.zeros((4, 4), dtype=bool)
+    adjacency[0, 1] = adjacency[1, 0] = adjacency[2, 3] = adjacency[3, 3] = True
+    assert transitive_closure(adjacency).diagonal().tolist() == [True, True, False, True]
+
+def test_closure_rejects_non_square_and_unknown_engines():
+    with pytest.raises(ValueError):
+        transitive_closure(np.zeros((2, 3)))
+    with pytest.raises(ValueError):
+        transitive_closure(np.zeros((2, 2)), engine="magic")
+
+def test_pack_rows_round_trip():
+    rng = np.random.default_rng(0)
+    for n_cols in (1, 7, 64, 65, 130):
+        rows = rng.random((5, n_cols)) < 0.5
+        np.testing.assert_array_equal(unpack_rows(pack_rows(rows), n_cols), rows)
+
+def test_randomized_edits_keep_the_index_exact():
+    rng = np.random.default_rng(34)
+    for _ in range(30):
+        n = int(rng.integers(2, 70))
+        adjacency = random_graph(rng, n, rng.choice([0.02, 0.05, 0.15]))
+        index = ReachabilityIndex.from_adjacency(adjacency)
+
+        for _ in range(60):
+            before = index.as_matrix()
+            u, v = (int(x) for x in rng.integers(0, n, size=2))
+            if rng.random() < 0.5:
+                changed = index.add_edge(u, v)
+                adjacency[u, v] = True
+            else:
+                edges = np.argwhere(adjacency)
+                if len(edges):
+                    u, v = (int(x) for x in edges[rng.integers(len(edges))])
+                changed = index.remove_edge(u, v)
+                adjacency[u, v] = False
+
+            after = naive_closure(adjacency)
+            np.testing.assert_array_equal(index.as_matrix(), after)
+            np.testing.assert_array_equal(index.adjacency, adjacency)
+            # Every row that changed is reported
+            assert set(np.flatnonzero((before != after).any(axis=1))) <= set(changed.tolist())
+
+def test_what_if_rows_match_the_modified_graph_and_leave_the_index_alone():
+    rng = np.random.default_rng(41)
+    for _ in range(30):
+        n = int(rng.integers(2, 70))
+        adjacency = random_graph(rng, n, rng.choice([0.02, 0.05, 0.15]))
+        index = ReachabilityIndex.from_adjacency(adjacency)
+        closure = index.as_matrix()
+
+        for _ in range(20):
+            node = int(rng.integers(n))
+            without_node = adjacency.copy()
+            without_node[node, :] = without_node[:, node] = False
+            expected = naive_closure(without_node)
+            affected, words = index.rows_without_node(node)
+            rows = closure.copy()
+            rows[affected] = unpack_rows(words, n)
+            rows[:, node] = False
+            rows[node] = False
+            np.testing.assert_array_equal(rows, expected)
+
+            edges = np.argwhere(adjacency)
+            if len(edges):
+                u, v = (int(x) for x in edges[rng.integers(len(edges))])
+                without_edge = adjacency.copy()
+                without_edge[u, v] = False
+                affected, words = index.rows_without_edge(u, v)
+                rows = closure.copy()
+                rows[affected] = unpack_rows(words, n)
+                np.testing.assert_array_equal(rows, naive_closure(without_edge))
+
+            np.testing.assert_array_equal(index.as_matrix(), closure)
+
+    index = ReachabilityIndex.from_adjacency(np.zeros((3, 3), dtype=bool))
+    affected, words = index.rows_without_edge(0, 1)
+    assert affected.size == 0 and words.shape[0] == 0
@@ -0,0 +1,87 @@
+"""Tests for scatter-gather rounds over an in-process network"""
+
+import time
+
+import pytest
+
+from agent_context import current_agent
+from scatter_gather import ScatterGather, scatter_gather
+
+def answer(message):
+    node = current_agent()
+    node.reply(message, f"{node.agent_id}:{message.content}")
+
+def ignore(message):
+    pass
+
+@pytest.fixture
+def network(local_network):
+    network = local_network(["fast1", "fast2", "fast3", "silent"])
+    for agent_id in ("fast1", "fast2", "fast3"):
+        network.agents[agent_id].register_message_handler("text", answer)
+    network.agents["silent"].register_message_handler("text", ignore)
+    return network
+
+def test_every_agent_replies(network):
+    result = scatter_gather(network.user_node, {agent_id: "ping" for agent_id in ("fast1", "fast2", "fast3")})
+    assert {agent_id: reply.content for agent_id, reply in result.replies.items()} == {
+        'fast1': "fast1:ping", 'fast2': "fast2:ping", 'fast3': "fast3:ping"}
+    assert result.quorum_reached and not result.timed_out and not result.missing and not result.failed
+    assert set(result.latencies) == set(result.replies) and result.latency_stats()['max'] <= result.elapsed
+
+def test_quorum_stops_the_round_and_cancels_the_rest(network):
+    user = network.user_node
+    round_ = ScatterGather(user, {agent_id: "vote" for agent_id in network.agents}, quorum=2, deadline=10)
+    replies = list(round_)
+    result = round_.result()
+
+    assert [reply.ok for reply in replies] == [True, True]
+    assert result.quorum_reached and len(result.replies) == 2 and not result.timed_out
+    assert "silent" in result.missing and len(result.missing) == 2
+    assert result.elapsed < 5
+    # The third fast reply may land before the cancel; the silent agent's request is always cancelled
+    assert all(future.done() for future in round_._futures)
+    assert [future.cancelled() for future, agent_id in round_._futures.items() if agent_id == "silent"] == [True]
+    assert not user.pending_requests
+
+def test_deadline_returns_partial_results(network):
+    user = network.user_node
+    started = time.monotonic()
+    result = scatter_gather(user, {'fast1': "hurry", 'silent': "hurry"}, deadline=0.5)
+    assert time.monotonic() - started < 3
+    assert result.timed_out and not result.quorum_reached
+    assert list(result.replies) == ["fast1"] and result.missing == ["silent"]
+    assert not user.pending_requests
+
+def test_remaining_requests_can_be_left_running(network):
+    user = network.user_node
+    round_ = ScatterGather(user, {'fast1': "a", 'silent': "b"}, quorum=1, cancel_remaining=False)
+    result = round_.result()
+    assert result.quorum_reached and result.missing == ["silent"]
+    waiting = [future for future, agent_id in round_._futures.items() if agent_id == "silent"]
+    assert not waiting[0].done() and len(user.pending_requests) == 1
+    waiting[0].cancel()
+
+def test_unreachable_agents_count_as_failed(network):
+    result = scatter_gather(network.user_node, {'fast1': "x", 'nobody': "x"}, deadline=5)
+    assert list(result.replies) == ["fast1"] and "nobody" in result.failed
+    assert not result.quorum_reached and not result.missing
+
+def test_single_and_empty_rounds(network):
+    single = scatter_gather(network.user_node, {'fast2': "solo"})
+    assert single.replies['fast2'].content == "fast2:solo" and single.quorum_reached
+
+    round_ = ScatterGather(network.user_node, {})
+    assert list(round_) == []
+    empty = round_.result()
+    assert not empty.replies and not empty.missing and not empty.quorum_reached and not empty.timed_out
+
+def test_rounds_are_iterated_once_and_quorum_is_checked(network):
+    round_ = ScatterGather(network.user_node, {'fast1': "once"})
+    round_.result()
+    with pytest.raises(RuntimeError):
+        list(round_)
+    with pytest.raises(ValueError):
+        ScatterGather(network.user_node, {'fast1': "x"}, quorum=2)
+    with pytest.raises(ValueError):
+        ScatterGather(network.user_node, {}, quorum=1)
@@ -0,0 +1,100 @@
+"""Tests for the subinterpreter runtime's thread fallback and its shared-buffer channel"""
+
+import queue
+
+import pytest
+
+import subinterpreter_runtime
+from agent_context import current_agent
+from multi_agent_screen_network import Message
+from subinterpreter_runtime import (SLOT_SIZE, SLOTS_PER_ENDPOINT, BufferChannel, SubinterpreterNetworkManager,
+                                    open_channel)
+
+def message(content, recipient="b"):
+    return Message("m", "a", recipient, content, "")
+
+def echo(message):
+    current_agent().reply(message, f"{current_agent().agent_id}:{message.content}")
+
+def relay(message):
+    # Ask the agent named in the content, then answer the original request with its reply
+    node = current_agent()
+    target, _, content = message.content.partition(":")
+    node.send_message(target, content, message_type="relayed", metadata={'origin': message.metadata['correlation_id']})
+
+def relayed(message):
+    current_agent().send_message("user", f"{current_agent().agent_id}:{message.content}", message_type="done",
+                                 metadata={'in_reply_to': message.metadata['origin']})
+
+def shout(message):
+    current_agent().reply(message, message.content.upper())
+
+def test_channel_round_trip_through_slots_and_inline():
+    inboxes, slabs, free_slots, buffers = open_channel(2, queue.Queue)
+    sender = BufferChannel(0, inboxes, slabs, free_slots)
+    receiver = BufferChannel(1, inboxes, slabs, free_slots)
+
+    sender.send(1, [message("small").to_json(), message("second").to_json()])
+    sender.send(1, [message("x" * (SLOT_SIZE + 1)).to_json()])    # Too big for a slot
+    assert inboxes[1].queue[0][0] == "slot" and inboxes[1].queue[1][0] == "inline"
+
+    payloads = receiver.receive(1.0)
+    assert [payload[1].content for payload in payloads] == ["small", "second", "x" * (SLOT_SIZE + 1)]
+    assert free_slots[0].qsize() == SLOTS_PER_ENDPOINT    # The slot came back
+
+def test_channel_sends_inline_while_every_slot_is_in_flight():
+    inboxes, slabs, free_slots, buffers = open_channel(2, queue.Queue)
+    sender = BufferChannel(0, inboxes, slabs, free_slots)
+    for i in range(SLOTS_PER_ENDPOINT + 3):
+        sender.send(1, [message(str(i)).to_json()])
+    kinds = [item[0] for item in inboxes[1].queue]
+    assert kinds == ["slot"] * SLOTS_PER_ENDPOINT + ["inline"] * 3
+
+    payloads = BufferChannel(1, inboxes, slabs, free_slots).receive(1.0)
+    assert [payload[1].content for payload in payloads] == [str(i) for i in range(SLOTS_PER_ENDPOINT + 3)]
+
+def test_mode_selection(monkeypatch):
+    with pytest.raises(ValueError):
+        SubinterpreterNetworkManager(n_groups=1, mode="fibers")
+
+    monkeypatch.setattr(subinterpreter_runtime, "SUBINTERPRETERS_AVAILABLE", False)
+    assert SubinterpreterNetworkManager(n_groups=1).mode == "thread"
+    with pytest.raises(RuntimeError):
+        SubinterpreterNetworkManager(n_groups=1, mode="subinterpreter")
+
+@pytest.fixture
+def threaded_network():
+    network = SubinterpreterNetworkManager(n_groups=2, mode="thread", stats_interval=0.05)
+    yield network
+    if network.running:
+        network.stop_network()
+
+def test_thread_groups_answer_requests_and_talk_to_each_other(threaded_network):
+    network = threaded_network
+    user = network.add_user()
+    network.add_agent("front", group=0).register_message_handler("text", relay)
+    back = network.add_agent("back", group=1)
+    back.register_message_handler("relayed", relayed)
+    network.start_network()
+
+    assert network.get_network_status()['mode'] == "thread"
+    replies = [user.send_request("front", f"back:job{i}", timeout=10) for i in range(20)]
+    assert [future.result(timeout=10).content for future in replies] == [f"back:job{i}" for i in range(20)]
+
+    # Handlers registered after start are forwarded to the group
+    back.register_message_handler("text", shout)
+    assert user.send_request("back", "late", timeout=10).result(timeout=10).content == "LATE"
+
+    network.stop_network()
+    groups = network.get_network_status()['groups']
+    assert all(group['status'] == "stopped" and group['restarts'] == 0 for group in groups.values())
+    assert groups[0]['processed'] == 20 and groups[1]['processed'] == 21
+
+def test_thread_groups_carry_messages_larger_than_a_slot(threaded_network):
+    network = threaded_network
+    user = network.add_user()
+    network.add_agent("echo", group=1).register_message_handler("text", echo)
+    network.start_network()
+
+    content = "y" * (2 * SLOT_SIZE)
+    assert user.send_request("echo", content, timeout=10).result(timeout=10).content == f"echo:{content}"
@@ -0,0 +1,80 @@
+"""Tests for the load-aware scheduler's bookkeeping and its use by collaborative agents"""
+
+import threading
+
+import pytest
+
+from communication_patterns import AdvancedAgentBehaviors
+from multi_agent_screen_network import Message
+from task_scheduler import LoadAwareScheduler
+
+def message(sender, content, task_id=None):
+    return Message("m", sender, "user", content, "", metadata={'task_id': task_id} if task_id else None)
+
+@pytest.fixture
+def scheduler():
+    dispatched = []
+    scheduler = LoadAwareScheduler(["a", "b"], dispatch=lambda agent_id, task: dispatched.append((agent_id, task.task_id)))
+    scheduler.dispatched = dispatched
+    return scheduler
+
+def test_untracked_accepts_and_results_are_ignored(scheduler):
+    task = scheduler.submit("work", ["a"])
+    scheduler.observe(message("a", "TASK_ACCEPTED:something else"))
+    scheduler.observe(message("a", "TASK_ACCEPTED:other", task_id=999))
+    scheduler.observe(message("b", "RESULT:unasked"))
+    scheduler.observe(message("a", "RESULT:stale", task_id=999))
+    assert scheduler.get_load_report()['a'] == {'in_flight': 1, 'queued': 0, 'completed': 0, 'stolen': 0}
+    assert scheduler.get_load_report()['b']['in_flight'] == 0
+
+    scheduler.observe(message("a", "RESULT:done", task_id=task.task_id))
+    assert scheduler.get_load_report()['a'] == {'in_flight': 0, 'queued': 0, 'completed': 1, 'stolen': 0}
+    assert task.task_id not in scheduler.tasks
+
+def test_results_pull_queued_work_and_steal(scheduler):
+    tasks = [scheduler.submit(f"t{i}", ["a", "b"]) for i in range(4)]
+    assert scheduler.dispatched == [("a", tasks[0].task_id), ("b", tasks[1].task_id)]
+
+    scheduler.task_completed("a", tasks[0].task_id)
+    scheduler.task_completed("a", scheduler.dispatched[-1][1])
+    # a drained its own queue, then stole b's queued task
+    assert [agent for agent, _ in scheduler.dispatched] == ["a", "b", "a", "a"]
+    assert scheduler.get_load_report()['a']['stolen'] == 1
+
+def test_new_and_idle_agents_pull_work(scheduler):
+    scheduler.submit("only c", ["a", "c"])
+    queued = scheduler.submit("also c", ["a", "c"])
+    assert queued.assigned_to == "a" and len(scheduler.dispatched) == 1
+
+    scheduler.add_agent("c")
+    assert scheduler.dispatched[-1] == ("c", queued.task_id)
+
+    # b is busy, so new work for a or b queues up; b then reports idle (e.g. after a restart)
+    busy = scheduler.submit("for b", ["b"])
+    waiting = scheduler.submit("for a or b", ["a", "b"])
+    assert waiting.task_id not in [task_id for _, task_id in scheduler.dispatched]
+    scheduler.loads["b"].in_flight.remove(busy.task_id)
+    scheduler.observe(message("b", "IDLE"))
+    assert scheduler.dispatched[-1] == ("b", waiting.task_id)
+
+def test_collaborative_agents_report_results_to_the_scheduler(local_network):
+    network = local_network(["a", "b"])
+    scheduler = LoadAwareScheduler(["a", "b"], node=network.user_node)
+
+    finished = threading.Semaphore(0)
+    original = scheduler.task_completed
+
+    def task_completed(agent_id, task_id):
+        original(agent_id, task_id)
+        finished.release()
+
+    scheduler.task_completed = task_completed
+    AdvancedAgentBehaviors.create_collaborative_agents(network, scheduler)
+    for i in range(10):
+        scheduler.submit(f"part {i}")
+    for _ in range(10):
+        assert finished.acquire(timeout=10)
+    report = scheduler.get_load_report()
+    assert sum(load['completed'] for load in report.values()) == 10
+    assert all(load['in_flight'] == 0 and load['queued'] == 0 for load in report.values())
+    assert not scheduler.tasks
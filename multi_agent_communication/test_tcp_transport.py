@@ -0,0 +1,128 @@
+"""Tests for the TCP transport: a broker and node processes on localhost"""
+
+import os
+import time
+import socket
+import multiprocessing
+
+import pytest
+
+from multiprocessing import AuthenticationError
+
+from multi_agent_screen_network import Message
+from tcp_transport import (CONTROL_PREFIX, BrokerClient, TcpNetworkManager, _demo_node_main,
+                           read_frame, start_broker_process, write_frame)
+
+AUTHKEY = os.urandom(16)
+CONTEXT = multiprocessing.get_context("spawn")
+
+def wait_until(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.05)
+
+@pytest.fixture(scope="module")
+def broker_address():
+    process, address = start_broker_process(authkey=AUTHKEY)
+    yield address
+    process.terminate()
+    process.join()
+
+@pytest.fixture
+def start_node_process(broker_address):
+    """Start a node process hosting echo agents; waits until the broker routes them"""
+    started = []
+    probe = BrokerClient(broker_address, AUTHKEY)
+
+    def start(node_id, agent_ids):
+        stop = CONTEXT.Event()
+        process = CONTEXT.Process(target=_demo_node_main,
+                                  args=(node_id, broker_address, AUTHKEY, list(agent_ids), stop), daemon=True)
+        process.start()
+        started.append((process, stop))
+        wait_until(lambda: all(probe.request("table")['routes'].get(agent) == node_id for agent in agent_ids))
+        return process
+
+    yield start
+    for process, stop in started:
+        if process.is_alive():    # Setting the event of a killed waiter can block forever
+            stop.set()
+        process.join(timeout=10)
+        if process.is_alive():
+            process.kill()
+    probe.close()
+
+@pytest.fixture
+def driver(broker_address):
+    network = TcpNetworkManager("driver", broker_address, authkey=AUTHKEY)
+    network.add_user()
+    network.start_network()
+    yield network
+    network.stop_network()
+
+def test_request_reply_across_processes(start_node_process, driver):
+    start_node_process("node1", ["n1-a", "n1-b"])
+    start_node_process("node2", ["n2-a"])
+
+    replies = {agent: driver.user_node.send_request(agent, "ping", timeout=10).result().content
+               for agent in ("n1-a", "n1-b", "n2-a")}
+    assert replies == {'n1-a': "node1:ping", 'n1-b': "node1:ping", 'n2-a': "node2:ping"}
+
+def test_conversation_order_is_preserved(start_node_process, driver):
+    start_node_process("node-order", ["ordered"])
+
+    completed = []
+    futures = [driver.user_node.send_request("ordered", str(i), timeout=30) for i in range(2000)]
+    for future in futures:
+        future.add_done_callback(lambda done: completed.append(done.result().content))
+    for future in futures:
+        future.result()
+    assert completed == [f"node-order:{i}" for i in range(2000)]
+
+def test_broker_unregisters_node_when_its_connection_drops(start_node_process, driver):
+    process = start_node_process("node-crash", ["short-lived"])
+    process.kill()
+
+    wait_until(lambda: "node-crash" not in driver.broker.request("table")['nodes'])
+    assert "short-lived" not in driver.broker.request("table")['routes']
+    assert not driver.user_node.send_message("short-lived", "anyone?")
+
+def test_messages_are_rerouted_after_a_peer_dies(start_node_process, driver):
+    doomed = start_node_process("node-doomed", ["phoenix"])
+    assert driver.user_node.send_request("phoenix", "first", timeout=10).result().content == "node-doomed:first"
+
+    doomed.kill()
+    wait_until(lambda: "node-doomed" not in driver.broker.request("table")['nodes'])
+    start_node_process("node-rescue", ["phoenix"])
+
+    # The driver still caches the dead node's address; the failed write re-routes through the broker
+    reply = driver.user_node.send_request("phoenix", "second", timeout=30).result()
+    assert reply.content == "node-rescue:second"
+
+def test_wrong_authkey_is_refused(broker_address):
+    with pytest.raises(AuthenticationError):
+        BrokerClient(broker_address, b"not the key").request("table")
+
+def test_unauthenticated_control_lines_are_ignored(broker_address, driver):
+    host, port = driver.address
+    with socket.create_connection((host, port), timeout=5) as raw:
+        stream = raw.makefile("rwb")
+        adopt = CONTROL_PREFIX + '{"op": "adopt", "from": ["127.0.0.1", 1], "state": {"agent": "intruder"}}'
+        try:
+            read_frame(stream)    # The challenge; answered with the adopt line instead of a proof
+            write_frame(stream, adopt.encode())
+            stream.flush()
+            assert stream.read(1) == b""    # The node hangs up
+        except OSError:
+            pass
+    time.sleep(0.2)
+    assert "intruder" not in driver.agents
+
+def test_forwarding_to_an_unknown_agent_counts_a_drop(driver):
+    message = Message(id="lost", sender="user", recipient="nobody", content="hello",
+                      timestamp="", metadata={'seq': 1})
+    before = driver.transport.dropped
+    driver._forward(message)
+    assert driver.transport.dropped == before + 1
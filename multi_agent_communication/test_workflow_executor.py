@@ -0,0 +1,124 @@
+"""Tests for dependency-driven workflow execution"""
+
+import time
+import random
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+from agent_context import current_agent
+from workflow_executor import WorkflowExecutor, WorkflowTask, request_dispatcher
+
+RELEASE = {    # task: (duration, dependencies)
+    'design': (0.05, []),
+    'backend': (0.15, []),
+    'docs': (0.05, ["backend"]),
+    'frontend': (0.1, ["design", "backend"]),
+    'qa': (0.1, ["frontend", "backend"]),
+    'deploy': (0.05, ["qa", "docs"]),
+}
+
+@pytest.fixture
+def pool():
+    pool = ThreadPoolExecutor(max_workers=16)
+    yield pool
+    pool.shutdown(cancel_futures=True)
+
+def release_tasks():
+    return [WorkflowTask(task_id, f"{task_id}_agent", task_id, deps) for task_id, (_, deps) in RELEASE.items()]
+
+def sleeper(pool, durations, failing=()):
+    def work(task):
+        time.sleep(durations[task.task_id])
+        if task.task_id in failing:
+            raise RuntimeError(f"{task.task_id} broke")
+        return task.task_id.upper()
+    return lambda task: pool.submit(work, task)
+
+def test_tasks_start_only_after_their_dependencies(pool):
+    rng = random.Random(32)
+    for _ in range(5):
+        n = 15
+        tasks = [WorkflowTask(f"t{i}", f"a{i}", "work", [f"t{j}" for j in range(i) if rng.random() < 0.2])
+                 for i in range(n)]
+        rng.shuffle(tasks)
+        durations = {task.task_id: rng.random() / 100 for task in tasks}
+        executor = WorkflowExecutor(tasks, sleeper(pool, durations))
+        report = executor.run(timeout=10)
+
+        assert report.completed and set(report.statuses.values()) == {"done"}
+        for task in executor.tasks.values():
+            assert task.result == task.task_id.upper()
+            for dep in task.depends_on:
+                assert executor.tasks[dep].finished_at <= task.started_at
+
+def test_independent_tasks_run_in_parallel_up_to_the_limit(pool):
+    durations = {task_id: duration for task_id, (duration, _) in RELEASE.items()}
+    parallel = WorkflowExecutor(release_tasks(), sleeper(pool, durations)).run(timeout=10)
+    serial = WorkflowExecutor(release_tasks(), sleeper(pool, durations), max_parallel=1).run(timeout=10)
+
+    assert parallel.max_parallelism >= 2 and serial.max_parallelism == 1
+    assert serial.makespan >= sum(durations.values()) and parallel.makespan < serial.makespan
+    assert parallel.speedup > 1.0
+
+def test_critical_path_follows_the_gating_dependencies(pool):
+    durations = {task_id: duration for task_id, (duration, _) in RELEASE.items()}
+    report = WorkflowExecutor(release_tasks(), sleeper(pool, durations)).run(timeout=10)
+
+    assert report.critical_path == ["backend", "frontend", "qa", "deploy"]
+    assert report.critical_path_time >= 0.4
+    assert report.critical_path_time == pytest.approx(report.makespan, abs=0.1)
+
+def test_a_failed_task_skips_everything_downstream(pool):
+    durations = {task_id: 0.01 for task_id in RELEASE}
+    executor = WorkflowExecutor(release_tasks(), sleeper(pool, durations, failing={"frontend"}))
+    report = executor.run(timeout=10)
+
+    assert not report.completed
+    assert report.statuses == {'design': "done", 'backend': "done", 'docs': "done",
+                               'frontend': "failed", 'qa': "skipped", 'deploy': "skipped"}
+    assert executor.tasks["frontend"].error == "frontend broke"
+
+def test_dispatch_errors_and_cancelled_futures_fail_the_task():
+    def dispatch(task):
+        if task.task_id == "unsendable":
+            raise ConnectionError("no route")
+        future = Future()
+        future.cancel()
+        return future
+
+    tasks = [WorkflowTask("unsendable", "a", "x"), WorkflowTask("cancelled", "b", "x"),
+             WorkflowTask("after", "c", "x", ["unsendable"])]
+    executor = WorkflowExecutor(tasks, dispatch)
+    report = executor.run(timeout=5)
+    assert report.statuses == {'unsendable': "failed", 'cancelled': "failed", 'after': "skipped"}
+    assert executor.tasks["unsendable"].error == "no route" and executor.tasks["cancelled"].error == "cancelled"
+
+def test_run_stops_at_the_timeout():
+    never = Future()
+    executor = WorkflowExecutor([WorkflowTask("stuck", "a", "x"), WorkflowTask("next", "b", "x", ["stuck"])],
+                                lambda task: never)
+    started = time.monotonic()
+    report = executor.run(timeout=0.1)
+    assert time.monotonic() - started < 2
+    assert report.statuses == {'stuck': "running", 'next': "pending"} and not report.completed
+    assert report.critical_path == ["stuck"]
+
+def test_invalid_workflows_are_rejected():
+    with pytest.raises(ValueError, match="cycle"):
+        WorkflowExecutor([WorkflowTask("a", "x", "", ["b"]), WorkflowTask("b", "y", "", ["a"])], lambda task: None)
+    with pytest.raises(ValueError, match="unknown"):
+        WorkflowExecutor([WorkflowTask("a", "x", "", ["ghost"])], lambda task: None)
+    with pytest.raises(ValueError, match="Duplicate"):
+        WorkflowExecutor([WorkflowTask("a", "x", ""), WorkflowTask("a", "y", "")], lambda task: None)
+
+def test_tasks_dispatched_as_requests_to_agents(local_network):
+    network = local_network([f"{task_id}_agent" for task_id in RELEASE])
+    for node in network.agents.values():
+        node.register_message_handler("text", lambda message: current_agent().reply(message, "RESULT:done"))
+
+    executor = WorkflowExecutor(release_tasks(), request_dispatcher(network.user_node, timeout=5))
+    report = executor.run(timeout=10)
+    assert report.completed
+    assert executor.tasks["deploy"].result.content == "RESULT:done"
+    assert executor.tasks["deploy"].result.sender == "deploy_agent"
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Dependency-Driven Parallel Workflow Executor
+Runs a task DAG across agents, dispatching each task as soon as its
+predecessors finish and tracking the critical path while it runs
+"""
+
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass, field
+
+# Dependency types that impose an ordering between agents' work
+ORDERING_DEPENDENCY_TYPES = ("blocking", "sequential")
+
+@dataclass
+class WorkflowTask:
+    """One unit of work for one agent"""
+    task_id: str
+    agent_id: str
+    content: str
+    depends_on: List[str] = field(default_factory=list)
+
+    # Runtime state
+    status: str = "pending"        # pending, ready, running, done, failed, skipped
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: object = None
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+@dataclass
+class WorkflowReport:
+    """Outcome of a workflow run"""
+    statuses: Dict[str, str]
+    makespan: float                  # Wall-clock time of the whole run
+    serial_time: float               # Sum of task durations
+    critical_path: List[str]
+    critical_path_time: float
+    max_parallelism: int
+    completed: bool
+
+    @property
+    def speedup(self) -> float:
+        return self.serial_time / self.makespan if self.makespan > 0 else 0.0
+
+class WorkflowExecutor:
+    """Dispatches a task DAG with maximal parallelism
+
+    ``dispatch`` starts a task and returns a Future that completes when the
+    agent has finished it, e.g. ``node.send_request`` (see
+    ``request_dispatcher``). Ready tasks are dispatched from the thread
+    calling ``run()``; future callbacks only record completion.
+    """
+
+    def __init__(self, tasks: Iterable[WorkflowTask], dispatch: Callable[[WorkflowTask], Future],
+                 max_parallel: Optional[int] = None):
+        self.tasks: Dict[str, WorkflowTask] = {}
+        for task in tasks:
+            if task.task_id in self.tasks:
+                raise ValueError(f"Duplicate task id: {task.task_id}")
+            self.tasks[task.task_id] = task
+
+        self.dispatch = dispatch
+        self.max_parallel = max_parallel
+
+        # Successor lists and remaining-predecessor counts
+        self.dependents: Dict[str, List[str]] = {task_id: [] for task_id in self.tasks}
+        self.remaining: Dict[str, int] = {}
+        for task in self.tasks.values():
+            for dep in task.depends_on:
+                if dep not in self.tasks:
+                    raise ValueError(f"Task {task.task_id} depends on unknown task {dep}")
+                self.dependents[dep].append(task.task_id)
+            self.remaining[task.task_id] = len(set(task.depends_on))
+
+        self._check_acyclic()
+
+        self._condition = threading.Condition()
+        self._ready: deque = deque()
+        self._running = 0
+        self._max_running = 0
+        self._started_at: Optional[float] = None
+
+    @classmethod
+    def from_dependency_system(cls, dep_system, task_contents: Dict[str, str],
+                               dispatch: Callable[[WorkflowTask], Future],
+                               dependency_types: Iterable[str] = ORDERING_DEPENDENCY_TYPES,
+                               max_parallel: Optional[int] = None) -> 'WorkflowExecutor':
+        """Derive the DAG from a DependencyMatrixSystem's ordering matrices
+
+        ``type_matrices[t][i][j] > 0`` means agent i cannot proceed without
+        agent j, so the task of agent i depends on the task of agent j. One
+        task is created per agent listed in ``task_contents``.
+        """
+        if dep_system.adjacency_matrix is None:
+            dep_system.build_matrices()
+
+        wanted = set(dependency_types)
+        matrices = [matrix for dep_type, matrix in dep_system.type_matrices.items()
+                    if dep_type.value in wanted]
+
+        tasks = []
+        for agent_id, content in task_contents.items():
+            i = dep_system.agent_to_index[agent_id]
+            depends_on = set()
+            for matrix in matrices:
+                for j, prerequisite in enumerate(dep_system.agents):
+                    if j != i and prerequisite in task_contents and matrix[i, j] > 0:
+                        depends_on.add(prerequisite)
+            tasks.append(WorkflowTask(agent_id, agent_id, content, sorted(depends_on)))
+
+        return cls(tasks, dispatch, max_parallel)
+
+    def _check_acyclic(self):
+        """Kahn's algorithm; raises ValueError naming the tasks on a cycle"""
+        remaining = dict(self.remaining)
+        queue = deque(task_id for task_id, count in remaining.items() if count == 0)
+        visited = 0
+
+        while queue:
+            task_id = queue.popleft()
+            visited += 1
+            for dependent in self.dependents[task_id]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    queue.append(dependent)
+
+        if visited != len(self.tasks):
+            cyclic = sorted(task_id for task_id, count in remaining.items() if count > 0)
+            raise ValueError(f"Workflow has a dependency cycle among: {', '.join(cyclic)}")
+
+    def run(self, timeout: Optional[float] = None) -> WorkflowReport:
+        """Execute the workflow; returns when every task is finished or the timeout passes"""
+        self._started_at = time.monotonic()
+        deadline = self._started_at + timeout if timeout is not None else None
+
+        with self._condition:
+            for task_id, count in self.remaining.items():
+                if count == 0:
+                    self.tasks[task_id].status = "ready"
+                    self._ready.append(task_id)
+
+        while True:
+            to_start = []
+            with self._condition:
+                while self._ready and (self.max_parallel is None or self._running < self.max_parallel):
+                    task = self.tasks[self._ready.popleft()]
+                    task.status = "running"
+                    task.started_at = time.monotonic()
+                    self._running += 1
+                    self._max_running = max(self._max_running, self._running)
+                    to_start.append(task)
+
+                if not to_start:
+                    if self._finished():
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                    continue
+
+            # Dispatch outside the lock; sending may block
+            for task in to_start:
+                try:
+                    future = self.dispatch(task)
+                except Exception as e:
+                    self._on_task_finished(task.task_id, None, e)
+                    continue
+                future.add_done_callback(lambda f, task_id=task.task_id: self._on_future_done(task_id, f))
+
+        return self.report()
+
+    def _on_future_done(self, task_id: str, future: Future):
+        if future.cancelled():
+            self._on_task_finished(task_id, None, RuntimeError("cancelled"))
+        elif future.exception() is not None:
+            self._on_task_finished(task_id, None, future.exception())
+        else:
+            self._on_task_finished(task_id, future.result(), None)
+
+    def _on_task_finished(self, task_id: str, result, error: Optional[Exception]):
+        with self._condition:
+            task = self.tasks[task_id]
+            task.finished_at = time.monotonic()
+            self._running -= 1
+
+            if error is None:
+                task.status = "done"
+                task.result = result
+                for dependent in self.dependents[task_id]:
+                    self.remaining[dependent] -= 1
+                    if self.remaining[dependent] == 0 and self.tasks[dependent].status == "pending":
+                        self.tasks[dependent].status = "ready"
+                        self._ready.append(dependent)
+            else:
+                task.status = "failed"
+                task.error = str(error) or type(error).__name__
+                self._skip_dependents(task_id)
+
+            self._condition.notify_all()
+
+    def _skip_dependents(self, task_id: str):
+        """Mark everything downstream of a failed task as skipped (lock held)"""
+        stack = list(self.dependents[task_id])
+        while stack:
+            dependent = self.tasks[stack.pop()]
+            if dependent.status == "pending":
+                dependent.status = "skipped"
+                stack.extend(self.dependents[dependent.task_id])
+
+    def _finished(self) -> bool:
+        return self._running == 0 and not self._ready
+
+    def critical_path(self) -> Tuple[List[str], float]:
+        """Current critical path: the chain ending at the latest-finishing (or running) task
+
+        Each task is linked to the predecessor that finished last, i.e. the
+        one that actually gated its start, so the chain shows where the
+        wall-clock time went. Safe to call while the workflow runs.
+        """
+        now = time.monotonic()
+        with self._condition:
+            started = [task for task in self.tasks.values() if task.started_at is not None]
+            if not started:
+                return [], 0.0
+
+            end_of = lambda task: task.finished_at if task.finished_at is not None else now
+            current = max(started, key=end_of)
+            end_time = end_of(current)
+
+            path = [current.task_id]
+            while current.depends_on:
+                current = max((self.tasks[dep] for dep in current.depends_on), key=end_of)
+                path.append(current.task_id)
+
+            path.reverse()
+            return path, end_time - self.tasks[path[0]].started_at
+
+    def report(self) -> WorkflowReport:
+        path, path_time = self.critical_path()
+        with self._condition:
+            statuses = {task_id: task.status for task_id, task in self.tasks.items()}
+            serial_time = sum(task.duration or 0.0 for task in self.tasks.values())
+            makespan = time.monotonic() - self._started_at if self._started_at else 0.0
+
+        return WorkflowReport(
+            statuses=statuses,
+            makespan=makespan,
+            serial_time=serial_time,
+            critical_path=path,
+            critical_path_time=path_time,
+            max_parallelism=self._max_running,
+            completed=all(status == "done" for status in statuses.values())
+        )
+
+def request_dispatcher(node, timeout: Optional[float] = 30.0) -> Callable[[WorkflowTask], Future]:
+    """Dispatch tasks as send_request() calls from a coordinating node"""
+    def dispatch(task: WorkflowTask) -> Future:
+        return node.send_request(task.agent_id, f"TASK_REQUEST:{task.content}", timeout=timeout)
+    return dispatch
+
+def demonstrate_workflow_executor():
+    """Run a small release workflow with simulated agents"""
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    print("DEPENDENCY-DRIVEN WORKFLOW EXECUTOR")
+    print("=" * 38)
+
+    durations = {"backend": 0.3, "frontend": 0.2, "design": 0.1, "docs": 0.1, "qa": 0.2, "deploy": 0.1}
+    tasks = [
+        WorkflowTask("design", "designer", "Design screens"),
+        WorkflowTask("backend", "backend_dev", "Build API"),
+        WorkflowTask("docs", "tech_writer", "Write API docs", ["backend"]),
+        WorkflowTask("frontend", "frontend_dev", "Build UI", ["design", "backend"]),
+        WorkflowTask("qa", "qa_engineer", "Test release", ["frontend", "backend"]),
+        WorkflowTask("deploy", "devops", "Deploy", ["qa", "docs"]),
+    ]
+
+    pool = ThreadPoolExecutor(max_workers=len(tasks))
+    simulated_agent = lambda task: pool.submit(time.sleep, durations[task.task_id])
+
+    report = WorkflowExecutor(tasks, simulated_agent).run(timeout=10)
+    pool.shutdown()
+
+    print(f"Statuses: {report.statuses}")
+    print(f"Makespan: {report.makespan:.2f}s, serial: {report.serial_time:.2f}s, "
+          f"speedup: {report.speedup:.2f}x, max parallel: {report.max_parallelism}")
+    print(f"Critical path: {' → '.join(report.critical_path)} ({report.critical_path_time:.2f}s)")
+
+if __name__ == "__main__":
+    demonstrate_workflow_executor()